@@ -0,0 +1 @@
+# RAG pipeline benchmarks
@@ -0,0 +1,97 @@
+"""
+Embedding backend parity and throughput check.
+
+Encodes the same texts with the float sentence-transformers backend and the
+int8 ONNX backend, reports per-text cosine similarity between the two and the
+throughput of each, and exits non-zero when parity falls below --min-cosine.
+
+Usage (from rag-pipeline/):
+    python -m benchmarks.embedding_parity
+    python -m benchmarks.embedding_parity --texts-file queries.txt --repeat 5 --output parity.json
+"""
+import argparse
+import json
+import sys
+import time
+import numpy as np
+
+from src.embedding_backends import create_embedding_backend, SENTENCE_TRANSFORMERS, ONNX_INT8
+
+SAMPLE_TEXTS = [
+    "What did WESTDALE do in June 2022?",
+    "Who is the buyer in the purchase agreement for 1002-361178-RTT?",
+    "List the closing date and title company for the Dallas property.",
+    "John Smith signed the lease with Acme Corporation on March 3, 2021.",
+    "The seller shall deliver a special warranty deed at closing.",
+    "Escrow deposit of $25,000 held by Republic Title of Texas.",
+    "NCS-1150719-ATL First American Title commitment schedule B exceptions.",
+    "Which documents mention the Fort Worth industrial portfolio?",
+    "The borrower agrees to maintain insurance on the premises at all times.",
+    "Summarize the obligations of the landlord under section 7.",
+]
+
+
+def load_texts(path: str = None):
+    if not path:
+        return SAMPLE_TEXTS
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def measure_throughput(backend, texts, repeat: int) -> float:
+    """Texts per second over `repeat` passes (after one warmup pass)"""
+    backend.encode(texts)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        backend.encode(texts)
+    return len(texts) * repeat / (time.perf_counter() - start)
+
+
+def cosine_rows(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--onnx-model-dir", default="models/onnx")
+    parser.add_argument("--texts-file", help="One text per line (defaults to built-in legal-style queries)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes per backend")
+    parser.add_argument("--min-cosine", type=float, default=0.99, help="Fail if any text is below this similarity")
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    texts = load_texts(args.texts_file)
+    reference = create_embedding_backend(SENTENCE_TRANSFORMERS, args.model)
+    quantized = create_embedding_backend(ONNX_INT8, args.model, args.onnx_model_dir)
+
+    similarities = cosine_rows(np.asarray(reference.encode(texts)), np.asarray(quantized.encode(texts)))
+    report = {
+        "model": args.model,
+        "texts": len(texts),
+        "cosine": {
+            "min": float(similarities.min()),
+            "mean": float(similarities.mean()),
+            "threshold": args.min_cosine
+        },
+        "throughput_texts_per_sec": {
+            SENTENCE_TRANSFORMERS: round(measure_throughput(reference, texts, args.repeat), 1),
+            ONNX_INT8: round(measure_throughput(quantized, texts, args.repeat), 1)
+        }
+    }
+    throughput = report["throughput_texts_per_sec"]
+    report["speedup"] = round(throughput[ONNX_INT8] / throughput[SENTENCE_TRANSFORMERS], 2)
+    report["passed"] = report["cosine"]["min"] >= args.min_cosine
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    sys.exit(0 if report["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
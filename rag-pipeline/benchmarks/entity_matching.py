@@ -0,0 +1,190 @@
+"""
+Entity matching benchmark.
+
+Compares the naive substring matcher with the compiled matchers on a synthetic
+entity corpus (no Milvus or spaCy needed):
+
+  scan      score_entity_matches vs EntityMatcher over every chunk (entity index
+            disabled / array-filter path)
+  index     per-query vocabulary scan with `in` checks (previous EntityIndex.match)
+            vs the trigram / substring lookups of EntityIndex.match
+
+Results of every variant are checked against the naive reference.
+
+Usage (from rag-pipeline/):
+    python -m benchmarks.entity_matching --sizes 10000 100000 --queries 50 --output entity_matching.json
+"""
+import argparse
+import json
+import random
+import time
+from typing import Dict, List
+
+from src.entity_index import (
+    EntityIndex, EntityMatcher, ENTITY_FIELDS, FILE_NUMBER_WEIGHT, clean_query_entity, score_entity_matches
+)
+
+SYLLABLES = ["an", "bel", "cor", "dan", "el", "fra", "gar", "hol", "is", "jon", "ka", "lor",
+             "mar", "nel", "or", "pet", "quin", "ros", "sam", "tor", "ul", "ver", "wil", "yan", "zel"]
+SUFFIXES = {
+    "person_names": "",
+    "location_names": " county",
+    "organization_names": " holdings llc",
+    "date_entities": "",
+    "other_entities": " agreement",
+}
+ROLES = ["", "", " (buyer)", " (seller)", " (lessor)"]
+
+
+def make_word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3)))
+
+
+def make_vocabulary(rng: random.Random, size: int) -> Dict[str, List[str]]:
+    vocabulary = {}
+    for field in ENTITY_FIELDS:
+        if field == "file_numbers":
+            vocabulary[field] = [f"{rng.randint(10, 99)}-{rng.randint(1000, 99999)}" for _ in range(size)]
+        elif field == "date_entities":
+            vocabulary[field] = [f"{rng.choice(['january', 'march', 'june', 'october'])} {rng.randint(1, 28)}, "
+                                 f"{rng.randint(1990, 2024)}" for _ in range(size)]
+        elif field == "person_names":
+            vocabulary[field] = [f"{make_word(rng)} {make_word(rng)}" for _ in range(size)]
+        else:
+            vocabulary[field] = [make_word(rng) + SUFFIXES[field] for _ in range(size)]
+    return vocabulary
+
+
+def make_chunks(rng: random.Random, vocabulary: Dict[str, List[str]], count: int) -> List[Dict[str, List[str]]]:
+    """Chunks reuse a skewed subset of the vocabulary, like real documents"""
+    chunks = []
+    for _ in range(count):
+        chunk = {}
+        for field, values in vocabulary.items():
+            picks = rng.randint(0, 3)
+            chunk[field] = [values[min(int(rng.paretovariate(1.2)) - 1, len(values) - 1)
+                                   if rng.random() < 0.5 else rng.randrange(len(values))]
+                            for _ in range(picks)]
+        chunks.append(chunk)
+    return chunks
+
+
+def make_queries(rng: random.Random, vocabulary: Dict[str, List[str]], count: int) -> List[Dict[str, List[str]]]:
+    """Query entities: exact values, partial names (first name only) and role-annotated names"""
+    queries = []
+    for _ in range(count):
+        query = {field: [] for field in ENTITY_FIELDS}
+        for field in rng.sample(ENTITY_FIELDS, rng.randint(1, 3)):
+            value = rng.choice(vocabulary[field])
+            if field == "person_names" and rng.random() < 0.5:
+                value = value.split()[0]
+            if field in ("person_names", "organization_names"):
+                value += rng.choice(ROLES)
+            query[field].append(value)
+        queries.append(query)
+    return queries
+
+
+def build_postings(chunks: List[Dict[str, List[str]]]) -> Dict[str, Dict[str, set]]:
+    postings = {field: {} for field in ENTITY_FIELDS}
+    for chunk_id, chunk in enumerate(chunks):
+        for field in ENTITY_FIELDS:
+            for value in chunk[field]:
+                postings[field].setdefault(value, set()).add(chunk_id)
+    return postings
+
+
+def vocabulary_scan_match(postings: Dict[str, Dict[str, set]], query_entities: Dict[str, List[str]]) -> Dict[int, int]:
+    """Reference: the vocabulary scan EntityIndex.match used before the trigram index"""
+    scores = {}
+    for query_file in query_entities.get("file_numbers", []):
+        for chunk_id in postings["file_numbers"].get(query_file, ()):
+            scores[chunk_id] = scores.get(chunk_id, 0) + FILE_NUMBER_WEIGHT
+    for field in ENTITY_FIELDS:
+        if field == "file_numbers":
+            continue
+        for query_value in query_entities.get(field, []):
+            clean_query = clean_query_entity(field, query_value)
+            matched_ids = set()
+            for value, chunk_ids in postings[field].items():
+                if clean_query in value or value in clean_query:
+                    matched_ids.update(chunk_ids)
+            for chunk_id in matched_ids:
+                scores[chunk_id] = scores.get(chunk_id, 0) + 1
+    return scores
+
+
+def timed(fn, queries):
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        results.append(fn(query))
+    return results, (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def run_size(size: int, num_queries: int, seed: int) -> Dict[str, float]:
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng, max(size // 4, 100))
+    chunks = make_chunks(rng, vocabulary, size)
+    queries = make_queries(rng, vocabulary, num_queries)
+
+    def naive_scan(query):
+        return {i: s for i, chunk in enumerate(chunks) if (s := score_entity_matches(query, chunk))}
+
+    def compiled_scan(query):
+        matcher = EntityMatcher(query)
+        return {i: s for i, chunk in enumerate(chunks) if (s := matcher.score(chunk))}
+
+    postings = build_postings(chunks)
+    index = EntityIndex()
+    build_start = time.perf_counter()
+    for chunk_id, chunk in enumerate(chunks):
+        index.add_chunk(chunk_id, "doc", chunk)
+    index_build_seconds = time.perf_counter() - build_start
+
+    reference, naive_scan_ms = timed(naive_scan, queries)
+    compiled, compiled_scan_ms = timed(compiled_scan, queries)
+    scanned_index, vocabulary_scan_ms = timed(lambda query: vocabulary_scan_match(postings, query), queries)
+    trigram, trigram_index_ms = timed(index.match, queries)
+
+    for name, results in [("compiled scan", compiled), ("vocabulary scan", scanned_index), ("trigram index", trigram)]:
+        if results != reference:
+            raise AssertionError(f"{name} results differ from score_entity_matches at {size} chunks")
+
+    return {
+        "chunks": size,
+        "queries": num_queries,
+        "avg_matches_per_query": round(sum(len(r) for r in reference) / num_queries, 1),
+        "scan_naive_ms": round(naive_scan_ms, 3),
+        "scan_compiled_ms": round(compiled_scan_ms, 3),
+        "scan_speedup": round(naive_scan_ms / compiled_scan_ms, 2),
+        "index_vocabulary_scan_ms": round(vocabulary_scan_ms, 3),
+        "index_trigram_ms": round(trigram_index_ms, 3),
+        "index_speedup": round(vocabulary_scan_ms / trigram_index_ms, 2),
+        "index_build_seconds": round(index_build_seconds, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    report = []
+    for size in args.sizes:
+        row = run_size(size, args.queries, args.seed)
+        report.append(row)
+        print(f"{size:>8} chunks | scan: naive {row['scan_naive_ms']:.2f}ms, compiled {row['scan_compiled_ms']:.2f}ms "
+              f"({row['scan_speedup']}x) | index: vocabulary scan {row['index_vocabulary_scan_ms']:.3f}ms, "
+              f"trigram {row['index_trigram_ms']:.3f}ms ({row['index_speedup']}x)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
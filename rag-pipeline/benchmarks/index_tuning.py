@@ -0,0 +1,199 @@
+"""
+Vector index tuning benchmark.
+
+Sweeps Milvus index types, metrics and search parameters against a held-out
+query set and reports recall@k (versus exact brute force) and p50/p99 search
+latency for each configuration, so MILVUS_INDEX_TYPE / MILVUS_METRIC_TYPE /
+MILVUS_INDEX_PARAMS / MILVUS_SEARCH_PARAMS can be chosen with data.
+
+Corpus vectors come from the live document_chunks collection (or --synthetic N
+random unit vectors). --num-queries of them are held out of the corpus and used
+as queries; --queries-file encodes real query texts instead. Every configuration
+is built in a temporary collection that is dropped afterwards.
+
+Usage (from rag-pipeline/):
+    python -m benchmarks.index_tuning --host localhost --top-k 10 --output index_tuning.json
+    python -m benchmarks.index_tuning --synthetic 50000 --sweep my_sweep.json
+"""
+import argparse
+import json
+import time
+import numpy as np
+from pymilvus import connections, Collection, FieldSchema, CollectionSchema, DataType, utility
+
+from src.milvus_client import MilvusClient, INDEX_PARAMS
+
+# Each entry builds one index; every search_params variant is measured on it
+DEFAULT_SWEEP = [
+    {"index_type": "FLAT", "metric_type": "L2", "search_params": [{}]},
+    {"index_type": "IVF_FLAT", "metric_type": "L2", "index_params": {"nlist": 128},
+     "search_params": [{"nprobe": 4}, {"nprobe": 10}, {"nprobe": 32}]},
+    {"index_type": "IVF_FLAT", "metric_type": "IP", "index_params": {"nlist": 128},
+     "search_params": [{"nprobe": 10}, {"nprobe": 32}]},
+    {"index_type": "IVF_SQ8", "metric_type": "L2", "index_params": {"nlist": 128},
+     "search_params": [{"nprobe": 10}, {"nprobe": 32}]},
+    {"index_type": "IVF_PQ", "metric_type": "L2", "index_params": {"nlist": 128, "m": 16, "nbits": 8},
+     "search_params": [{"nprobe": 10}, {"nprobe": 32}]},
+    {"index_type": "HNSW", "metric_type": "L2", "index_params": {"M": 16, "efConstruction": 200},
+     "search_params": [{"ef": 32}, {"ef": 64}, {"ef": 128}]},
+    {"index_type": "HNSW", "metric_type": "IP", "index_params": {"M": 16, "efConstruction": 200},
+     "search_params": [{"ef": 64}, {"ef": 128}]},
+]
+
+BENCH_COLLECTION = "index_tuning_bench"
+
+
+def load_corpus(args) -> np.ndarray:
+    """Float32 matrix of corpus vectors (live collection or synthetic)"""
+    if args.synthetic:
+        rng = np.random.default_rng(args.seed)
+        vectors = rng.standard_normal((args.synthetic, args.dim)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    client = MilvusClient(host=args.host, port=args.port)
+    client.connect()
+    client.create_collection()
+    vectors = []
+    for batch in client.iter_all(output_fields=["id", "embedding"]):
+        vectors.extend(row["embedding"] for row in batch)
+        if args.max_vectors and len(vectors) >= args.max_vectors:
+            break
+    return np.asarray(vectors[:args.max_vectors or None], dtype=np.float32)
+
+
+def encode_queries(path: str, model_name: str) -> np.ndarray:
+    from src.embedding_backends import create_embedding_backend, SENTENCE_TRANSFORMERS
+
+    with open(path, encoding="utf-8") as f:
+        texts = [line.strip() for line in f if line.strip()]
+    backend = create_embedding_backend(SENTENCE_TRANSFORMERS, model_name)
+    return np.asarray(backend.encode(texts), dtype=np.float32)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, metric: str, top_k: int) -> np.ndarray:
+    """Ground-truth neighbor positions by brute force"""
+    if metric == "L2":
+        scores = -(
+            (queries ** 2).sum(axis=1, keepdims=True) - 2 * queries @ corpus.T + (corpus ** 2).sum(axis=1)
+        )
+    elif metric == "COSINE":
+        normalized = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+        scores = queries @ normalized.T
+    else:
+        scores = queries @ corpus.T
+    return np.argsort(-scores, axis=1)[:, :top_k]
+
+
+def build_collection(corpus: np.ndarray, config: dict) -> Collection:
+    if utility.has_collection(BENCH_COLLECTION):
+        utility.drop_collection(BENCH_COLLECTION)
+
+    schema = CollectionSchema(fields=[
+        FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=False),
+        FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=corpus.shape[1]),
+    ])
+    collection = Collection(name=BENCH_COLLECTION, schema=schema)
+    for start in range(0, len(corpus), 5000):
+        batch = corpus[start:start + 5000]
+        collection.insert([list(range(start, start + len(batch))), batch.tolist()])
+    collection.flush()
+
+    collection.create_index(field_name="embedding", index_params={
+        "index_type": config["index_type"],
+        "metric_type": config["metric_type"],
+        "params": config.get("index_params", INDEX_PARAMS[config["index_type"]]),
+    })
+    collection.load()
+    return collection
+
+
+def measure(collection: Collection, queries: np.ndarray, truth: np.ndarray, metric: str,
+            search_params: dict, top_k: int) -> dict:
+    latencies = []
+    recalls = []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = collection.search(
+            data=[query.tolist()], anns_field="embedding",
+            param={"metric_type": metric, "params": search_params}, limit=top_k
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        found = {hit.id for hit in result[0]}
+        recalls.append(len(found & set(expected.tolist())) / top_k)
+
+    return {
+        f"recall@{top_k}": round(float(np.mean(recalls)), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", default="19530")
+    parser.add_argument("--synthetic", type=int, help="Use N random unit vectors instead of the live collection")
+    parser.add_argument("--dim", type=int, default=384, help="Dimension of synthetic vectors")
+    parser.add_argument("--max-vectors", type=int, help="Cap on corpus vectors read from the collection")
+    parser.add_argument("--num-queries", type=int, default=200, help="Corpus vectors held out as queries")
+    parser.add_argument("--queries-file", help="Encode these query texts (one per line) instead of holding out vectors")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--sweep", help="JSON file with a list of index configurations (see DEFAULT_SWEEP)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    connections.connect("default", host=args.host, port=args.port)
+
+    corpus = load_corpus(args)
+    if args.queries_file:
+        queries = encode_queries(args.queries_file, args.model)
+    else:
+        rng = np.random.default_rng(args.seed)
+        held_out = rng.choice(len(corpus), size=min(args.num_queries, len(corpus) // 10), replace=False)
+        queries = corpus[held_out]
+        corpus = np.delete(corpus, held_out, axis=0)
+    print(f"Corpus: {len(corpus)} vectors, queries: {len(queries)}, top_k={args.top_k}")
+
+    sweep = DEFAULT_SWEEP
+    if args.sweep:
+        with open(args.sweep) as f:
+            sweep = json.load(f)
+
+    truth_by_metric = {}
+    report = {"corpus_size": len(corpus), "num_queries": len(queries), "top_k": args.top_k, "results": []}
+    try:
+        for config in sweep:
+            metric = config["metric_type"]
+            if metric not in truth_by_metric:
+                truth_by_metric[metric] = exact_top_k(corpus, queries, metric, args.top_k)
+
+            build_start = time.perf_counter()
+            collection = build_collection(corpus, config)
+            build_seconds = round(time.perf_counter() - build_start, 2)
+
+            for search_params in config.get("search_params", [{}]):
+                row = {
+                    "index_type": config["index_type"],
+                    "metric_type": metric,
+                    "index_params": config.get("index_params", INDEX_PARAMS[config["index_type"]]),
+                    "search_params": search_params,
+                    "build_seconds": build_seconds,
+                    **measure(collection, queries, truth_by_metric[metric], metric, search_params, args.top_k),
+                }
+                report["results"].append(row)
+                print(f"{row['index_type']:<9} {metric:<6} {json.dumps(row['index_params']):<36} "
+                      f"{json.dumps(search_params):<14} recall@{args.top_k}={row[f'recall@{args.top_k}']:.4f} "
+                      f"p50={row['p50_ms']:.2f}ms p99={row['p99_ms']:.2f}ms")
+    finally:
+        if utility.has_collection(BENCH_COLLECTION):
+            utility.drop_collection(BENCH_COLLECTION)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Retrieval benchmark suite.
+
+Generates a synthetic legal-style corpus (benchmarks.synthetic_corpus) at each
+requested size, ingests it through IngestionService into a fresh local vector
+store, then times the retrieval hot paths on the result:
+
+  ingestion            documents/s, chunks/s, per-document latency
+  semantic_search      query embedding + vector search
+  entity_based_search  query NER + entity index match + hydration
+  retrieve_scenario_1  candidate documents + document-filtered search (--scenario-1-mode)
+  retrieve_hybrid      both scenarios, merged
+
+Query latencies are reported as p50/p95/p99/mean with sequential throughput,
+plus the per-stage breakdown from src.metrics. Result caches are disabled so
+every query does the full work. The JSON report (--output) is meant to be
+diffed between versions of the pipeline.
+
+By default a hashed bag-of-words embedder and a gazetteer NER over the corpus
+vocabulary stand in for the real models, so the numbers measure the pipeline
+rather than model inference and 100k-chunk runs finish in minutes. Use
+--embedder model / --ner spacy to include the configured models.
+
+Usage (from rag-pipeline/):
+    python -m benchmarks.retrieval_benchmark --sizes 1000 10000 100000 --output retrieval.json
+    python -m benchmarks.retrieval_benchmark --sizes 1000 --embedder model --ner spacy
+    python -m benchmarks.retrieval_benchmark --sizes 100000 --scenario-1-mode routed
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Union
+
+import numpy as np
+
+from src.bm25_index import BM25Index
+from src.cache import GenerationCounter
+from src.document_index import DocumentIndex
+from src.embedding_backends import EmbeddingBackend
+from src.entity_index import EntityIndex
+from src.ingestion_service import IngestionService
+from src.metrics import collect_timings
+from src.model_registry import model_registry, LOCAL
+from src.retrieval_service import RetrievalService, SCENARIO_1_MODES
+
+from benchmarks.synthetic_corpus import SyntheticCorpus, GazetteerEntityExtractor, write_markdown
+
+HASHING = "hashing"
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbedder(EmbeddingBackend):
+    """Deterministic signed feature-hashing of words, L2 normalized (no model download)"""
+
+    name = HASHING
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+        self._buckets: Dict[str, tuple] = {}
+
+    def _bucket(self, word: str) -> tuple:
+        bucket = self._buckets.get(word)
+        if bucket is None:
+            h = zlib.crc32(word.encode("utf-8"))
+            bucket = self._buckets[word] = (h % self.dimension, 1.0 if h & 0x80000000 else -1.0)
+        return bucket
+
+    def encode(self, texts: Union[str, List[str]], batch_size: int = 32, convert_to_numpy: bool = True) -> np.ndarray:
+        single = isinstance(texts, str)
+        batch = [texts] if single else texts
+        vectors = np.zeros((len(batch), self.dimension), dtype=np.float32)
+        for row, text in enumerate(batch):
+            for word in _WORD_RE.findall(text.lower()):
+                index, sign = self._bucket(word)
+                vectors[row, index] += sign
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.maximum(norms, 1e-12)
+        return vectors[0] if single else vectors
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+
+def latency_stats(samples_ms: List[float]) -> Dict[str, float]:
+    samples = np.asarray(samples_ms)
+    return {
+        "count": len(samples_ms),
+        "p50_ms": round(float(np.percentile(samples, 50)), 3),
+        "p95_ms": round(float(np.percentile(samples, 95)), 3),
+        "p99_ms": round(float(np.percentile(samples, 99)), 3),
+        "mean_ms": round(float(samples.mean()), 3),
+        "qps": round(1000 * len(samples_ms) / float(samples.sum()), 1),
+    }
+
+
+def measure(fn: Callable[[Any], Any], items: List[Any]) -> Dict[str, Any]:
+    """Time fn per item; latency percentiles plus the stage breakdown across all calls"""
+    samples = []
+    with collect_timings() as timings:
+        for item in items:
+            start = time.perf_counter()
+            fn(item)
+            samples.append((time.perf_counter() - start) * 1000)
+    return {**latency_stats(samples), "stages": timings.to_dict()}
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def model_settings(args) -> Dict[str, str]:
+    """Embedding model/backend names to pass to the services, registering stand-ins as needed"""
+    model_registry.clear()
+    if args.embedder == HASHING:
+        name = f"hashing-{args.dimension}"
+        model_registry.get_or_create(("embedding", HASHING, name), lambda: HashingEmbedder(args.dimension))
+        return {"embedding_model": name, "embedding_backend": HASHING}
+
+    from src.config import settings
+    return {"embedding_model": settings.embedding_model, "embedding_backend": settings.embedding_backend,
+            "onnx_model_dir": settings.onnx_model_dir}
+
+
+def run_size(size: int, args, work_dir: str) -> Dict[str, Any]:
+    corpus = SyntheticCorpus(args.seed, args.vocabulary_size, args.entity_density)
+    documents = corpus.documents(size, args.pages_per_document)
+    queries = [q["query"] for q in corpus.queries(documents, args.queries)]
+
+    size_dir = os.path.join(work_dir, str(size))
+    paths = write_markdown(documents, os.path.join(size_dir, "documents"))
+
+    models = model_settings(args)
+    if args.ner == "gazetteer":
+        model_registry.get_or_create(("entity_extractor", "en_core_web_lg"),
+                                     lambda: GazetteerEntityExtractor(corpus.vocabulary))
+
+    entity_index = EntityIndex()
+    bm25_index = BM25Index(path=os.path.join(size_dir, "bm25_index"))
+    document_index = DocumentIndex(path=os.path.join(size_dir, "document_index"))
+    generation = GenerationCounter()
+    shared = {**models, "vector_store": LOCAL, "local_store_path": os.path.join(size_dir, "vector_store")}
+
+    ingestion = IngestionService(**shared, entity_index=entity_index, bm25_index=bm25_index,
+                                 document_index=document_index, generation=generation)
+    ingestion_start = time.perf_counter()
+    ingest = measure(ingestion.ingest_document, paths)
+    ingestion_seconds = time.perf_counter() - ingestion_start
+
+    retrieval = RetrievalService(
+        **shared, entity_index=entity_index, bm25_index=bm25_index, document_index=document_index,
+        generation=generation, scenario_1_mode=args.scenario_1_mode,
+        parallel=not args.sequential, embedding_cache_size=0, result_cache_size=0
+    )
+    for query in queries[:args.warmup]:
+        retrieval.retrieve_hybrid(query)
+
+    return {
+        "chunks": ingestion.milvus_client.num_entities,
+        "documents": len(paths),
+        "scenario_1_mode": args.scenario_1_mode,
+        "queries": len(queries),
+        "ingestion": {
+            "seconds": round(ingestion_seconds, 2),
+            "documents_per_second": round(len(paths) / ingestion_seconds, 1),
+            "chunks_per_second": round(size / ingestion_seconds, 1),
+            "document_latency": ingest,
+        },
+        "semantic_search": measure(lambda q: retrieval.semantic_search(q, top_k=3), queries),
+        "entity_based_search": measure(lambda q: retrieval.entity_based_search(q, top_k=3), queries),
+        "retrieve_scenario_1": measure(lambda q: retrieval.retrieve_scenario_1(q, top_k=5), queries),
+        "retrieve_hybrid": measure(retrieval.retrieve_hybrid, queries),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Corpus sizes in chunks")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed hybrid queries before measuring")
+    parser.add_argument("--pages-per-document", type=int, default=10)
+    parser.add_argument("--entity-density", type=float, default=3.0, help="Mean entity mentions per page")
+    parser.add_argument("--vocabulary-size", type=int, default=2000, help="Distinct entities per type")
+    parser.add_argument("--embedder", choices=[HASHING, "model"], default=HASHING,
+                        help="hashing: feature-hashing stand-in; model: EMBEDDING_MODEL / EMBEDDING_BACKEND")
+    parser.add_argument("--dimension", type=int, default=384, help="Hashing embedder dimension")
+    parser.add_argument("--ner", choices=["gazetteer", "spacy"], default="gazetteer")
+    parser.add_argument("--scenario-1-mode", choices=SCENARIO_1_MODES, default="two_pass",
+                        help="How scenario 1 picks candidate documents")
+    parser.add_argument("--sequential", action="store_true", help="Disable concurrent scenario execution")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", help="Where corpora and stores are written (default: a temporary directory)")
+    parser.add_argument("--verbose", action="store_true", help="Keep the pipeline's INFO logging")
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger("src").setLevel(logging.WARNING)
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="retrieval_benchmark_")
+    report = {"revision": git_revision(), "config": vars(args), "results": []}
+    try:
+        for size in args.sizes:
+            row = run_size(size, args, work_dir)
+            report["results"].append(row)
+            print(f"{row['chunks']:>8} chunks | ingest {row['ingestion']['chunks_per_second']:.0f} chunks/s | "
+                  + " | ".join(f"{name} p50 {row[name]['p50_ms']:.2f}ms p99 {row[name]['p99_ms']:.2f}ms"
+                               for name in ("semantic_search", "entity_based_search", "retrieve_scenario_1",
+                                            "retrieve_hybrid")))
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
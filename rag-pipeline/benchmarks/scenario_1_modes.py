@@ -0,0 +1,169 @@
+"""
+Scenario 1 latency by mode: two_pass vs routed vs grouped.
+
+two_pass  top-3 search, then a document-filtered search (two round trips)
+routed    document centroid index, then the filtered search (one round trip)
+grouped   one over-fetched search grouped by document client-side (one round
+          trip; the filtered search only runs as a fallback)
+
+Every mode runs the same queries against the same collection. The report
+gives latency percentiles, vector-store round trips per query (from the stage
+timings) and how often each mode returns exactly the two_pass chunks, in order,
+and the same distances (equal up to the order of tied chunks, which the vector
+store breaks arbitrarily and differently for different limits). Embedding and
+result caches are disabled.
+
+By default a synthetic corpus is ingested into a temporary local store with the
+hashing embedder and gazetteer NER (see benchmarks.retrieval_benchmark). With
+--vector-store milvus the live collection at --host/--port is queried instead,
+through the configured embedding model, so round trips cost real network time;
+nothing is ingested.
+
+Usage (from rag-pipeline/):
+    python -m benchmarks.scenario_1_modes --chunks 20000 --output scenario_1_modes.json
+    python -m benchmarks.scenario_1_modes --vector-store milvus --host localhost --queries 500
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, List
+
+from src.cache import GenerationCounter
+from src.document_index import DocumentIndex
+from src.entity_index import EntityIndex
+from src.ingestion_service import IngestionService
+from src.model_registry import model_registry, LOCAL, MILVUS
+from src.retrieval_service import RetrievalService, SCENARIO_1_MODES
+
+from benchmarks.retrieval_benchmark import HASHING, git_revision, measure, model_settings
+from benchmarks.synthetic_corpus import SyntheticCorpus, GazetteerEntityExtractor, write_markdown
+
+ROUND_TRIP_STAGES = ("semantic_search", "scenario_1.filtered_search")
+
+
+def round_trips_per_query(report: Dict[str, Any]) -> float:
+    stages = report["stages"]
+    return round(sum(stages.get(name, {}).get("count", 0) for name in ROUND_TRIP_STAGES) / report["count"], 3)
+
+
+def shared_setup(args, work_dir: str) -> Dict[str, Any]:
+    """Service keyword arguments shared by every mode, plus the query texts"""
+    corpus = SyntheticCorpus(args.seed, args.vocabulary_size, args.entity_density)
+    entity_index = EntityIndex()
+    document_index = DocumentIndex(path=os.path.join(work_dir, "document_index"))
+    generation = GenerationCounter()
+
+    if args.vector_store == MILVUS:
+        from src.config import settings
+        model_registry.clear()
+        shared = {"embedding_model": settings.embedding_model, "embedding_backend": settings.embedding_backend,
+                  "onnx_model_dir": settings.onnx_model_dir, "vector_store": MILVUS,
+                  "milvus_host": args.host, "milvus_port": args.port, "milvus_options": settings.milvus_options()}
+        # Live collection: any text works as a query; the corpus generator supplies realistic ones
+        documents = corpus.documents(args.queries, 1)
+    else:
+        documents = corpus.documents(args.chunks, args.pages_per_document)
+        paths = write_markdown(documents, os.path.join(work_dir, "documents"))
+        shared = {**model_settings(args), "vector_store": LOCAL,
+                  "local_store_path": os.path.join(work_dir, "vector_store")}
+        model_registry.get_or_create(("entity_extractor", "en_core_web_lg"),
+                                     lambda: GazetteerEntityExtractor(corpus.vocabulary))
+        ingestion = IngestionService(**shared, entity_index=entity_index, document_index=document_index,
+                                     generation=generation)
+        for path in paths:
+            ingestion.ingest_document(path)
+
+    queries = [q["query"] for q in corpus.queries(documents, args.queries)]
+    return {"shared": {**shared, "entity_index": entity_index, "document_index": document_index,
+                       "generation": generation}, "queries": queries}
+
+
+def run(args, work_dir: str) -> Dict[str, Any]:
+    setup = shared_setup(args, work_dir)
+    queries: List[str] = setup["queries"]
+
+    results = {}
+    baseline = None
+    retrieval = None
+    for mode in args.modes:
+        retrieval = RetrievalService(
+            **setup["shared"], scenario_1_mode=mode, routing_documents=args.routing_documents,
+            routing_entity_weight=args.routing_entity_weight,
+            grouped_search_window=args.grouped_search_window,
+            embedding_cache_size=0, result_cache_size=0, payload_cache_size=0
+        )
+        for query in queries[:args.warmup]:
+            retrieval.retrieve_scenario_1(query, top_k=args.top_k)
+
+        rankings = [
+            [(chunk["id"], round(chunk["distance"], 5))
+             for chunk in retrieval.retrieve_scenario_1(query, top_k=args.top_k, hydrate=False)]
+            for query in queries
+        ]
+        if baseline is None and mode == "two_pass":
+            baseline = rankings
+
+        report = measure(lambda q: retrieval.retrieve_scenario_1(q, top_k=args.top_k, hydrate=False), queries)
+        report["round_trips_per_query"] = round_trips_per_query(report)
+        if baseline is not None:
+            pairs = list(zip(rankings, baseline))
+            report["same_as_two_pass"] = round(sum(a == b for a, b in pairs) / len(queries), 4)
+            report["same_distances_as_two_pass"] = round(
+                sum([d for _, d in a] == [d for _, d in b] for a, b in pairs) / len(queries), 4
+            )
+        results[mode] = report
+
+    return {"chunks": retrieval.milvus_client.num_entities if retrieval else 0, "queries": len(queries),
+            "modes": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=SCENARIO_1_MODES, default=list(SCENARIO_1_MODES),
+                        help="Modes to compare (two_pass first to get the agreement column)")
+    parser.add_argument("--vector-store", choices=[LOCAL, MILVUS], default=LOCAL)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", default="19530")
+    parser.add_argument("--chunks", type=int, default=20000, help="Synthetic corpus size (local store)")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--routing-documents", type=int, default=3)
+    parser.add_argument("--routing-entity-weight", type=float, default=0.05)
+    parser.add_argument("--grouped-search-window", type=int, default=100)
+    parser.add_argument("--pages-per-document", type=int, default=10)
+    parser.add_argument("--entity-density", type=float, default=3.0, help="Mean entity mentions per page")
+    parser.add_argument("--vocabulary-size", type=int, default=2000, help="Distinct entities per type")
+    parser.add_argument("--embedder", choices=[HASHING, "model"], default=HASHING,
+                        help="Local store only; Milvus always uses the configured model")
+    parser.add_argument("--dimension", type=int, default=384, help="Hashing embedder dimension")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="Keep the pipeline's INFO logging")
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger("src").setLevel(logging.WARNING)
+
+    work_dir = tempfile.mkdtemp(prefix="scenario_1_modes_")
+    try:
+        result = run(args, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    for mode, report in result["modes"].items():
+        agreement = (f" | same as two_pass {report['same_as_two_pass']:.1%} "
+                     f"(distances {report['same_distances_as_two_pass']:.1%})" if "same_as_two_pass" in report else "")
+        print(f"{mode:>8} | p50 {report['p50_ms']:.2f}ms p95 {report['p95_ms']:.2f}ms p99 {report['p99_ms']:.2f}ms | "
+              f"{report['round_trips_per_query']} round trips/query{agreement}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"revision": git_revision(), "config": vars(args), **result}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Synthetic legal-style corpus generator.
+
+Produces real-estate / title documents whose pages mention people, organizations,
+locations, dates and file numbers in the shapes EntityExtractor recognizes
+(e.g. "1002-361178-RTT", "June 1, 2022"). Entity density (entities per page) is
+controllable, every page carries its ground-truth entities, and queries are
+generated with the entities they mention.
+
+Also provides GazetteerEntityExtractor, a drop-in for EntityExtractor that
+finds the corpus vocabulary by dictionary matching, so large corpora can be
+ingested without paying for spaCy.
+
+Usage (from rag-pipeline/), writing markdown files DocumentLoader can ingest:
+    python -m benchmarks.synthetic_corpus --chunks 1000 --output-dir data/synthetic
+"""
+import argparse
+import json
+import os
+import random
+import re
+from typing import List, Dict, Any
+
+from src.entity_index import ENTITY_FIELDS
+from src.entity_matcher import AhoCorasick
+
+FIRST_NAMES = ["james", "mary", "robert", "patricia", "john", "jennifer", "michael", "linda", "david",
+               "elizabeth", "william", "barbara", "richard", "susan", "joseph", "jessica", "thomas",
+               "sarah", "charles", "karen", "daniel", "nancy", "matthew", "lisa", "anthony", "margaret"]
+LAST_NAMES = ["smith", "johnson", "williams", "brown", "jones", "garcia", "miller", "davis", "rodriguez",
+              "martinez", "hernandez", "lopez", "gonzalez", "wilson", "anderson", "thomas", "taylor",
+              "moore", "jackson", "martin", "lee", "perez", "thompson", "white", "harris", "sanchez"]
+ORG_WORDS = ["westdale", "summit", "lone star", "pinnacle", "redwood", "meridian", "granite", "harbor",
+             "prairie", "cypress", "frontier", "keystone", "liberty", "sterling", "magnolia", "trinity"]
+ORG_SUFFIXES = ["holdings llc", "properties inc", "capital partners", "title company", "realty group",
+                "investments lp", "development corp", "bank"]
+CITIES = ["dallas", "fort worth", "austin", "houston", "san antonio", "plano", "arlington", "irving",
+          "frisco", "denton", "waco", "el paso", "lubbock", "amarillo", "tyler", "midland"]
+MONTHS = ["january", "february", "march", "april", "may", "june", "july", "august", "september",
+          "october", "november", "december"]
+FILE_SUFFIXES = ["RTT", "ATL", "FAT", "STW", "CTX", "ORT"]
+
+BOILERPLATE = [
+    "The parties agree that time is of the essence in the performance of this agreement.",
+    "All notices shall be in writing and delivered by certified mail, return receipt requested.",
+    "The seller shall deliver a special warranty deed conveying good and indefeasible title.",
+    "Any earnest money shall be held in escrow pending closing or termination of this contract.",
+    "The buyer may terminate this contract during the option period for any reason.",
+    "Property taxes for the current year shall be prorated through the closing date.",
+    "This agreement shall be governed by the laws of the State of Texas.",
+    "The title commitment shall list all exceptions to coverage under Schedule B.",
+    "Each party shall bear its own attorney fees incurred in connection with this transaction.",
+    "The survey shall be certified to the buyer, the title company and the lender.",
+    "Casualty loss prior to closing shall be the responsibility of the seller.",
+    "The lessee shall maintain commercial general liability insurance at all times.",
+]
+
+# Sentence templates per entity type; {value} is the entity as it appears in the text
+TEMPLATES = {
+    "person_names": [
+        "{value} executed this agreement as the authorized signatory.",
+        "The buyer, {value}, acknowledges receipt of the disclosure statement.",
+        "Notices to the seller shall be sent to the attention of {value}.",
+    ],
+    "organization_names": [
+        "{value} shall act as escrow agent for this transaction.",
+        "The loan will be funded by {value} at closing.",
+        "{value} issued the title commitment referenced herein.",
+    ],
+    "location_names": [
+        "The property is located in {value}, Texas.",
+        "Closing shall take place at the offices of the title company in {value}.",
+    ],
+    "date_entities": [
+        "The closing shall occur on or before {value}.",
+        "This agreement is effective as of {value}.",
+    ],
+    "file_numbers": [
+        "Title commitment file number {value} is attached as Exhibit B.",
+        "Please reference GF No. {value} on all correspondence.",
+    ],
+}
+
+SEMANTIC_QUERIES = [
+    "What are the seller's obligations at closing?",
+    "How is the earnest money handled if the contract terminates?",
+    "Which party bears the risk of casualty loss before closing?",
+    "How are property taxes prorated?",
+    "What insurance must the lessee maintain?",
+    "Who must the survey be certified to?",
+]
+
+
+def display_form(field: str, value: str) -> str:
+    """How a (lowercase) entity is written in document text"""
+    if field == "file_numbers":
+        return value.upper()
+    if field == "date_entities":
+        month, rest = value.split(" ", 1)
+        return f"{month.capitalize()} {rest}"
+    return value.title().replace("Llc", "LLC").replace("Lp", "LP")
+
+
+class SyntheticCorpus:
+    """Entity vocabulary plus document and query generators (deterministic for a seed)"""
+
+    def __init__(self, seed: int = 0, vocabulary_size: int = 2000, entity_density: float = 3.0):
+        """
+        vocabulary_size: distinct entities per type
+        entity_density: mean number of entity mentions per page
+        """
+        self.rng = random.Random(seed)
+        self.entity_density = entity_density
+        rng = self.rng
+
+        people = {f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(vocabulary_size * 2)}
+        orgs = {f"{rng.choice(ORG_WORDS)} {rng.choice(ORG_WORDS)} {rng.choice(ORG_SUFFIXES)}"
+                for _ in range(vocabulary_size * 2)}
+        dates = {f"{rng.choice(MONTHS)} {rng.randint(1, 28)}, {rng.randint(2005, 2024)}"
+                 for _ in range(vocabulary_size * 2)}
+        files = {f"{rng.randint(1000, 9999)}-{rng.randint(100000, 999999)}-{rng.choice(FILE_SUFFIXES)}".lower()
+                 for _ in range(vocabulary_size)}
+        self.vocabulary: Dict[str, List[str]] = {
+            "person_names": sorted(people)[:vocabulary_size],
+            "organization_names": sorted(orgs)[:vocabulary_size],
+            "location_names": list(CITIES),
+            "date_entities": sorted(dates)[:vocabulary_size],
+            "file_numbers": sorted(files),
+        }
+
+    def _pick_entity(self, field: str, document_entities: Dict[str, List[str]]) -> str:
+        """Entities repeat within a document, as parties and file numbers do"""
+        if document_entities[field] and self.rng.random() < 0.6:
+            return self.rng.choice(document_entities[field])
+        value = self.rng.choice(self.vocabulary[field])
+        document_entities[field].append(value)
+        return value
+
+    def _page(self, document_entities: Dict[str, List[str]]) -> Dict[str, Any]:
+        sentences = self.rng.sample(BOILERPLATE, 4)
+        entities = {field: [] for field in ENTITY_FIELDS}
+        mentions = min(int(self.rng.expovariate(1 / self.entity_density) + 0.5), 12) if self.entity_density else 0
+        for _ in range(mentions):
+            field = self.rng.choice(list(TEMPLATES))
+            value = self._pick_entity(field, document_entities)
+            template = self.rng.choice(TEMPLATES[field])
+            sentences.insert(self.rng.randrange(len(sentences) + 1), template.format(value=display_form(field, value)))
+            if value not in entities[field]:
+                entities[field].append(value)
+        return {"text": " ".join(sentences), "entities": entities}
+
+    def documents(self, num_chunks: int, pages_per_document: int = 10) -> List[Dict[str, Any]]:
+        """Documents totalling num_chunks pages: {document_id, pages: [{page_number, text, entities}]}"""
+        documents = []
+        remaining = num_chunks
+        while remaining > 0:
+            count = min(pages_per_document, remaining)
+            document_entities = {field: [] for field in ENTITY_FIELDS}
+            pages = []
+            for page_number in range(1, count + 1):
+                page = self._page(document_entities)
+                page["page_number"] = page_number
+                pages.append(page)
+            documents.append({"document_id": f"synthetic_{len(documents):06d}", "pages": pages})
+            remaining -= count
+        return documents
+
+    def queries(self, documents: List[Dict[str, Any]], count: int) -> List[Dict[str, Any]]:
+        """Entity, semantic and mixed queries over entities that occur in the corpus"""
+        queries = []
+        for index in range(count):
+            page = self.rng.choice(self.rng.choice(documents)["pages"])
+            mentioned = [(field, value) for field, values in page["entities"].items() for value in values]
+            kind = ("entity", "semantic", "mixed")[index % 3]
+            if kind == "semantic" or not mentioned:
+                queries.append({"query": self.rng.choice(SEMANTIC_QUERIES), "kind": "semantic",
+                                "entities": {field: [] for field in ENTITY_FIELDS}})
+                continue
+
+            field, value = self.rng.choice(mentioned)
+            entities = {name: [] for name in ENTITY_FIELDS}
+            entities[field].append(value)
+            if kind == "entity":
+                text = f"Which documents mention {display_form(field, value)}?"
+            else:
+                text = f"What are the closing obligations involving {display_form(field, value)}?"
+            queries.append({"query": text, "kind": kind, "entities": entities})
+        return queries
+
+
+def write_markdown(documents: List[Dict[str, Any]], directory: str) -> List[str]:
+    """Write documents as markdown files with <!-- Page N --> markers; returns the paths"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for document in documents:
+        path = os.path.join(directory, f"{document['document_id']}.md")
+        with open(path, "w", encoding="utf-8") as f:
+            for page in document["pages"]:
+                f.write(f"<!-- Page {page['page_number']} -->\n{page['text']}\n\n")
+        paths.append(path)
+    return paths
+
+
+class GazetteerEntityExtractor:
+    """
+    EntityExtractor stand-in that finds known corpus entities by dictionary match.
+
+    Returns the same JSON-string dict as EntityExtractor.extract_entities, with
+    file numbers found by the same regex, at a tiny fraction of spaCy's cost.
+    """
+
+    FILE_NUMBER_PATTERN = re.compile(r'\b[A-Z0-9]{3,4}-\d{5,7}-[A-Z]{2,4}\b')
+
+    def __init__(self, vocabulary: Dict[str, List[str]]):
+        self._fields = {}
+        for field, values in vocabulary.items():
+            if field == "file_numbers":
+                continue
+            for value in values:
+                self._fields[value] = field
+        self._automaton = AhoCorasick(self._fields)
+
+    def extract_entities(self, text: str) -> Dict[str, str]:
+        entities = {field: [] for field in ENTITY_FIELDS}
+        lowered = text.lower()
+        for value in sorted(self._automaton.find(lowered), key=lowered.find):
+            entities[self._fields[value]].append(value)
+        entities["file_numbers"] = list(dict.fromkeys(m.lower() for m in self.FILE_NUMBER_PATTERN.findall(text)))
+        return {field: json.dumps(values) for field, values in entities.items()}
+
+    def extract_entities_batch(self, texts: List[str], batch_size: int = 64) -> List[Dict[str, str]]:
+        return [self.extract_entities(text) for text in texts]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=1000, help="Total pages (chunks) to generate")
+    parser.add_argument("--pages-per-document", type=int, default=10)
+    parser.add_argument("--entity-density", type=float, default=3.0, help="Mean entity mentions per page")
+    parser.add_argument("--vocabulary-size", type=int, default=2000, help="Distinct entities per type")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output-dir", required=True)
+    args = parser.parse_args()
+
+    corpus = SyntheticCorpus(args.seed, args.vocabulary_size, args.entity_density)
+    documents = corpus.documents(args.chunks, args.pages_per_document)
+    paths = write_markdown(documents, args.output_dir)
+    print(f"Wrote {len(paths)} documents ({args.chunks} pages) to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
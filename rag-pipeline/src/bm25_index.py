@@ -0,0 +1,117 @@
+from collections import Counter
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+import heapq
+import logging
+import math
+import re
+from .index_log import PersistedIndex
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Words, numbers and compound identifiers such as file numbers ("1002-361178-rtt")
+# or dates ("06/01/2022"), which are kept whole as well as split into their parts
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-/.][a-z0-9]+)*")
+_PART_SPLIT_RE = re.compile(r"[-/.]")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms of text; compound identifiers also yield their parts"""
+    terms = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        terms.append(token)
+        if not token.isalnum():
+            terms.extend(part for part in _PART_SPLIT_RE.split(token) if part)
+    return terms
+
+
+class BM25Index(PersistedIndex):
+    """
+    In-memory BM25 inverted index over chunk text.
+
+    Postings map each term to {chunk_id: term frequency}. The ingestion service
+    keeps it in sync; every chunk's term counts are also appended to the log
+    under path, so restarts replay them instead of re-tokenizing the collection.
+    """
+
+    name = "BM25 index"
+    LOG_FILE = "bm25_chunks.jsonl"
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        super().__init__(path)
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._lengths: Dict[int, int] = {}
+        self._chunk_documents: Dict[int, str] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    @property
+    def num_chunks(self) -> int:
+        return len(self._lengths)
+
+    def describe(self) -> str:
+        return f"{len(self)} chunks, {len(self._postings)} terms"
+
+    def clear(self):
+        with self._lock:
+            self._postings = {}
+            self._lengths = {}
+            self._chunk_documents = {}
+            self._total_length = 0
+            self.is_built = False
+
+    def _add_entry(self, entry: Dict[str, Any]):
+        """Index one chunk's term counts; caller holds the lock"""
+        chunk_id = entry["id"]
+        if chunk_id in self._lengths:
+            return
+        length = sum(entry["terms"].values())
+        self._lengths[chunk_id] = length
+        self._chunk_documents[chunk_id] = entry["document_id"]
+        self._total_length += length
+        for term, count in entry["terms"].items():
+            self._postings.setdefault(term, {})[chunk_id] = count
+
+    def add_chunks(self, chunk_ids: Iterable[int], chunks: Iterable[Dict[str, Any]]):
+        """Index freshly inserted chunks given their primary keys and append them to the log"""
+        entries = [
+            {"id": int(chunk_id), "document_id": chunk["document_id"], "terms": dict(Counter(tokenize(chunk["text"])))}
+            for chunk_id, chunk in zip(chunk_ids, chunks)
+        ]
+        self._add_entries(entries)
+        logger.info(f"BM25 index: added {len(entries)} chunks (total {len(self)})")
+
+    def _entries_from_store(self, milvus_client) -> List[Dict[str, Any]]:
+        return [
+            {"id": row["id"], "document_id": row["document_id"], "terms": dict(Counter(tokenize(row["text"])))}
+            for batch in milvus_client.iter_all(output_fields=["id", "document_id", "text"])
+            for row in batch
+        ]
+
+    def document_id(self, chunk_id: int) -> Optional[str]:
+        return self._chunk_documents.get(chunk_id)
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[int, float]]:
+        """Top_k (chunk_id, BM25 score) pairs for the query, best first"""
+        query_terms = set(tokenize(query))
+        with self._lock:
+            num_chunks = len(self._lengths)
+            if not num_chunks or not query_terms:
+                return []
+            avg_length = self._total_length / num_chunks
+
+            scores: Dict[int, float] = {}
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (num_chunks - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[chunk_id] / avg_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))
@@ -0,0 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Callable, Dict
+import asyncio
+import contextvars
+import logging
+import threading
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ExecutorSaturatedError(Exception):
+    """Raised when a bounded executor has no free worker or queue slot"""
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a hard cap on queued work.
+
+    At most max_workers jobs run at once and at most max_queue more wait for a
+    worker; anything beyond that is rejected immediately with
+    ExecutorSaturatedError instead of piling up. Each endpoint class gets its own
+    executor so a long ingest can never occupy the threads retrieval needs.
+    Jobs run in a copy of the submitter's context, so context variables (such
+    as the request's stage timings) follow them onto the worker thread.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Submit a job, or raise ExecutorSaturatedError if the executor is full"""
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise ExecutorSaturatedError(
+                    f"{self.name} executor saturated ({self._in_flight} jobs in flight)"
+                )
+            self._in_flight += 1
+
+        try:
+            future = self._executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking job off the event loop and await its result"""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Current load of the executor"""
+        with self._lock:
+            in_flight = self._in_flight
+            rejected = self._rejected
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": min(in_flight, self.max_workers),
+            "queued": max(in_flight - self.max_workers, 0),
+            "rejected": rejected
+        }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
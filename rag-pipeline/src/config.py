@@ -0,0 +1,121 @@
+from pydantic_settings import BaseSettings
+from typing import Any, Dict, Optional
+
+
+class Settings(BaseSettings):
+    """RAG pipeline settings loaded from environment variables"""
+
+    # Milvus / models
+    milvus_host: str = "milvus-standalone"
+    milvus_port: str = "19530"
+    embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    # "sentence-transformers" (float PyTorch) or "onnx-int8" (quantized ONNX Runtime)
+    embedding_backend: str = "sentence-transformers"
+    onnx_model_dir: str = "/app/models/onnx"
+    data_directory: str = "/app/data"
+
+    # Vector store: "milvus" (server) or "local" (in-process NumPy store persisted to local_store_path)
+    vector_store: str = "milvus"
+    local_store_path: str = "/app/vector_store"
+
+    # Vector index for new collections: FLAT, IVF_FLAT, HNSW, or compressed IVF_SQ8 /
+    # IVF_PQ (exact re-ranking of rerank_overfetch x top_k candidates, 1 disables).
+    # Metric: L2, or IP / COSINE on normalized embeddings. Params are JSON objects,
+    # e.g. MILVUS_INDEX_PARAMS='{"M": 32, "efConstruction": 256}' MILVUS_SEARCH_PARAMS='{"ef": 128}'
+    milvus_index_type: str = "IVF_FLAT"
+    milvus_metric_type: str = "L2"
+    milvus_index_params: Optional[Dict[str, Any]] = None
+    milvus_search_params: Optional[Dict[str, Any]] = None
+    milvus_rerank_overfetch: int = 4
+    # Chunk schema for new collections: 2 stores entities as ARRAY<VARCHAR> (server-side
+    # array_contains_any filtering), 1 as JSON strings; see src/migrate_entity_schema.py
+    milvus_schema_version: int = 2
+    # document_id as partition key of new collections (hashed into num_partitions), so
+    # searches filtered on document_id only scan the matching partitions
+    milvus_partition_key: bool = True
+    milvus_num_partitions: int = 64
+    # In-memory replicas the collection is loaded with (read scaling; needs as many query nodes)
+    milvus_replica_number: int = 1
+    # Named connections checked out per Milvus call (size to concurrent retrievals x
+    # scenarios plus ingest), seconds to wait for a free one, idle seconds before a
+    # connection is pinged, and reconnect attempts (exponential backoff) when one breaks
+    milvus_pool_size: int = 8
+    milvus_pool_timeout: float = 30.0
+    milvus_health_check_interval: float = 30.0
+    milvus_reconnect_retries: int = 5
+
+    # Startup: warmup pass (dummy encode, dummy NER, Milvus load) before reporting ready
+    warmup_enabled: bool = True
+
+    # Entity search
+    entity_index_enabled: bool = True
+
+    # BM25 lexical index (persisted under bm25_index_path) and the "fusion" retrieval
+    # strategy: reciprocal rank fusion of fusion_candidates BM25 and vector hits
+    bm25_enabled: bool = True
+    bm25_index_path: str = "/app/bm25_index"
+    rrf_k: int = 60
+    fusion_candidates: int = 50
+
+    # Per-document summary index (page embedding centroid + entity sets, persisted under
+    # document_index_path); only built and maintained when scenario_1_mode is "routed"
+    document_index_path: str = "/app/document_index"
+    # Scenario 1: "two_pass" (top-3 search, then a document-filtered search), "routed"
+    # (routing_documents documents from the document index, then the filtered search) or
+    # "grouped" (one grouped_search_window-hit search grouped by document; filtered
+    # search only as a fallback). See benchmarks/scenario_1_modes.py
+    scenario_1_mode: str = "two_pass"
+    routing_documents: int = 3
+    # Largest cosine distance bonus for a routed document's entity matches
+    routing_entity_weight: float = 0.05
+    grouped_search_window: int = 100
+
+    # Concurrent scenario execution inside a single retrieval
+    retrieval_parallel: bool = True
+    retrieval_max_workers: int = 8
+
+    # Query embedding cache (size 0 disables, TTL in seconds)
+    embedding_cache_size: int = 1024
+    embedding_cache_ttl: float = 3600
+
+    # Retrieval result cache (size 0 disables); invalidated by ingestion, TTL optional
+    result_cache_size: int = 256
+    result_cache_ttl: Optional[float] = None
+
+    # Chunk payloads (text + entities) cached by id for two-phase retrieval (size 0 disables)
+    payload_cache_size: int = 4096
+
+    # Endpoint executors: concurrent jobs and extra queued jobs before 429
+    retrieve_max_concurrency: int = 4
+    retrieve_max_queue: int = 32
+    ingest_max_concurrency: int = 1
+    ingest_max_queue: int = 2
+
+    # Maximum number of queries accepted by /retrieve/batch
+    retrieve_batch_max_size: int = 256
+
+    def milvus_options(self) -> Dict[str, Any]:
+        """Keyword arguments for MilvusClient"""
+        return {
+            "index_type": self.milvus_index_type,
+            "index_params": self.milvus_index_params,
+            "metric_type": self.milvus_metric_type,
+            "search_params": self.milvus_search_params,
+            "rerank_overfetch": self.milvus_rerank_overfetch,
+            "schema_version": self.milvus_schema_version,
+            "partition_key": self.milvus_partition_key,
+            "num_partitions": self.milvus_num_partitions,
+            "replica_number": self.milvus_replica_number,
+            "pool_size": self.milvus_pool_size,
+            "pool_timeout": self.milvus_pool_timeout,
+            "health_check_interval": self.milvus_health_check_interval,
+            "reconnect_retries": self.milvus_reconnect_retries,
+        }
+
+    class Config:
+        env_file = ".env"
+        case_sensitive = False
+
+
+# Global settings instance
+settings = Settings()
@@ -0,0 +1,153 @@
+from typing import List, Dict, Any, Iterable, Optional
+import logging
+import numpy as np
+from .entity_index import ENTITY_FIELDS, EntityIndex, parse_entity_lists
+from .index_log import PersistedIndex
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class DocumentIndex(PersistedIndex):
+    """
+    In-memory per-document summary index for two-stage document routing.
+
+    Holds one summary per document: the centroid (mean) of its page embeddings
+    and the union of its entity values (an EntityIndex keyed by document row
+    instead of chunk id). Routing ranks documents by cosine distance between
+    the query and the normalized centroids with a single matrix-vector product,
+    so the chunk search can go straight to a filtered search over the routed
+    documents. Each ingest logs its documents' embedding sums, page counts and
+    entities to the log under path.
+    """
+
+    name = "Document index"
+    LOG_FILE = "document_summaries.jsonl"
+
+    def __init__(self, path: Optional[str] = None):
+        super().__init__(path)
+        self._rows: Dict[str, int] = {}
+        self._document_ids: List[str] = []
+        self._sums: List[np.ndarray] = []
+        self._counts: List[int] = []
+        self._entities = EntityIndex()
+        # Normalized centroid matrix, rebuilt on the first route after an update
+        self._centroids: Optional[np.ndarray] = None
+        self._num_chunks = 0
+
+    def __len__(self) -> int:
+        return len(self._document_ids)
+
+    @property
+    def num_chunks(self) -> int:
+        return self._num_chunks
+
+    def describe(self) -> str:
+        return f"{len(self)} documents ({self._num_chunks} chunks)"
+
+    def clear(self):
+        with self._lock:
+            self._rows = {}
+            self._document_ids = []
+            self._sums = []
+            self._counts = []
+            self._entities = EntityIndex()
+            self._centroids = None
+            self._num_chunks = 0
+            self.is_built = False
+
+    def _add(self, document_id: str, embedding_sum: np.ndarray, count: int, entities: Dict[str, List[str]]):
+        """Fold a document's pages into its summary; caller holds the lock"""
+        row = self._rows.get(document_id)
+        if row is None:
+            self._rows[document_id] = len(self._document_ids)
+            self._document_ids.append(document_id)
+            self._sums.append(embedding_sum)
+            self._counts.append(count)
+        else:
+            self._sums[row] = self._sums[row] + embedding_sum
+            self._counts[row] += count
+        self._entities.add_chunk(self._rows[document_id], document_id, entities)
+        self._num_chunks += count
+        self._centroids = None
+
+    @staticmethod
+    def _summarize(chunks: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Group chunks by document into log entries (embedding sum, page count, entity union)"""
+        entries: Dict[str, Dict[str, Any]] = {}
+        for chunk in chunks:
+            entry = entries.get(chunk["document_id"])
+            if entry is None:
+                entry = entries[chunk["document_id"]] = {
+                    "document_id": chunk["document_id"], "count": 0, "sum": None,
+                    "entities": {field: {} for field in ENTITY_FIELDS}
+                }
+            embedding = np.asarray(chunk["embedding"], dtype=np.float64)
+            entry["sum"] = embedding if entry["sum"] is None else entry["sum"] + embedding
+            entry["count"] += 1
+            for field, values in parse_entity_lists(chunk).items():
+                entry["entities"][field].update(dict.fromkeys(values))
+
+        for entry in entries.values():
+            entry["sum"] = entry["sum"].tolist()
+            entry["entities"] = {field: list(values) for field, values in entry["entities"].items()}
+        return list(entries.values())
+
+    def _add_entry(self, entry: Dict[str, Any]):
+        """Fold one document's log entry into its summary; caller holds the lock"""
+        self._add(entry["document_id"], np.asarray(entry["sum"], dtype=np.float64), entry["count"], entry["entities"])
+
+    def add_chunks(self, chunk_ids: Iterable[int], chunks: Iterable[Dict[str, Any]]):
+        """Fold freshly inserted chunks (with their embeddings) into their documents' summaries"""
+        entries = self._summarize(chunks)
+        self._add_entries(entries)
+        logger.info(f"Document index: updated {len(entries)} documents (total {len(self)})")
+
+    def _entries_from_store(self, milvus_client) -> List[Dict[str, Any]]:
+        return self._summarize(
+            row
+            for batch in milvus_client.iter_all(output_fields=["id", "document_id", "embedding"] + ENTITY_FIELDS)
+            for row in batch
+        )
+
+    def _centroid_matrix(self) -> np.ndarray:
+        """Unit-length document centroids (one row per document); caller holds the lock"""
+        if self._centroids is None:
+            centroids = np.vstack(self._sums).astype(np.float32)
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            self._centroids = centroids / np.maximum(norms, 1e-12)
+        return self._centroids
+
+    def route(self, query_embedding: List[float], top_n: int = 3,
+              query_entities: Optional[Dict[str, List[str]]] = None,
+              entity_weight: float = 0.05) -> List[str]:
+        """
+        The top_n document_ids for a query, best first.
+
+        Documents are ranked by cosine distance between the query and their
+        centroid. With query entities, a document's distance is lowered by up to
+        entity_weight in proportion to its entity match count (same rules as
+        entity search) relative to the best-matching document, so matches only
+        reorder documents whose centroids are about as close; ties go to the
+        document with more matches.
+        """
+        with self._lock:
+            if not self._document_ids:
+                return []
+            centroids = self._centroid_matrix()
+            document_ids = list(self._document_ids)
+            scores = self._entities.match(query_entities) if query_entities else None
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        distances = 1.0 - centroids @ (query / max(float(np.linalg.norm(query)), 1e-12))
+        top_n = min(top_n, len(document_ids))
+
+        if scores:
+            match_counts = np.zeros(len(document_ids), dtype=np.int64)
+            match_counts[list(scores)] = list(scores.values())
+            ranked = distances - entity_weight * match_counts / match_counts.max()
+            order = np.lexsort((-match_counts, ranked))[:top_n]
+        else:
+            order = np.argpartition(distances, top_n - 1)[:top_n]
+            order = order[np.argsort(distances[order], kind="stable")]
+        return [document_ids[row] for row in order]
@@ -0,0 +1,172 @@
+from typing import List, Union
+import json
+import logging
+import os
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SENTENCE_TRANSFORMERS = "sentence-transformers"
+ONNX_INT8 = "onnx-int8"
+
+
+class EmbeddingBackend:
+    """
+    Interface for text embedding backends.
+
+    Mirrors the subset of the SentenceTransformer API the services use: encode()
+    returns a 1-D array for a single string and a 2-D array for a list.
+    """
+
+    name = "base"
+
+    def encode(self, texts: Union[str, List[str]], batch_size: int = 32, convert_to_numpy: bool = True) -> np.ndarray:
+        raise NotImplementedError
+
+    def get_sentence_embedding_dimension(self) -> int:
+        raise NotImplementedError
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """Float32 PyTorch inference through sentence-transformers (default)"""
+
+    name = SENTENCE_TRANSFORMERS
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        logger.info(f"Loading embedding model: {model_name}")
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts: Union[str, List[str]], batch_size: int = 32, convert_to_numpy: bool = True) -> np.ndarray:
+        return self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+
+class OnnxInt8Backend(EmbeddingBackend):
+    """
+    Int8 dynamically quantized ONNX Runtime inference for CPU-only deployments.
+
+    On first use the sentence-transformers model is exported to ONNX, quantized
+    and saved to model_dir together with its tokenizer; later starts load the
+    quantized model directly. Pooling (mean over tokens) and the optional L2
+    normalization reproduce the sentence-transformers pipeline.
+    """
+
+    name = ONNX_INT8
+
+    MODEL_FILE = "model-int8.onnx"
+    CONFIG_FILE = "embedding_config.json"
+
+    def __init__(self, model_name: str, model_dir: str, num_threads: int = 0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.model_dir = os.path.join(model_dir, model_name.replace("/", "__"))
+        if not os.path.exists(os.path.join(self.model_dir, self.MODEL_FILE)):
+            self._export(model_name, self.model_dir)
+
+        with open(os.path.join(self.model_dir, self.CONFIG_FILE)) as f:
+            config = json.load(f)
+        self.dimension = config["dimension"]
+        self.max_seq_length = config["max_seq_length"]
+        self.normalize = config["normalize"]
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            os.path.join(self.model_dir, self.MODEL_FILE),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+        logger.info(f"Loaded int8 ONNX embedding model: {model_name} ({self.model_dir})")
+
+    @classmethod
+    def _export(cls, model_name: str, model_dir: str):
+        """Export the transformer to ONNX and quantize its weights to int8"""
+        import torch
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        from sentence_transformers import SentenceTransformer
+        from sentence_transformers.models import Normalize
+
+        logger.info(f"Exporting {model_name} to int8 ONNX in {model_dir}")
+        os.makedirs(model_dir, exist_ok=True)
+
+        st_model = SentenceTransformer(model_name, device="cpu")
+        transformer = st_model[0].auto_model.eval()
+        tokenizer = st_model.tokenizer
+
+        sample = tokenizer(["export sample"], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+        float_path = os.path.join(model_dir, "model.onnx")
+        with torch.no_grad():
+            torch.onnx.export(
+                transformer,
+                tuple(sample[name] for name in input_names),
+                float_path,
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14
+            )
+        quantize_dynamic(float_path, os.path.join(model_dir, cls.MODEL_FILE), weight_type=QuantType.QInt8)
+        os.remove(float_path)
+
+        tokenizer.save_pretrained(model_dir)
+        with open(os.path.join(model_dir, cls.CONFIG_FILE), "w") as f:
+            json.dump({
+                "model_name": model_name,
+                "dimension": st_model.get_sentence_embedding_dimension(),
+                "max_seq_length": st_model.max_seq_length,
+                "normalize": any(isinstance(module, Normalize) for module in st_model)
+            }, f)
+
+    def encode(self, texts: Union[str, List[str]], batch_size: int = 32, convert_to_numpy: bool = True) -> np.ndarray:
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            batches.append(self._encode_batch(texts[start:start + batch_size]))
+        embeddings = np.vstack(batches) if batches else np.zeros((0, self.dimension), dtype=np.float32)
+
+        return embeddings[0] if single else embeddings
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np"
+        )
+        feeds = {name: encoded[name].astype(np.int64) for name in self.input_names if name in encoded}
+        token_embeddings = self.session.run(["last_hidden_state"], feeds)[0]
+
+        # Mean pooling over non-padding tokens
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        embeddings = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self.normalize:
+            embeddings = embeddings / np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings.astype(np.float32)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+
+def create_embedding_backend(backend: str, model_name: str, onnx_model_dir: str = "models/onnx") -> EmbeddingBackend:
+    """Instantiate the embedding backend selected by EMBEDDING_BACKEND"""
+    if backend == SENTENCE_TRANSFORMERS:
+        return SentenceTransformerBackend(model_name)
+    if backend == ONNX_INT8:
+        return OnnxInt8Backend(model_name, onnx_model_dir)
+    raise ValueError(f"Unsupported embedding backend: {backend} (expected {SENTENCE_TRANSFORMERS} or {ONNX_INT8})")
@@ -3,6 +3,7 @@ from typing import Dict, List
 import logging
 import json
 import re
+import threading
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -21,6 +22,9 @@ class EntityExtractor:
 
     def __init__(self, model_name: str = "en_core_web_lg"):
         """Initialize spaCy NLP model"""
+        # spaCy pipelines are not guaranteed thread-safe; one shared instance
+        # serves both services, so inference is serialized
+        self._lock = threading.Lock()
         try:
             self.nlp = spacy.load(model_name)
             logger.info(f"Loaded spaCy model: {model_name}")
@@ -41,10 +45,24 @@ class EntityExtractor:
         - DATE: Absolute or relative dates or periods
         - FILE_NUMBER: Custom extraction for file/case numbers (e.g., 1002-361178-RTT)
         """
-        # First, extract custom file numbers using regex (before spaCy processing)
-        file_numbers = self._extract_file_numbers(text)
+        with self._lock:
+            doc = self.nlp(text)
+        return self._entities_from_doc(text, doc)
+
+    def extract_entities_batch(self, texts: List[str], batch_size: int = 64) -> List[Dict[str, str]]:
+        """
+        Extract entities from many texts with a single nlp.pipe pass.
 
-        doc = self.nlp(text)
+        Returns one dict per text, in the same format as extract_entities.
+        """
+        with self._lock:
+            docs = list(self.nlp.pipe(texts, batch_size=batch_size))
+        return [self._entities_from_doc(text, doc) for text, doc in zip(texts, docs)]
+
+    def _entities_from_doc(self, text: str, doc) -> Dict[str, str]:
+        """Build the entity dict for a text from its parsed spaCy doc"""
+        # First, extract custom file numbers using regex
+        file_numbers = self._extract_file_numbers(text)
 
         # Initialize entity lists
         person_names = []
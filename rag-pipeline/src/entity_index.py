@@ -0,0 +1,261 @@
+from collections import Counter
+from typing import List, Dict, Any, Iterable, Optional
+import logging
+import threading
+import json
+from .entity_matcher import AhoCorasick, TrigramIndex, substrings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Entity columns stored on every chunk, in schema order
+ENTITY_FIELDS = [
+    "person_names",
+    "location_names",
+    "organization_names",
+    "date_entities",
+    "file_numbers",
+    "other_entities",
+]
+
+# Query entities of these types are cleaned ("john smith (buyer)" -> "john smith") before matching
+CLEANED_FIELDS = {"person_names", "location_names", "organization_names"}
+
+# File numbers are matched exactly and weighted heavily
+FILE_NUMBER_WEIGHT = 10
+
+
+def parse_entity_lists(entities: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Turn a row/extractor dict of entity columns (JSON strings or lists) into lists"""
+    parsed = {}
+    for field in ENTITY_FIELDS:
+        value = entities.get(field)
+        if value is None:
+            parsed[field] = []
+        elif isinstance(value, str):
+            try:
+                parsed[field] = json.loads(value)
+            except ValueError:
+                parsed[field] = []
+        else:
+            parsed[field] = list(value)
+    return parsed
+
+
+def clean_query_entity(field: str, entity: str) -> str:
+    """Apply the per-type cleanup used when matching a query entity"""
+    if field in CLEANED_FIELDS:
+        return entity.split('(')[0].strip()
+    return entity
+
+
+def score_entity_matches(query_entities: Dict[str, List[str]], chunk_entities: Dict[str, List[str]]) -> int:
+    """
+    Count how many query entities match a chunk.
+
+    File numbers must match exactly and count FILE_NUMBER_WEIGHT each; every other
+    type matches when either string contains the other and counts 1. Each query
+    entity is counted at most once per chunk.
+    """
+    score = 0
+    for query_file in query_entities.get("file_numbers", []):
+        if query_file in chunk_entities.get("file_numbers", []):
+            score += FILE_NUMBER_WEIGHT
+
+    for field in ENTITY_FIELDS:
+        if field == "file_numbers":
+            continue
+        chunk_values = chunk_entities.get(field, [])
+        for query_value in query_entities.get(field, []):
+            clean_query = clean_query_entity(field, query_value)
+            for chunk_value in chunk_values:
+                if clean_query in chunk_value or chunk_value in clean_query:
+                    score += 1
+                    break
+    return score
+
+
+class EntityMatcher:
+    """
+    Scorer compiled once per query; same results as score_entity_matches.
+
+    Per entity type, an Aho–Corasick automaton over the cleaned query entities
+    finds those contained in a chunk entity, and a set of every substring of
+    the query entities answers the reverse containment with one lookup. The
+    matched query entities are memoized per distinct chunk entity, so each
+    vocabulary value is matched once however many chunks repeat it.
+    """
+
+    def __init__(self, query_entities: Dict[str, List[str]]):
+        self._file_counts = Counter(query_entities.get("file_numbers", []))
+        self._automata: Dict[str, AhoCorasick] = {}
+        self._pattern_masks: Dict[str, Dict[str, int]] = {}
+        self._substring_masks: Dict[str, Dict[str, int]] = {}
+        self._empty_masks: Dict[str, int] = {}
+        # field -> chunk entity -> bitmask of matched query entity positions
+        self._memo: Dict[str, Dict[str, int]] = {}
+
+        for field in ENTITY_FIELDS:
+            if field == "file_numbers" or not query_entities.get(field):
+                continue
+            # Query entities are numbered by position: duplicates count separately
+            pattern_masks: Dict[str, int] = {}
+            substring_masks: Dict[str, int] = {}
+            empty_mask = 0
+            for index, query_value in enumerate(query_entities[field]):
+                bit = 1 << index
+                clean_query = clean_query_entity(field, query_value)
+                if not clean_query:
+                    empty_mask |= bit
+                pattern_masks[clean_query] = pattern_masks.get(clean_query, 0) | bit
+                for substring in substrings(clean_query):
+                    substring_masks[substring] = substring_masks.get(substring, 0) | bit
+
+            self._automata[field] = AhoCorasick(pattern_masks)
+            self._pattern_masks[field] = pattern_masks
+            self._substring_masks[field] = substring_masks
+            self._empty_masks[field] = empty_mask
+            self._memo[field] = {}
+
+    def _match_value(self, field: str, value: str) -> int:
+        """Bitmask of the query entities of this type that match one chunk entity"""
+        mask = self._empty_masks[field] | self._substring_masks[field].get(value, 0)
+        for pattern in self._automata[field].find(value):
+            mask |= self._pattern_masks[field][pattern]
+        self._memo[field][value] = mask
+        return mask
+
+    def score(self, chunk_entities: Dict[str, List[str]]) -> int:
+        """Entity match count of one chunk"""
+        score = 0
+        if self._file_counts:
+            chunk_files = chunk_entities.get("file_numbers", ())
+            for query_file, count in self._file_counts.items():
+                if query_file in chunk_files:
+                    score += FILE_NUMBER_WEIGHT * count
+
+        for field, memo in self._memo.items():
+            matched = 0
+            for value in chunk_entities.get(field, ()):
+                mask = memo.get(value)
+                if mask is None:
+                    mask = self._match_value(field, value)
+                matched |= mask
+            if matched:
+                score += bin(matched).count("1")
+        return score
+
+
+def entity_filter_expression(query_entities: Dict[str, List[str]]) -> Optional[str]:
+    """
+    Milvus filter selecting chunks whose ARRAY entity columns contain a query entity.
+
+    Values are compared exactly (after clean_query_entity), so the filter finds
+    chunks with identical entities; substring variants are only matched by the
+    in-memory EntityIndex or the full scan. Returns None without query entities.
+    """
+    clauses = []
+    for field in ENTITY_FIELDS:
+        cleaned = (clean_query_entity(field, value) for value in query_entities.get(field, []))
+        values = list(dict.fromkeys(value for value in cleaned if value))
+        if values:
+            literals = ", ".join(json.dumps(value, ensure_ascii=False) for value in values)
+            clauses.append(f"array_contains_any({field}, [{literals}])")
+    return " or ".join(clauses) if clauses else None
+
+
+class EntityIndex:
+    """
+    In-memory inverted index over chunk entities.
+
+    Keeps one posting map per entity type (entity string -> chunk ids) plus the
+    document_id of every indexed chunk. Built once from Milvus at startup and
+    updated by the ingestion service as chunks are inserted, so entity search
+    only touches the entity vocabulary instead of every chunk in the collection.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, set]] = {field: {} for field in ENTITY_FIELDS}
+        self._trigrams: Dict[str, TrigramIndex] = {field: TrigramIndex() for field in ENTITY_FIELDS}
+        self._chunk_documents: Dict[int, str] = {}
+        self._lock = threading.RLock()
+        self.is_built = False
+
+    def __len__(self) -> int:
+        return len(self._chunk_documents)
+
+    def clear(self):
+        """Drop all postings"""
+        with self._lock:
+            self._postings = {field: {} for field in ENTITY_FIELDS}
+            self._trigrams = {field: TrigramIndex() for field in ENTITY_FIELDS}
+            self._chunk_documents = {}
+            self.is_built = False
+
+    def add_chunk(self, chunk_id: int, document_id: str, entities: Dict[str, Any]):
+        """Index a single chunk; entity values may be JSON strings or lists"""
+        entity_lists = parse_entity_lists(entities)
+        with self._lock:
+            self._chunk_documents[chunk_id] = document_id
+            for field, values in entity_lists.items():
+                postings = self._postings[field]
+                for value in values:
+                    if value not in postings:
+                        postings[value] = set()
+                        self._trigrams[field].add(value)
+                    postings[value].add(chunk_id)
+
+    def add_chunks(self, chunk_ids: Iterable[int], chunks: Iterable[Dict[str, Any]]):
+        """Index freshly inserted chunks given their Milvus primary keys"""
+        count = 0
+        for chunk_id, chunk in zip(chunk_ids, chunks):
+            self.add_chunk(chunk_id, chunk["document_id"], chunk)
+            count += 1
+        logger.info(f"Entity index: added {count} chunks (total {len(self)})")
+
+    def build(self, milvus_client):
+        """(Re)build the whole index from the chunks stored in Milvus"""
+        logger.info("Entity index: building from Milvus...")
+        with self._lock:
+            self.clear()
+            for batch in milvus_client.iter_all(output_fields=["id", "document_id"] + ENTITY_FIELDS):
+                for row in batch:
+                    self.add_chunk(row["id"], row["document_id"], row)
+            self.is_built = True
+        logger.info(f"Entity index: built with {len(self)} chunks, "
+                   f"{sum(len(p) for p in self._postings.values())} distinct entities")
+
+    def document_id(self, chunk_id: int) -> Optional[str]:
+        """Return the document_id of an indexed chunk"""
+        return self._chunk_documents.get(chunk_id)
+
+    def match(self, query_entities: Dict[str, List[str]]) -> Dict[int, int]:
+        """
+        Score chunks against query entities.
+
+        Returns {chunk_id: entity_match_count} for every chunk with at least one
+        match, using the same rules as score_entity_matches. Vocabulary values
+        containing a query entity come from the trigram index; values contained in
+        it are looked up among the query entity's substrings.
+        """
+        scores: Dict[int, int] = {}
+        with self._lock:
+            file_postings = self._postings["file_numbers"]
+            for query_file in query_entities.get("file_numbers", []):
+                for chunk_id in file_postings.get(query_file, ()):
+                    scores[chunk_id] = scores.get(chunk_id, 0) + FILE_NUMBER_WEIGHT
+
+            for field in ENTITY_FIELDS:
+                if field == "file_numbers":
+                    continue
+                postings = self._postings[field]
+                for query_value in query_entities.get(field, []):
+                    clean_query = clean_query_entity(field, query_value)
+                    matched_values = self._trigrams[field].containing(clean_query)
+                    matched_values.update(value for value in substrings(clean_query) if value in postings)
+                    matched_ids = set()
+                    for value in matched_values:
+                        matched_ids.update(postings[value])
+                    for chunk_id in matched_ids:
+                        scores[chunk_id] = scores.get(chunk_id, 0) + 1
+        return scores
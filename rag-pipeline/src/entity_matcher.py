@@ -0,0 +1,109 @@
+from typing import List, Dict, Iterable, Set
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def substrings(text: str) -> Set[str]:
+    """Every substring of text, including the empty string"""
+    found = {""}
+    for start in range(len(text)):
+        for end in range(start + 1, len(text) + 1):
+            found.add(text[start:end])
+    return found
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class AhoCorasick:
+    """Aho–Corasick automaton: finds every pattern occurring in a text in one pass"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Set[str]] = [set()]
+
+        for pattern in patterns:
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(set())
+                state = next_state
+            self._out[state].add(pattern)
+
+        # Breadth-first failure links; outputs inherit those of their failure state
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._out[next_state] |= self._out[self._fail[next_state]]
+
+    def find(self, text: str) -> Set[str]:
+        """Patterns that occur in text"""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        found = set()
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found |= out[state]
+        return found
+
+
+class TrigramIndex:
+    """
+    Index over a growing string vocabulary answering "which values contain q".
+
+    Candidates are the values sharing every trigram of q, verified with a
+    substring check; queries shorter than three characters scan the vocabulary.
+    """
+
+    def __init__(self):
+        self._values: Set[str] = set()
+        self._postings: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def add(self, value: str):
+        if value in self._values:
+            return
+        self._values.add(value)
+        for gram in trigrams(value):
+            self._postings.setdefault(gram, set()).add(value)
+
+    def containing(self, query: str) -> Set[str]:
+        """Vocabulary values v with query in v"""
+        grams = trigrams(query)
+        if not grams:
+            return {value for value in self._values if query in value}
+
+        postings = []
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if not posting:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                return candidates
+        return {value for value in candidates if query in value}
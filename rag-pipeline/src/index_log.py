@@ -0,0 +1,147 @@
+from typing import List, Dict, Any, Callable, Optional
+import json
+import logging
+import os
+import threading
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class IndexLog:
+    """
+    Append-only JSON lines file persisting an in-memory index (one entry per line).
+
+    The first line names the collection the entries belong to (its fingerprint,
+    see collection_fingerprint on the vector stores). Chunk ids are only
+    meaningful within one collection, so a log written for another collection
+    (e.g. the one migrate_schema swapped out) is never replayed.
+    """
+
+    def __init__(self, directory: Optional[str], file_name: str):
+        self.path = os.path.join(directory, file_name) if directory else None
+
+    def append(self, entries: List[Dict[str, Any]]):
+        """Append entries and fsync (a log without a header is replaced on the next build)"""
+        if self.path and entries:
+            self._write(entries, "a")
+
+    def rewrite(self, entries: List[Dict[str, Any]], fingerprint: str):
+        """Replace the log with a header for fingerprint followed by entries"""
+        if self.path:
+            self._write([{"fingerprint": fingerprint}] + entries, "w")
+
+    def _write(self, entries: List[Dict[str, Any]], mode: str):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, mode, encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def replay(self, fingerprint: str, add: Callable[[Dict[str, Any]], None]) -> bool:
+        """
+        Pass every entry to add; False (nothing replayed) when the log is missing
+        or was written for a different collection. A torn last line from an
+        interrupted append is skipped.
+        """
+        if not self.path or not os.path.exists(self.path):
+            return False
+
+        with open(self.path, encoding="utf-8") as f:
+            try:
+                header = json.loads(f.readline())
+            except ValueError:
+                header = None
+            if not isinstance(header, dict) or header.get("fingerprint") != fingerprint:
+                logger.info(f"{self.path} was written for another collection; ignoring it")
+                return False
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                add(entry)
+        return True
+
+    def delete(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+            logger.info(f"Deleted {self.path}")
+
+
+class PersistedIndex:
+    """
+    Base for in-memory indexes persisted through an IndexLog.
+
+    Subclasses turn the collection into log entries (_entries_from_store) and
+    fold entries into the index (_add_entry). build replays the log unless it
+    belongs to another collection (chunk ids change on migration) or covers a
+    different number of chunks than the vector store, and rebuilds it otherwise.
+    """
+
+    name = "Index"
+    LOG_FILE = "index.jsonl"
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._log = IndexLog(path, self.LOG_FILE)
+        self._lock = threading.RLock()
+        self.is_built = False
+
+    @property
+    def num_chunks(self) -> int:
+        """Vector store rows the index covers (compared with num_entities to detect a stale log)"""
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        """Size summary for the log messages"""
+        return f"{self.num_chunks} chunks"
+
+    def clear(self):
+        raise NotImplementedError
+
+    def _add_entry(self, entry: Dict[str, Any]):
+        """Fold one log entry into the index; caller holds the lock"""
+        raise NotImplementedError
+
+    def _entries_from_store(self, milvus_client) -> List[Dict[str, Any]]:
+        """Log entries for the whole collection"""
+        raise NotImplementedError
+
+    def _add_entries(self, entries: List[Dict[str, Any]]):
+        """Index entries for freshly inserted chunks and append them to the log"""
+        with self._lock:
+            for entry in entries:
+                self._add_entry(entry)
+            self._log.append(entries)
+
+    def load(self, fingerprint: str) -> bool:
+        """Replay the persisted log of the collection with this fingerprint; False when there is none"""
+        with self._lock:
+            self.clear()
+            if not self._log.replay(fingerprint, self._add_entry):
+                return False
+            self.is_built = True
+        logger.info(f"{self.name}: loaded {self.describe()} from {self._log.path}")
+        return True
+
+    def delete_log(self):
+        """Drop the persisted log (after the collection's chunk ids changed)"""
+        self._log.delete()
+
+    def build(self, milvus_client):
+        """Load the persisted index, or rebuild it (and the log) from the vector store if stale"""
+        fingerprint = milvus_client.collection_fingerprint
+        if self.load(fingerprint) and self.num_chunks == milvus_client.num_entities:
+            return
+
+        logger.info(f"{self.name}: building from the vector store...")
+        with self._lock:
+            self.clear()
+            entries = self._entries_from_store(milvus_client)
+            for entry in entries:
+                self._add_entry(entry)
+            self._log.rewrite(entries, fingerprint)
+            self.is_built = True
+        logger.info(f"{self.name}: built with {self.describe()}")
@@ -1,11 +1,14 @@
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
 import hashlib
 import os
-from .milvus_client import MilvusClient
 from .document_loader import DocumentLoader
-from .entity_extractor import EntityExtractor
+from .model_registry import model_registry
+from .entity_index import EntityIndex
+from .bm25_index import BM25Index
+from .document_index import DocumentIndex
+from .cache import GenerationCounter
+from .metrics import stage, timed
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,25 +19,55 @@ class IngestionService:
         self,
         milvus_host: str = "localhost",
         milvus_port: str = "19530",
-        embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+        embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
+        embedding_backend: str = "sentence-transformers",
+        onnx_model_dir: str = "models/onnx",
+        milvus_options: Optional[Dict[str, Any]] = None,
+        vector_store: str = "milvus",
+        local_store_path: str = "data/vector_store",
+        entity_index: Optional[EntityIndex] = None,
+        bm25_index: Optional[BM25Index] = None,
+        document_index: Optional[DocumentIndex] = None,
+        generation: Optional[GenerationCounter] = None
     ):
-        """Initialize ingestion service with all components"""
-        # Initialize embedding model
-        logger.info(f"Loading embedding model: {embedding_model}")
-        self.embedding_model = SentenceTransformer(embedding_model)
+        """
+        Initialize ingestion service with all components
+
+        embedding_backend: "sentence-transformers" (float PyTorch) or "onnx-int8"
+        (quantized ONNX Runtime, exported to onnx_model_dir on first use)
+        milvus_options: extra MilvusClient settings (index type, re-ranking, ...)
+        vector_store: "milvus" (server) or "local" (in-process store persisted to
+        local_store_path, no external services)
+
+        entity_index: shared inverted entity index kept up to date with inserted chunks
+        bm25_index: shared BM25 index over chunk text, kept up to date (and persisted) likewise
+        document_index: shared per-document centroid/entity summaries for document
+        routing, kept up to date (and persisted) likewise
+        generation: collection generation counter shared with the retrieval service,
+        bumped after every insert to invalidate cached retrieval results
+        """
+        # Embedding model (shared with the retrieval service via the model registry)
+        self.embedding_model = model_registry.get_embedding_model(embedding_model, embedding_backend, onnx_model_dir)
         self.embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
 
-        # Initialize Milvus client
-        self.milvus_client = MilvusClient(host=milvus_host, port=milvus_port)
-        self.milvus_client.connect()
+        # Milvus client or local vector store (shared)
+        self.milvus_client = model_registry.get_vector_store(
+            vector_store, milvus_host, milvus_port, milvus_options, local_store_path
+        )
         self.milvus_client.create_collection(embedding_dim=self.embedding_dim)
 
-        # Initialize entity extractor
-        self.entity_extractor = EntityExtractor()
+        # Entity extractor (shared)
+        self.entity_extractor = model_registry.get_entity_extractor()
 
         # Initialize document loader
         self.document_loader = DocumentLoader()
 
+        # Entity index shared with the retrieval service (optional)
+        self.entity_index = entity_index
+        self.bm25_index = bm25_index
+        self.document_index = document_index
+        self.generation = generation or GenerationCounter()
+
     def calculate_file_hash(self, file_path: str) -> str:
         """Calculate SHA256 hash of file"""
         sha256_hash = hashlib.sha256()
@@ -48,6 +81,7 @@ class IngestionService:
         embeddings = self.embedding_model.encode(texts, convert_to_numpy=True)
         return embeddings.tolist()
 
+    @timed("ingest.process_pages")
     def process_pages(self, pages: List[Dict[str, Any]], file_hash: str) -> List[Dict[str, Any]]:
         """Process pages: extract entities and generate embeddings"""
         processed_chunks = []
@@ -55,13 +89,15 @@ class IngestionService:
         logger.info(f"Processing {len(pages)} pages...")
 
         # Extract entities for each page
-        for page in pages:
-            entities = self.entity_extractor.extract_entities(page["text"])
-            page.update(entities)
+        with stage("ingest.ner"):
+            for page in pages:
+                entities = self.entity_extractor.extract_entities(page["text"])
+                page.update(entities)
 
         # Generate embeddings in batch
         texts = [page["text"] for page in pages]
-        embeddings = self.generate_embeddings(texts)
+        with stage("ingest.embedding"):
+            embeddings = self.generate_embeddings(texts)
 
         # Combine everything
         for page, embedding in zip(pages, embeddings):
@@ -105,9 +141,22 @@ class IngestionService:
         # Process pages
         chunks = self.process_pages(pages, file_hash)
 
-        # Insert into Milvus
-        self.milvus_client.insert_chunks(chunks)
-        self.milvus_client.load_collection()
+        # Insert into Milvus (a loaded collection serves new rows without reloading;
+        # the load state is refreshed once per ingest_directory batch)
+        with stage("ingest.insert_chunks"):
+            chunk_ids = self.milvus_client.insert_chunks(chunks)
+
+        # Keep the entity, BM25 and document indexes in sync with the collection
+        with stage("ingest.index_update"):
+            if self.entity_index is not None:
+                self.entity_index.add_chunks(chunk_ids, chunks)
+            if self.bm25_index is not None:
+                self.bm25_index.add_chunks(chunk_ids, chunks)
+            if self.document_index is not None:
+                self.document_index.add_chunks(chunk_ids, chunks)
+
+        # New data is visible: invalidate cached retrieval results
+        self.generation.bump()
 
         logger.info(f"Successfully ingested {len(chunks)} chunks from {file_path}")
         return {"status": "success", "chunks": len(chunks), "file": file_path}
@@ -156,17 +205,19 @@ class IngestionService:
                 logger.error(f"Failed to ingest {file_path}: {e}")
                 results["failed"].append({"file": file_path, "reason": str(e)})
 
+        # One load-state check for the whole batch instead of a load per file
+        if results["ingested"]:
+            with stage("ingest.refresh_load_state"):
+                self.milvus_client.refresh_load_state()
+
         logger.info(f"Ingestion complete. Ingested: {len(results['ingested'])}, "
                    f"Skipped: {len(results['skipped'])}, Failed: {len(results['failed'])}")
         return results
 
     def get_stats(self) -> Dict[str, Any]:
         """Get ingestion statistics"""
-        if self.milvus_client.collection:
-            num_entities = self.milvus_client.collection.num_entities
-            return {
-                "total_chunks": num_entities,
-                "embedding_dimension": self.embedding_dim,
-                "collection_name": self.milvus_client.collection_name
-            }
-        return {}
+        return {
+            "total_chunks": self.milvus_client.num_entities,
+            "embedding_dimension": self.embedding_dim,
+            "collection_name": self.milvus_client.collection_name
+        }
@@ -0,0 +1,527 @@
+from typing import List, Dict, Any, Callable, Iterator, Optional
+import json
+import logging
+import os
+import re
+import threading
+import uuid
+import numpy as np
+from .milvus_client import DEFAULT_OUTPUT_FIELDS, SEARCH_OUTPUT_FIELDS, METRIC_TYPES, decode_entity_list
+from .entity_index import ENTITY_FIELDS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<number>-?\d+(?:\.\d+)?)
+      | (?P<op>==|!=|>=|<=|&&|\|\||[<>()\[\],])
+      | (?P<word>[A-Za-z_][A-Za-z0-9_]*)
+    )""", re.VERBOSE)
+
+_COMPARISONS = {
+    "==": np.equal,
+    "!=": np.not_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+}
+
+# Array predicates: (row values, literal values) -> bool
+_ARRAY_FUNCTIONS = {
+    "array_contains": lambda row_values, values: values[0] in row_values,
+    "array_contains_any": lambda row_values, values: any(value in row_values for value in values),
+    "array_contains_all": lambda row_values, values: all(value in row_values for value in values),
+}
+
+# A compiled filter maps a column accessor (field name -> array) to a boolean row mask
+Mask = Callable[[Callable[[str], np.ndarray]], np.ndarray]
+
+
+def _unquote(literal: str) -> str:
+    """Decode a quoted string literal (JSON escapes such as \\" \\\\ \\n \\uXXXX)"""
+    if literal[0] == '"':
+        try:
+            return json.loads(literal)
+        except ValueError:
+            pass
+    return re.sub(r"\\(.)", r"\1", literal[1:-1])
+
+
+def _tokenize(expr: str) -> List[tuple]:
+    tokens = []
+    position = 0
+    expr = expr.rstrip()
+    while position < len(expr):
+        match = _TOKEN_RE.match(expr, position)
+        if not match or match.end() == position:
+            raise ValueError(f"Invalid filter expression near: {expr[position:]!r}")
+        position = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "string":
+            value = _unquote(value)
+        elif kind == "number":
+            value = float(value) if "." in value else int(value)
+        elif kind == "word" and value.lower() in ("and", "or", "not", "in"):
+            kind, value = "op", value.lower()
+        tokens.append((kind, value))
+    return tokens
+
+
+class _FilterParser:
+    """
+    Recursive-descent parser for the subset of Milvus boolean expressions the
+    services use: field comparisons (==, !=, >, >=, <, <=), field [not] in [...],
+    array_contains[_any|_all](field, ...), combined with and/&&, or/||, not and
+    parentheses.
+    """
+
+    def __init__(self, expr: str):
+        self.expr = expr
+        self.tokens = _tokenize(expr)
+        self.position = 0
+
+    def parse(self) -> Mask:
+        mask = self._or()
+        if self.position != len(self.tokens):
+            raise ValueError(f"Unexpected token {self.tokens[self.position][1]!r} in filter: {self.expr}")
+        return mask
+
+    def _peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def _take(self, kind: str = None, value: Any = None):
+        token = self._peek()
+        if token[0] is None or (kind and token[0] != kind) or (value is not None and token[1] != value):
+            raise ValueError(f"Expected {value or kind} in filter: {self.expr}")
+        self.position += 1
+        return token[1]
+
+    def _accept(self, *values) -> bool:
+        kind, value = self._peek()
+        if kind == "op" and value in values:
+            self.position += 1
+            return True
+        return False
+
+    def _or(self) -> Mask:
+        masks = [self._and()]
+        while self._accept("or", "||"):
+            masks.append(self._and())
+        if len(masks) == 1:
+            return masks[0]
+        return lambda column: np.logical_or.reduce([mask(column) for mask in masks])
+
+    def _and(self) -> Mask:
+        masks = [self._unary()]
+        while self._accept("and", "&&"):
+            masks.append(self._unary())
+        if len(masks) == 1:
+            return masks[0]
+        return lambda column: np.logical_and.reduce([mask(column) for mask in masks])
+
+    def _unary(self) -> Mask:
+        if self._accept("not"):
+            inner = self._unary()
+            return lambda column: ~inner(column)
+        if self._accept("("):
+            inner = self._or()
+            self._take("op", ")")
+            return inner
+        return self._comparison()
+
+    def _comparison(self) -> Mask:
+        field = self._take("word")
+        if self._accept("("):
+            return self._array_function(field)
+        negate = self._accept("not")
+        if self._accept("in"):
+            values = self._list()
+            return lambda column: np.isin(column(field), values, invert=negate)
+        if negate:
+            raise ValueError(f"Expected 'in' after 'not' in filter: {self.expr}")
+
+        op = self._take("op")
+        if op not in _COMPARISONS:
+            raise ValueError(f"Unsupported operator {op!r} in filter: {self.expr}")
+        value = self._literal()
+        compare = _COMPARISONS[op]
+        return lambda column: compare(column(field), value)
+
+    def _array_function(self, name: str) -> Mask:
+        if name not in _ARRAY_FUNCTIONS:
+            raise ValueError(f"Unsupported function {name!r} in filter: {self.expr}")
+        field = self._take("word")
+        self._take("op", ",")
+        values = self._list() if name != "array_contains" else [self._literal()]
+        self._take("op", ")")
+        predicate = _ARRAY_FUNCTIONS[name]
+
+        def mask(column):
+            rows = column(field)
+            return np.fromiter((predicate(row_values, values) for row_values in rows), dtype=bool, count=len(rows))
+        return mask
+
+    def _list(self) -> List[Any]:
+        self._take("op", "[")
+        values = []
+        if not self._accept("]"):
+            values.append(self._literal())
+            while self._accept(","):
+                values.append(self._literal())
+            self._take("op", "]")
+        return values
+
+    def _literal(self) -> Any:
+        kind, value = self._peek()
+        if kind not in ("string", "number"):
+            raise ValueError(f"Expected a literal in filter: {self.expr}")
+        self.position += 1
+        return value
+
+
+def compile_filter(expr: str) -> Mask:
+    """Compile a Milvus-style boolean expression into a vectorized row mask"""
+    return _FilterParser(expr).parse()
+
+
+class LocalVectorStore:
+    """
+    In-process vector store with the MilvusClient interface.
+
+    Exact (brute-force) NumPy search over all vectors, so results match a FLAT
+    Milvus index, with the same hit dicts and "lower is better" distances. Data
+    is persisted under path/<collection> as append-only segments (one per
+    insert_chunks call) and reloaded on create_collection. Entity columns are
+    kept as lists and support the array_contains* filters, like a schema v2
+    Milvus collection. Meant for tests, benchmarks and small single-node
+    deployments without the Milvus stack.
+    """
+
+    META_FILE = "collection.json"
+    supports_array_filters = True
+
+    def __init__(self, path: str = "data/vector_store", metric_type: str = "L2", query_batch_size: int = 1000):
+        if metric_type not in METRIC_TYPES:
+            raise ValueError(f"Unsupported metric type: {metric_type} (expected one of {sorted(METRIC_TYPES)})")
+
+        self.path = path
+        self.collection_name = "document_chunks"
+        self.collection_dir = os.path.join(path, self.collection_name)
+        self.metric_type = metric_type
+        self.query_batch_size = query_batch_size
+        self.embedding_dim = None
+        self.collection_id = ""
+        self.initialized = False
+
+        self._lock = threading.RLock()
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._sq_norms = np.zeros(0, dtype=np.float32)
+        self._rows: List[Dict[str, Any]] = []
+        self._positions: Dict[int, int] = {}
+        self._columns: Dict[str, np.ndarray] = {}
+        # Values already stored, for O(1) duplicate checks at ingest time
+        self._keys: Dict[str, set] = {"file_hash": set(), "document_id": set()}
+        self._size = 0
+        self._next_id = 1
+        self._next_segment = 0
+
+    def connect(self):
+        """No-op apart from logging the store path: there is no server to connect to"""
+        logger.info(f"Using local vector store at {self.path}")
+
+    def get_connection_stats(self) -> Dict[str, Any]:
+        """In-process store: no connections to report"""
+        return {}
+
+    def create_collection(self, embedding_dim: int = 384):
+        """Open the collection on disk, creating it if needed"""
+        with self._lock:
+            if self.initialized:
+                return
+
+            meta_path = os.path.join(self.collection_dir, self.META_FILE)
+            if os.path.exists(meta_path):
+                with open(meta_path) as f:
+                    meta = json.load(f)
+                if meta["metric_type"] != self.metric_type:
+                    logger.warning(f"Local collection {self.collection_name} uses {meta['metric_type']}, "
+                                   f"not the configured {self.metric_type}; using the existing metric")
+                    self.metric_type = meta["metric_type"]
+                if meta["embedding_dim"] != embedding_dim:
+                    raise ValueError(f"Local collection has dimension {meta['embedding_dim']}, "
+                                     f"embedding model produces {embedding_dim}")
+                self.embedding_dim = meta["embedding_dim"]
+                self.collection_id = meta.get("collection_id", "")
+                self._vectors = np.zeros((0, self.embedding_dim), dtype=np.float32)
+                self._load_segments()
+                logger.info(f"Loaded local collection {self.collection_name} ({self._size} chunks)")
+            else:
+                os.makedirs(self.collection_dir, exist_ok=True)
+                self.embedding_dim = embedding_dim
+                self.collection_id = uuid.uuid4().hex
+                self._vectors = np.zeros((0, embedding_dim), dtype=np.float32)
+                self._write_file(meta_path, lambda f: f.write(json.dumps(
+                    {"embedding_dim": embedding_dim, "metric_type": self.metric_type,
+                     "collection_id": self.collection_id}
+                ).encode("utf-8")))
+                logger.info(f"Created local collection {self.collection_name} in {self.collection_dir}")
+
+            self.initialized = True
+
+    def _segment_paths(self, segment: int):
+        base = os.path.join(self.collection_dir, f"segment-{segment:06d}")
+        return base + ".json", base + ".npy"
+
+    def _load_segments(self):
+        segment = 0
+        while True:
+            rows_path, vectors_path = self._segment_paths(segment)
+            # The vector file is written last, so it marks a complete segment
+            if not os.path.exists(vectors_path):
+                break
+            with open(rows_path) as f:
+                rows = json.load(f)
+            self._append(rows, np.load(vectors_path))
+            segment += 1
+        self._next_segment = segment
+
+    @staticmethod
+    def _write_file(path: str, write: Callable):
+        """Write via a temporary file and an atomic rename"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+
+    def _append(self, rows: List[Dict[str, Any]], vectors: np.ndarray):
+        """Add rows (with ids) and their vectors to the in-memory arrays"""
+        needed = self._size + len(rows)
+        if needed > len(self._vectors):
+            capacity = max(needed, 2 * len(self._vectors), 1024)
+            grown = np.zeros((capacity, self.embedding_dim), dtype=np.float32)
+            grown[:self._size] = self._vectors[:self._size]
+            self._vectors = grown
+            sq_norms = np.zeros(capacity, dtype=np.float32)
+            sq_norms[:self._size] = self._sq_norms[:self._size]
+            self._sq_norms = sq_norms
+
+        self._decode_entities(rows)
+        self._vectors[self._size:needed] = vectors
+        self._sq_norms[self._size:needed] = np.einsum("ij,ij->i", vectors, vectors)
+        for position, row in enumerate(rows, start=self._size):
+            self._positions[row["id"]] = position
+            for field, values in self._keys.items():
+                values.add(row[field])
+        self._rows.extend(rows)
+        self._size = needed
+        if rows:
+            self._next_id = max(self._next_id, rows[-1]["id"] + 1)
+        self._columns.clear()
+
+    @staticmethod
+    def _decode_entities(rows: List[Dict[str, Any]]):
+        """Store entity columns as lists (chunks carry them as JSON strings)"""
+        for row in rows:
+            for field in ENTITY_FIELDS:
+                if isinstance(row.get(field), str):
+                    row[field] = decode_entity_list(row[field])
+
+    def _require_collection(self):
+        if not self.initialized:
+            raise Exception("Collection not initialized")
+
+    def document_exists(self, document_id: str = None, file_hash: str = None) -> bool:
+        """Check if document already exists by document_id or file_hash"""
+        self._require_collection()
+
+        if file_hash:
+            field, value = "file_hash", file_hash
+        elif document_id:
+            field, value = "document_id", document_id
+        else:
+            return False
+
+        with self._lock:
+            return value in self._keys[field]
+
+    def insert_chunks(self, chunks: List[Dict[str, Any]]) -> List[int]:
+        """Insert document chunks, persist them as a new segment and return their ids"""
+        self._require_collection()
+        if not chunks:
+            return []
+
+        vectors = np.asarray([chunk["embedding"] for chunk in chunks], dtype=np.float32)
+        if vectors.shape[1] != self.embedding_dim:
+            raise ValueError(f"Expected {self.embedding_dim}-dim embeddings, got {vectors.shape[1]}")
+
+        with self._lock:
+            rows = [
+                {"id": chunk_id, **{field: chunk[field] for field in DEFAULT_OUTPUT_FIELDS[1:] + ["file_hash"]}}
+                for chunk_id, chunk in enumerate(chunks, start=self._next_id)
+            ]
+            self._decode_entities(rows)
+
+            rows_path, vectors_path = self._segment_paths(self._next_segment)
+            self._write_file(rows_path, lambda f: f.write(json.dumps(rows).encode("utf-8")))
+            self._write_file(vectors_path, lambda f: np.save(f, vectors))
+            self._next_segment += 1
+
+            self._append(rows, vectors)
+
+        logger.info(f"Inserted {len(chunks)} chunks into local vector store")
+        return [row["id"] for row in rows]
+
+    def load_collection(self, force: bool = False):
+        """Only checks the collection exists: data is always in memory"""
+        self._require_collection()
+
+    def refresh_load_state(self):
+        """Only checks the collection exists: there is no server-side load state"""
+        self._require_collection()
+
+    @property
+    def num_entities(self) -> int:
+        return self._size
+
+    @property
+    def collection_fingerprint(self) -> str:
+        """Identifies this collection (not its contents); persisted index logs are keyed by it"""
+        return f"{self.collection_name}:{self.collection_id}"
+
+    def _column(self, field: str) -> np.ndarray:
+        """Column values as an array (cached until the next insert); caller holds the lock"""
+        if field not in self._columns:
+            values = [row.get(field) for row in self._rows[:self._size]]
+            if field in ENTITY_FIELDS:
+                # Lists of varying length: keep one Python list per row
+                column = np.empty(len(values), dtype=object)
+                column[:] = values
+            else:
+                column = np.asarray(values, dtype=np.int64 if field == "id" else None)
+            self._columns[field] = column
+        return self._columns[field]
+
+    def _matching_positions(self, expr: Optional[str]) -> Optional[np.ndarray]:
+        """Row positions matching expr, or None for all rows; caller holds the lock"""
+        if not expr:
+            return None
+        if self._size == 0:
+            return np.zeros(0, dtype=np.int64)
+        mask = compile_filter(expr)(self._column)
+        return np.flatnonzero(np.broadcast_to(mask, (self._size,)))
+
+    def search(self, query_embedding: List[float], top_k: int = 5,
+               output_fields: List[str] = None) -> List[List[Dict[str, Any]]]:
+        """Search for similar chunks"""
+        return self._search([query_embedding], top_k=top_k, output_fields=output_fields)
+
+    def search_batch(self, query_embeddings: List[List[float]], top_k: int = 5,
+                     output_fields: List[str] = None) -> List[List[Dict[str, Any]]]:
+        """Search for similar chunks for several query vectors (one hit list per vector)"""
+        return self._search(query_embeddings, top_k=top_k, output_fields=output_fields)
+
+    def search_with_filter(self, query_embedding: List[float], filter_expr: str, top_k: int = 5,
+                           output_fields: List[str] = None) -> List[List[Dict[str, Any]]]:
+        """Search for similar chunks with metadata filter"""
+        return self._search([query_embedding], top_k=top_k, filter_expr=filter_expr, output_fields=output_fields)
+
+    def _search(self, query_embeddings: List[List[float]], top_k: int, filter_expr: str = None,
+                output_fields: List[str] = None) -> List[List[Dict[str, Any]]]:
+        """Exact search returning one list of hit dicts (id, distance, output_fields) per query"""
+        self._require_collection()
+
+        if output_fields is None:
+            output_fields = SEARCH_OUTPUT_FIELDS
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(-1, self.embedding_dim)
+        with self._lock:
+            positions = self._matching_positions(filter_expr)
+            if positions is None:
+                vectors, sq_norms = self._vectors[:self._size], self._sq_norms[:self._size]
+            else:
+                vectors, sq_norms = self._vectors[positions], self._sq_norms[positions]
+            rows = self._rows
+
+        k = min(top_k, len(vectors))
+        if k <= 0:
+            return [[] for _ in queries]
+
+        distances = self._distances(queries, vectors, sq_norms)
+        candidates = np.argpartition(distances, k - 1, axis=1)[:, :k]
+
+        hit_lists = []
+        for query_distances, query_candidates in zip(distances, candidates):
+            ranked = query_candidates[np.argsort(query_distances[query_candidates], kind="stable")]
+            hits = []
+            for index in ranked:
+                row = rows[index if positions is None else positions[index]]
+                hits.append({
+                    "id": row["id"],
+                    "distance": float(query_distances[index]),
+                    **{field: row[field] for field in output_fields}
+                })
+            hit_lists.append(hits)
+        return hit_lists
+
+    def _distances(self, queries: np.ndarray, vectors: np.ndarray, sq_norms: np.ndarray) -> np.ndarray:
+        """(queries x vectors) "lower is better" distances, same convention as MilvusClient"""
+        scores = queries @ vectors.T
+        if self.metric_type == "L2":
+            return np.maximum(np.einsum("ij,ij->i", queries, queries)[:, None] - 2 * scores + sq_norms, 0.0)
+        if self.metric_type == "COSINE":
+            norms = np.sqrt(np.einsum("ij,ij->i", queries, queries))[:, None] * np.sqrt(sq_norms)
+            scores = scores / np.where(norms > 0, norms, 1.0)
+        return 1.0 - scores
+
+    def _project(self, position: int, output_fields: List[str]) -> Dict[str, Any]:
+        row = self._rows[position]
+        result = {}
+        for field in output_fields:
+            if field == "embedding":
+                result[field] = self._vectors[position].tolist()
+            else:
+                result[field] = row.get(field)
+        return result
+
+    def iter_all(self, output_fields: List[str] = None, batch_size: int = None,
+                 expr: str = "id > 0") -> Iterator[List[Dict[str, Any]]]:
+        """Stream chunks matching expr in batches with only output_fields projected"""
+        self._require_collection()
+
+        if output_fields is None:
+            output_fields = DEFAULT_OUTPUT_FIELDS
+        batch_size = batch_size or self.query_batch_size
+
+        with self._lock:
+            positions = self._matching_positions(expr)
+            if positions is None:
+                positions = np.arange(self._size)
+
+        for start in range(0, len(positions), batch_size):
+            with self._lock:
+                batch = [self._project(position, output_fields) for position in positions[start:start + batch_size]]
+            yield batch
+
+    def query_all(self, output_fields: List[str] = None, limit: int = None):
+        """Query ALL chunks without any filters"""
+        results = []
+        for batch in self.iter_all(output_fields=output_fields):
+            results.extend(batch)
+            if limit is not None and len(results) >= limit:
+                return results[:limit]
+        return results
+
+    def query_by_ids(self, ids: List[int], output_fields: List[str] = None):
+        """Fetch specific chunks by primary key"""
+        self._require_collection()
+
+        if output_fields is None:
+            output_fields = DEFAULT_OUTPUT_FIELDS
+
+        with self._lock:
+            positions = [self._positions[int(chunk_id)] for chunk_id in ids if int(chunk_id) in self._positions]
+            return [self._project(position, output_fields) for position in positions]
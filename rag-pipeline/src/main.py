@@ -1,11 +1,25 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
 import os
 import logging
+import threading
+import time
 from .ingestion_service import IngestionService
 from .retrieval_service import RetrievalService
+from .entity_index import EntityIndex
+from .bm25_index import BM25Index
+from .document_index import DocumentIndex
+from .cache import GenerationCounter
+from .bounded_executor import BoundedExecutor, ExecutorSaturatedError
+from .config import settings
+from .model_registry import model_registry
+from .readiness import ReadinessTracker
+from .metrics import REQUEST_DURATION, collect_timings
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -21,10 +35,50 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_request_duration(request: Request, call_next):
+    """Observe every request in the rag_request_duration_seconds histogram"""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route path only for known routes to bound label cardinality
+        path = request.url.path
+        endpoint = path if path in {route.path for route in app.routes} else "other"
+        REQUEST_DURATION.labels(method=request.method, endpoint=endpoint, status=str(status)).observe(
+            time.perf_counter() - start
+        )
+
+
 # Global service instances
 ingestion_service: Optional[IngestionService] = None
 retrieval_service: Optional[RetrievalService] = None
 
+# Startup components reported by /ready (services are only set once loading finished)
+readiness = ReadinessTracker(
+    ["embedding_model", "entity_extractor", "milvus", "services"]
+    + (["warmup"] if settings.warmup_enabled else [])
+)
+
+# Separate bounded executors per endpoint class: blocking work never runs on the
+# event loop, and a long ingest can never take the threads retrieval needs
+retrieval_executor = BoundedExecutor(
+    "retrieve", settings.retrieve_max_concurrency, settings.retrieve_max_queue
+)
+ingest_executor = BoundedExecutor(
+    "ingest", settings.ingest_max_concurrency, settings.ingest_max_queue
+)
+
+
+def saturated_response(e: ExecutorSaturatedError) -> HTTPException:
+    """429 with Retry-After for a saturated executor"""
+    logger.warning(str(e))
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+
 
 class IngestRequest(BaseModel):
     file_name: Optional[str] = None
@@ -36,21 +90,92 @@ class IngestResponse(BaseModel):
     results: Optional[dict] = None
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize services on startup"""
+def load_models():
+    """Load the embedding model, spaCy and the vector store (Milvus connection) concurrently"""
+    loaders = {
+        "embedding_model": lambda: model_registry.get_embedding_model(
+            settings.embedding_model, settings.embedding_backend, settings.onnx_model_dir
+        ),
+        "entity_extractor": lambda: model_registry.get_entity_extractor(),
+        "milvus": lambda: model_registry.get_vector_store(
+            settings.vector_store, settings.milvus_host, settings.milvus_port,
+            settings.milvus_options(), settings.local_store_path
+        ),
+    }
+
+    def run(name):
+        with readiness.track(name):
+            loaders[name]()
+
+    with ThreadPoolExecutor(max_workers=len(loaders), thread_name_prefix="startup") as pool:
+        futures = [pool.submit(run, name) for name in loaders]
+        # Surface the first failure after every loader has finished
+        for future in futures:
+            future.exception()
+        for future in futures:
+            future.result()
+
+
+def initialize_services():
+    """Background startup: load models, build services, then warm up"""
     global ingestion_service, retrieval_service
 
-    milvus_host = os.getenv("MILVUS_HOST", "milvus-standalone")
-    milvus_port = os.getenv("MILVUS_PORT", "19530")
-    embedding_model = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    try:
+        load_models()
+
+        with readiness.track("services"):
+            ingestion, retrieval = create_services()
+
+        if settings.warmup_enabled:
+            with readiness.track("warmup"):
+                retrieval.warmup()
+
+        # Publish only fully initialized (and warmed-up) services
+        ingestion_service, retrieval_service = ingestion, retrieval
+        logger.info("RAG service ready")
+    except Exception as e:
+        # The failed component is already marked in readiness. A process that stays
+        # up but never becomes ready is only "unhealthy", which Docker does not act
+        # on; exiting lets the restart policy retry startup.
+        logger.error(f"Service initialization failed: {e}; exiting")
+        logging.shutdown()
+        os._exit(1)
+
+
+def create_services():
+    """Build the ingestion and retrieval services on top of the already-loaded shared models"""
+    milvus_host = settings.milvus_host
+    milvus_port = settings.milvus_port
+    embedding_model = settings.embedding_model
+
+    # Shared inverted entity index (ingestion updates it, retrieval reads it)
+    entity_index = EntityIndex() if settings.entity_index_enabled else None
+
+    # Shared BM25 index (ingestion updates and persists it, retrieval reads it)
+    bm25_index = BM25Index(settings.bm25_index_path) if settings.bm25_enabled else None
+
+    # Shared document summary index for scenario 1 routing (same lifecycle as BM25); the
+    # other modes never read it, so skip its startup scan and per-ingest upkeep
+    document_index = DocumentIndex(settings.document_index_path) if settings.scenario_1_mode == "routed" else None
+
+    # Collection generation: bumped by ingestion, invalidates cached retrieval results
+    generation = GenerationCounter()
 
     logger.info("Initializing Ingestion Service...")
     try:
-        ingestion_service = IngestionService(
+        ingestion = IngestionService(
             milvus_host=milvus_host,
             milvus_port=milvus_port,
-            embedding_model=embedding_model
+            embedding_model=embedding_model,
+            embedding_backend=settings.embedding_backend,
+            onnx_model_dir=settings.onnx_model_dir,
+            milvus_options=settings.milvus_options(),
+            vector_store=settings.vector_store,
+            local_store_path=settings.local_store_path,
+            entity_index=entity_index,
+            bm25_index=bm25_index,
+            document_index=document_index,
+            generation=generation
         )
         logger.info("Ingestion Service initialized successfully")
     except Exception as e:
@@ -59,23 +184,74 @@ async def startup_event():
 
     logger.info("Initializing Retrieval Service...")
     try:
-        retrieval_service = RetrievalService(
+        retrieval = RetrievalService(
             milvus_host=milvus_host,
             milvus_port=milvus_port,
-            embedding_model=embedding_model
+            embedding_model=embedding_model,
+            embedding_backend=settings.embedding_backend,
+            onnx_model_dir=settings.onnx_model_dir,
+            milvus_options=settings.milvus_options(),
+            vector_store=settings.vector_store,
+            local_store_path=settings.local_store_path,
+            entity_index=entity_index,
+            bm25_index=bm25_index,
+            document_index=document_index,
+            scenario_1_mode=settings.scenario_1_mode,
+            routing_documents=settings.routing_documents,
+            routing_entity_weight=settings.routing_entity_weight,
+            grouped_search_window=settings.grouped_search_window,
+            rrf_k=settings.rrf_k,
+            parallel=settings.retrieval_parallel,
+            max_workers=settings.retrieval_max_workers,
+            embedding_cache_size=settings.embedding_cache_size,
+            embedding_cache_ttl=settings.embedding_cache_ttl,
+            result_cache_size=settings.result_cache_size,
+            result_cache_ttl=settings.result_cache_ttl,
+            payload_cache_size=settings.payload_cache_size,
+            generation=generation
         )
         logger.info("Retrieval Service initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize Retrieval Service: {e}")
         raise
 
+    return ingestion, retrieval
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Start loading models in the background so the port opens immediately"""
+    threading.Thread(target=initialize_services, name="service-init", daemon=True).start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop accepting executor work"""
+    retrieval_executor.shutdown(wait=False)
+    ingest_executor.shutdown(wait=False)
+
 
 @app.get("/")
 async def root():
-    """Health check endpoint"""
+    """Liveness endpoint (the process is up; models may still be loading, see /ready)"""
     return {"status": "healthy", "service": "RAG Ingestion and Retrieval Service"}
 
 
+@app.get("/ready")
+async def ready():
+    """Readiness endpoint: 200 once every startup component is loaded and warmed up, 503 before"""
+    components = readiness.snapshot()
+    if readiness.is_ready() and retrieval_service and ingestion_service:
+        return {"status": "ready", "components": components}
+    return JSONResponse(status_code=503, content={"status": "not_ready", "components": components})
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: per-stage and per-endpoint latency histograms"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/milvus-health")
 async def check_milvus_health():
     """Proxy endpoint to check Milvus health (with CORS)"""
@@ -92,13 +268,22 @@ async def check_milvus_health():
 
 @app.get("/stats")
 async def get_stats():
-    """Get ingestion statistics"""
+    """Get ingestion statistics, executor load, Milvus connection pool and retrieval cache counters"""
     if not ingestion_service:
         raise HTTPException(status_code=503, detail="Service not initialized")
 
     try:
-        stats = ingestion_service.get_stats()
+        stats = await retrieval_executor.run(ingestion_service.get_stats)
+        stats["executors"] = {
+            "retrieve": retrieval_executor.get_stats(),
+            "ingest": ingest_executor.get_stats()
+        }
+        stats["connections"] = ingestion_service.milvus_client.get_connection_stats()
+        if retrieval_service:
+            stats["caches"] = retrieval_service.get_cache_stats()
         return stats
+    except ExecutorSaturatedError as e:
+        raise saturated_response(e)
     except Exception as e:
         logger.error(f"Error getting stats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -115,14 +300,16 @@ async def ingest_documents(request: IngestRequest):
         raise HTTPException(status_code=503, detail="Service not initialized")
 
     # Default data directory
-    data_directory = "/app/data"
+    data_directory = settings.data_directory
 
     if not os.path.exists(data_directory):
         raise HTTPException(status_code=404, detail=f"Data directory not found: {data_directory}")
 
     try:
-        # Ingest from directory (with optional specific file)
-        results = ingestion_service.ingest_directory(data_directory, request.file_name)
+        # Ingest from directory (with optional specific file) on the ingest executor
+        results = await ingest_executor.run(
+            ingestion_service.ingest_directory, data_directory, request.file_name
+        )
 
         # Prepare response
         total_ingested = len(results["ingested"])
@@ -145,6 +332,8 @@ async def ingest_documents(request: IngestRequest):
             }
         )
 
+    except ExecutorSaturatedError as e:
+        raise saturated_response(e)
     except Exception as e:
         logger.error(f"Ingestion error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -154,6 +343,10 @@ class RetrieveRequest(BaseModel):
     query: str
     min_chunks: Optional[int] = 3
     max_chunks: Optional[int] = 6
+    # "hybrid" (default) or "fusion" (BM25 + vector reciprocal rank fusion)
+    strategy: Optional[str] = "hybrid"
+    # Include per-stage timings (milliseconds) in the response
+    debug: Optional[bool] = False
 
 
 @app.post("/retrieve")
@@ -173,21 +366,79 @@ async def retrieve_chunks(request: RetrieveRequest):
 
     **Final**: Combine and deduplicate → Max 8 unique chunks
 
+    With **strategy="fusion"**, BM25 keyword ranking and vector ranking are fused
+    with reciprocal rank fusion instead (best for exact terms such as names,
+    addresses and file numbers).
+
     - **query**: The search query
+    - **strategy**: "hybrid" (default) or "fusion"
+    - **debug**: add a `timings` block with per-stage count and total_ms
     """
     if not retrieval_service:
         raise HTTPException(status_code=503, detail="Retrieval service not initialized")
 
+    strategy = request.strategy or "hybrid"
+    if strategy not in ("hybrid", "fusion"):
+        raise HTTPException(status_code=400, detail=f"Unknown strategy: {strategy} (expected hybrid or fusion)")
+    if strategy == "fusion" and retrieval_service.bm25_index is None:
+        raise HTTPException(status_code=400, detail="Fusion retrieval requires BM25_ENABLED=true")
+
     try:
-        # Use Hybrid approach (Scenario 1 + Scenario 2)
-        results = retrieval_service.retrieve_hybrid(query=request.query)
+        with collect_timings() as timings:
+            if strategy == "fusion":
+                results = await retrieval_executor.run(
+                    retrieval_service.retrieve_fusion, request.query, 8, settings.fusion_candidates
+                )
+            else:
+                # Use Hybrid approach (Scenario 1 + Scenario 2)
+                results = await retrieval_executor.run(retrieval_service.retrieve_hybrid, request.query)
+        if request.debug:
+            results["timings"] = timings.to_dict()
         return results
 
+    except ExecutorSaturatedError as e:
+        raise saturated_response(e)
     except Exception as e:
         logger.error(f"Retrieval error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+class RetrieveBatchRequest(BaseModel):
+    queries: List[str]
+
+
+@app.post("/retrieve/batch")
+async def retrieve_chunks_batch(request: RetrieveBatchRequest):
+    """
+    Batched Hybrid Retrieval for offline workloads (evaluations, bulk question lists)
+
+    Runs the same hybrid retrieval as /retrieve for every query, but encodes all
+    queries in one embedding call, runs NER with one spaCy pipe and batches the
+    initial Milvus searches into one multi-vector request.
+
+    - **queries**: List of search queries
+    - Returns per-query results in the same shape as /retrieve, in request order
+    """
+    if not retrieval_service:
+        raise HTTPException(status_code=503, detail="Retrieval service not initialized")
+
+    if len(request.queries) > settings.retrieve_batch_max_size:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many queries: {len(request.queries)} > {settings.retrieve_batch_max_size}"
+        )
+
+    try:
+        results = await retrieval_executor.run(retrieval_service.retrieve_hybrid_batch, request.queries)
+        return {"total_queries": len(results), "results": results}
+
+    except ExecutorSaturatedError as e:
+        raise saturated_response(e)
+    except Exception as e:
+        logger.error(f"Batch retrieval error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,90 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+import functools
+import logging
+import threading
+import time
+from prometheus_client import Histogram
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Sub-millisecond resolution at the low end: cache hits and index lookups are fast
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STAGE_DURATION = Histogram(
+    "rag_stage_duration_seconds",
+    "Duration of retrieval and ingestion pipeline stages",
+    ["stage"],
+    buckets=LATENCY_BUCKETS
+)
+
+REQUEST_DURATION = Histogram(
+    "rag_request_duration_seconds",
+    "Duration of HTTP requests by endpoint",
+    ["method", "endpoint", "status"],
+    buckets=LATENCY_BUCKETS
+)
+
+
+class StageTimings:
+    """Per-request accumulation of stage durations (for the debug `timings` block)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, float]] = {}
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            entry = self._stages.setdefault(stage, {"count": 0, "total_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] += seconds * 1000
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                stage: {"count": int(entry["count"]), "total_ms": round(entry["total_ms"], 3)}
+                for stage, entry in self._stages.items()
+            }
+
+
+# Collector of the current request, if it asked for timings. Worker threads see it
+# because thread pool submissions run in a copy of the submitting context.
+_current_timings: ContextVar[Optional[StageTimings]] = ContextVar("rag_stage_timings", default=None)
+
+
+@contextmanager
+def collect_timings():
+    """Record every stage that runs inside the block (including on pool threads)"""
+    timings = StageTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a pipeline stage: observed in the Prometheus histogram and the request's timings"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_DURATION.labels(stage=name).observe(elapsed)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.add(name, elapsed)
+
+
+def timed(name: str):
+    """Decorator form of stage()"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,42 @@
+"""
+Migrate the document_chunks collection to the configured layout: native
+ARRAY<VARCHAR> entity columns (schema v2, instead of v1 JSON strings) so entity
+lookups can be pushed down to Milvus as array_contains_any filters, and
+document_id as partition key (MILVUS_PARTITION_KEY) so document-scoped searches
+only scan the partitions of the requested documents.
+
+Stop the RAG service first (chunk ids are reassigned), then run from rag-pipeline/:
+    python -m src.migrate_entity_schema --host localhost [--drop-backup]
+"""
+import argparse
+import logging
+from .bm25_index import BM25Index
+from .config import settings
+from .document_index import DocumentIndex
+from .milvus_client import MilvusClient
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=settings.milvus_host)
+    parser.add_argument("--port", default=settings.milvus_port)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--drop-backup", action="store_true", help="Drop the old collection after a successful copy")
+    args = parser.parse_args()
+
+    client = MilvusClient(host=args.host, port=args.port, **settings.milvus_options())
+    client.connect()
+    client.create_collection()
+    migrated = client.migrate_schema(batch_size=args.batch_size, keep_backup=not args.drop_backup)
+    if migrated:
+        # Their chunk ids are gone; the service rebuilds the indexes on the next start
+        BM25Index(settings.bm25_index_path).delete_log()
+        DocumentIndex(settings.document_index_path).delete_log()
+    logger.info(f"Done: {migrated} chunks migrated")
+
+
+if __name__ == "__main__":
+    main()
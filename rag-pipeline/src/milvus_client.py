@@ -1,62 +1,296 @@
-from pymilvus import connections, Collection, FieldSchema, CollectionSchema, DataType, utility
-from typing import List, Dict, Any
+from pymilvus import Collection, FieldSchema, CollectionSchema, DataType, utility
+from typing import List, Dict, Any, Callable, Iterator, Optional
+import json
 import logging
+import threading
+import numpy as np
+from .entity_index import ENTITY_FIELDS
+from .metrics import stage
+from .milvus_pool import MilvusConnectionPool
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+DEFAULT_OUTPUT_FIELDS = ["id", "document_id", "page_number", "text", "person_names",
+                         "location_names", "organization_names", "date_entities", "file_numbers", "other_entities"]
+SEARCH_OUTPUT_FIELDS = DEFAULT_OUTPUT_FIELDS[1:]
+# Minimal search projection for two-phase retrieval: rank on id/distance/document_id,
+# then fetch text and entities for the final chunks only (query_by_ids)
+SEARCH_ID_FIELDS = ["document_id"]
+
+# Columns written on insert, in schema order (after the auto id)
+INSERT_FIELDS = ["document_id", "file_hash", "page_number", "text", "embedding"] + ENTITY_FIELDS
+
+# Chunk schema versions: 1 stores entity lists as JSON VARCHAR columns, 2 as native
+# ARRAY<VARCHAR> columns that filters (array_contains_any) can be evaluated on
+SCHEMA_VERSION_JSON = 1
+SCHEMA_VERSION_ARRAY = 2
+ENTITY_ARRAY_CAPACITY = 256
+ENTITY_MAX_LENGTH = 512
+
+# Milvus caps limit/offset windows of a single search or query
+MAX_QUERY_WINDOW = 16384
+
+# document_id is the partition key of new collections: chunks are hashed into
+# num_partitions partitions by document, and searches filtered on document_id
+# only scan the partitions of the requested documents
+DEFAULT_NUM_PARTITIONS = 64
+
+# Default build parameters per supported index type
+INDEX_PARAMS = {
+    "FLAT": {},
+    "IVF_FLAT": {"nlist": 128},
+    "IVF_SQ8": {"nlist": 128},
+    "IVF_PQ": {"nlist": 128, "m": 16, "nbits": 8},
+    "HNSW": {"M": 16, "efConstruction": 200},
+}
+
+# Default search parameters per index type
+SEARCH_PARAMS = {
+    "FLAT": {},
+    "IVF_FLAT": {"nprobe": 10},
+    "IVF_SQ8": {"nprobe": 10},
+    "IVF_PQ": {"nprobe": 10},
+    "HNSW": {"ef": 64},
+}
+
+# L2 distances are "lower is better"; for similarity metrics (IP on normalized
+# vectors, COSINE) the client reports 1 - score so callers can always sort ascending
+METRIC_TYPES = {"L2", "IP", "COSINE"}
+SIMILARITY_METRICS = {"IP", "COSINE"}
+
+# Lossy index types: searches over-fetch and re-rank exactly against the float vectors
+COMPRESSED_INDEX_TYPES = {"IVF_SQ8", "IVF_PQ"}
+
+
+def decode_entity_list(value: str) -> List[str]:
+    try:
+        return json.loads(value)
+    except ValueError:
+        return []
+
+
+def encode_entity_list(value: Any, schema_version: int) -> Any:
+    """Encode an entity list (or its JSON string) as stored by the given schema version"""
+    values = decode_entity_list(value) if isinstance(value, str) else list(value or [])
+    if schema_version == SCHEMA_VERSION_JSON:
+        return json.dumps(values)
+
+    # ARRAY<VARCHAR>: unique values, bounded by the field's capacity and element length
+    unique_values = list(dict.fromkeys(entity[:ENTITY_MAX_LENGTH] for entity in values))
+    if len(unique_values) > ENTITY_ARRAY_CAPACITY:
+        logger.warning(f"Truncating entity list of {len(unique_values)} values to {ENTITY_ARRAY_CAPACITY}")
+    return unique_values[:ENTITY_ARRAY_CAPACITY]
+
+
+def filter_literal(value: Any) -> str:
+    """Quote a value for a Milvus boolean expression (escapes quotes, backslashes, control characters)"""
+    if isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"Unsupported filter value: {value!r}")
+    return str(value)
+
+
+def document_filter_expression(document_ids: List[str]) -> Optional[str]:
+    """`document_id in [...]` over the unique ids (None when there are none)"""
+    unique_ids = list(dict.fromkeys(document_ids))
+    if not unique_ids:
+        return None
+    return f"document_id in [{', '.join(filter_literal(document_id) for document_id in unique_ids)}]"
+
+
 class MilvusClient:
-    def __init__(self, host: str = "localhost", port: str = "19530"):
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: str = "19530",
+        query_batch_size: int = 1000,
+        index_type: str = "IVF_FLAT",
+        index_params: Optional[Dict[str, Any]] = None,
+        metric_type: str = "L2",
+        search_params: Optional[Dict[str, Any]] = None,
+        rerank_overfetch: int = 4,
+        schema_version: int = SCHEMA_VERSION_ARRAY,
+        partition_key: bool = True,
+        num_partitions: int = DEFAULT_NUM_PARTITIONS,
+        replica_number: int = 1,
+        pool_size: int = 8,
+        pool_timeout: float = 30.0,
+        health_check_interval: float = 30.0,
+        reconnect_retries: int = 5
+    ):
+        """
+        index_type / index_params / metric_type: vector index used when the collection
+        is created (FLAT, IVF_FLAT, HNSW, or the compressed IVF_SQ8 / IVF_PQ; L2, IP or COSINE)
+        search_params: per-search parameters (nprobe for IVF, ef for HNSW); defaults per index type
+        rerank_overfetch: candidates fetched per requested hit on a compressed index
+        before exact re-ranking (1 disables re-ranking)
+        schema_version: entity column layout for new collections (SCHEMA_VERSION_JSON
+        or SCHEMA_VERSION_ARRAY)
+        partition_key / num_partitions: use document_id as the partition key of new
+        collections, so document-scoped searches only scan matching partitions
+        replica_number: in-memory replicas the collection is loaded with (read scaling
+        across query nodes; needs that many query nodes)
+        pool_size / pool_timeout: named connections searches and queries check out per
+        call, and how long a call waits for a free one (see MilvusConnectionPool)
+        health_check_interval / reconnect_retries: idle time after which a connection is
+        pinged before reuse, and reconnect attempts (with backoff) for a broken one
+
+        An existing collection keeps the index, metric and schema it was built with
+        (see migrate_schema). Entity columns are always returned as lists.
+        """
+        if index_type not in INDEX_PARAMS:
+            raise ValueError(f"Unsupported index type: {index_type} (expected one of {sorted(INDEX_PARAMS)})")
+        if metric_type not in METRIC_TYPES:
+            raise ValueError(f"Unsupported metric type: {metric_type} (expected one of {sorted(METRIC_TYPES)})")
+        if schema_version not in (SCHEMA_VERSION_JSON, SCHEMA_VERSION_ARRAY):
+            raise ValueError(f"Unsupported schema version: {schema_version}")
+
         self.host = host
         self.port = port
         self.collection_name = "document_chunks"
         self.collection = None
+        self.query_batch_size = query_batch_size
+        self.index_type = index_type
+        self.index_params = index_params or INDEX_PARAMS[index_type]
+        self.metric_type = metric_type
+        self.search_params = search_params
+        self.rerank_overfetch = rerank_overfetch
+        self.rerank = False
+        self.schema_version = schema_version
+        self.partition_key = partition_key
+        self.num_partitions = num_partitions
+        self._configured_layout = (schema_version, partition_key)
+        self.replica_number = replica_number
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self.pool = MilvusConnectionPool(
+            host, port, size=pool_size, checkout_timeout=pool_timeout,
+            health_check_interval=health_check_interval, max_retries=reconnect_retries
+        )
+        # Collection handles bound to each pooled alias (self.collection is bound to the primary)
+        self._collections: Dict[str, Collection] = {}
 
     def connect(self):
-        """Connect to Milvus server"""
-        try:
-            connections.connect("default", host=self.host, port=self.port)
-            logger.info(f"Connected to Milvus at {self.host}:{self.port}")
-        except Exception as e:
-            logger.error(f"Failed to connect to Milvus: {e}")
-            raise
+        """Open the pooled connections to the Milvus server"""
+        self.pool.connect()
+
+    def get_connection_stats(self) -> Dict[str, Any]:
+        return self.pool.get_stats()
 
     def create_collection(self, embedding_dim: int = 384):
         """Create collection with schema for document chunks"""
-        if utility.has_collection(self.collection_name):
+        if utility.has_collection(self.collection_name, using=self.pool.primary):
             logger.info(f"Collection {self.collection_name} already exists")
-            self.collection = Collection(self.collection_name)
+            self.collection = Collection(self.collection_name, using=self.pool.primary)
+            self._sync_schema_layout()
+            self._sync_index_config()
             return
 
-        # Define schema
+        if self.index_type == "IVF_PQ" and embedding_dim % self.index_params["m"]:
+            raise ValueError(f"IVF_PQ m={self.index_params['m']} must divide embedding dim {embedding_dim}")
+
+        self.collection = self._new_collection(self.collection_name, embedding_dim,
+                                               self.schema_version, self.partition_key)
+
+        # Create index for vector search
+        self.collection.create_index(field_name="embedding", index_params=self._index_spec())
+        logger.info(f"Created collection {self.collection_name} ({self.index_type}/{self.metric_type} index, "
+                   f"schema v{self.schema_version}, "
+                   f"{f'{self.num_partitions} document partitions' if self.partition_key else 'no partition key'})")
+        self._sync_index_config()
+
+    def _new_collection(self, name: str, embedding_dim: int, schema_version: int, partition_key: bool) -> Collection:
+        """Create a chunk collection with the given schema version and partitioning"""
+        schema = self._chunk_schema(embedding_dim, schema_version, partition_key)
+        if partition_key:
+            return Collection(name=name, schema=schema, using=self.pool.primary, num_partitions=self.num_partitions)
+        return Collection(name=name, schema=schema, using=self.pool.primary)
+
+    @staticmethod
+    def _chunk_schema(embedding_dim: int, schema_version: int, partition_key: bool = False) -> CollectionSchema:
+        """Collection schema for document chunks in the given schema version"""
         fields = [
             FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
-            FieldSchema(name="document_id", dtype=DataType.VARCHAR, max_length=256),
+            FieldSchema(name="document_id", dtype=DataType.VARCHAR, max_length=256, is_partition_key=partition_key),
             FieldSchema(name="file_hash", dtype=DataType.VARCHAR, max_length=64),
             FieldSchema(name="page_number", dtype=DataType.INT64),
             FieldSchema(name="text", dtype=DataType.VARCHAR, max_length=65535),
             FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=embedding_dim),
-            # Entity lists stored as JSON strings
-            FieldSchema(name="person_names", dtype=DataType.VARCHAR, max_length=5000),
-            FieldSchema(name="location_names", dtype=DataType.VARCHAR, max_length=5000),
-            FieldSchema(name="organization_names", dtype=DataType.VARCHAR, max_length=5000),
-            FieldSchema(name="date_entities", dtype=DataType.VARCHAR, max_length=5000),
-            FieldSchema(name="file_numbers", dtype=DataType.VARCHAR, max_length=5000),
-            FieldSchema(name="other_entities", dtype=DataType.VARCHAR, max_length=5000),
         ]
+        for field in ENTITY_FIELDS:
+            if schema_version == SCHEMA_VERSION_ARRAY:
+                fields.append(FieldSchema(
+                    name=field, dtype=DataType.ARRAY, element_type=DataType.VARCHAR,
+                    max_capacity=ENTITY_ARRAY_CAPACITY, max_length=ENTITY_MAX_LENGTH
+                ))
+            else:
+                # Entity lists stored as JSON strings
+                fields.append(FieldSchema(name=field, dtype=DataType.VARCHAR, max_length=5000))
 
-        schema = CollectionSchema(fields=fields, description="Document chunks with embeddings and entities")
-        self.collection = Collection(name=self.collection_name, schema=schema)
+        return CollectionSchema(fields=fields, description="Document chunks with embeddings and entities")
 
-        # Create index for vector search
-        index_params = {
-            "metric_type": "L2",
-            "index_type": "IVF_FLAT",
-            "params": {"nlist": 128}
+    def _index_spec(self) -> Dict[str, Any]:
+        return {
+            "metric_type": self.metric_type,
+            "index_type": self.index_type,
+            "params": self.index_params
         }
-        self.collection.create_index(field_name="embedding", index_params=index_params)
-        logger.info(f"Created collection {self.collection_name}")
+
+    def _sync_schema_layout(self):
+        """Detect the existing collection's entity column type (JSON strings or arrays) and partition key"""
+        fields = {field.name: field for field in self.collection.schema.fields}
+        entity_field = fields.get(ENTITY_FIELDS[0])
+        is_array = entity_field is not None and entity_field.dtype == DataType.ARRAY
+        self.schema_version = SCHEMA_VERSION_ARRAY if is_array else SCHEMA_VERSION_JSON
+        self.partition_key = bool(getattr(fields["document_id"], "is_partition_key", False))
+        if self.needs_migration:
+            logger.warning(f"Collection {self.collection_name} uses chunk schema v{self.schema_version} "
+                           f"({'with' if self.partition_key else 'without'} document_id partition key), not the "
+                           f"configured layout; run `python -m src.migrate_entity_schema` to migrate it")
+
+    @property
+    def needs_migration(self) -> bool:
+        """Whether the collection is behind the configured layout (only upgrades count)"""
+        configured_version, configured_partition_key = self._configured_layout
+        return (self.schema_version < configured_version
+                or (configured_partition_key and not self.partition_key))
+
+    @property
+    def supports_array_filters(self) -> bool:
+        """Whether entity columns can be filtered server-side with array_contains_any"""
+        return self.schema_version == SCHEMA_VERSION_ARRAY
+
+    def _sync_index_config(self):
+        """Adopt the collection's actual index type/metric and derive search settings from them"""
+        if self.collection.indexes:
+            params = self.collection.indexes[0].params
+            configured = (self.index_type, self.metric_type)
+            self.index_type = params.get("index_type", self.index_type)
+            self.metric_type = params.get("metric_type", self.metric_type)
+            if (self.index_type, self.metric_type) != configured:
+                logger.warning(f"Collection {self.collection_name} is indexed with "
+                               f"{self.index_type}/{self.metric_type}, not the configured "
+                               f"{configured[0]}/{configured[1]}; using the existing index")
+            if self.index_type != configured[0]:
+                # Parameters configured for another index type (e.g. HNSW ef on an IVF
+                # index) would be ignored by Milvus without an error
+                build_params = params.get("params")
+                self.index_params = (build_params if isinstance(build_params, dict)
+                                     else INDEX_PARAMS.get(self.index_type, {}))
+                if self.search_params is not None:
+                    logger.warning(f"Ignoring search params {self.search_params} configured for "
+                                   f"{configured[0]}; using the {self.index_type} defaults")
+                    self.search_params = None
+
+        if self.search_params is None:
+            self.search_params = SEARCH_PARAMS.get(self.index_type, {})
+
+        self.rerank = self.index_type in COMPRESSED_INDEX_TYPES and self.rerank_overfetch > 1
+        if self.rerank:
+            logger.info(f"{self.index_type} index: re-ranking {self.rerank_overfetch}x over-fetched candidates exactly")
 
     def document_exists(self, document_id: str = None, file_hash: str = None) -> bool:
         """Check if document already exists by document_id or file_hash"""
@@ -64,101 +298,372 @@ class MilvusClient:
             raise Exception("Collection not initialized")
 
         try:
-            self.collection.load()
+            self._ensure_loaded()
 
             if file_hash:
-                expr = f'file_hash == "{file_hash}"'
+                expr = f"file_hash == {filter_literal(file_hash)}"
             elif document_id:
-                expr = f'document_id == "{document_id}"'
+                expr = f"document_id == {filter_literal(document_id)}"
             else:
                 return False
 
-            results = self.collection.query(expr=expr, output_fields=["document_id"], limit=1)
+            results = self._with_connection(
+                lambda collection: collection.query(expr=expr, output_fields=["document_id"], limit=1)
+            )
             return len(results) > 0
         except Exception as e:
             logger.warning(f"Error checking document existence: {e}")
             return False
 
-    def insert_chunks(self, chunks: List[Dict[str, Any]]):
-        """Insert document chunks into Milvus"""
+    def insert_chunks(self, chunks: List[Dict[str, Any]]) -> List[int]:
+        """Insert document chunks into Milvus and return their primary keys"""
         if not self.collection:
             raise Exception("Collection not initialized")
 
-        # Prepare data for insertion
-        data = [
-            [chunk["document_id"] for chunk in chunks],
-            [chunk["file_hash"] for chunk in chunks],
-            [chunk["page_number"] for chunk in chunks],
-            [chunk["text"] for chunk in chunks],
-            [chunk["embedding"] for chunk in chunks],
-            [chunk["person_names"] for chunk in chunks],
-            [chunk["location_names"] for chunk in chunks],
-            [chunk["organization_names"] for chunk in chunks],
-            [chunk["date_entities"] for chunk in chunks],
-            [chunk["file_numbers"] for chunk in chunks],
-            [chunk["other_entities"] for chunk in chunks],
-        ]
+        data = self._insert_data(chunks, self.schema_version)
 
-        self.collection.insert(data)
-        self.collection.flush()
+        def insert(collection: Collection):
+            result = collection.insert(data)
+            collection.flush()
+            return result
+        # Not retried: an insert whose reply was lost may have been applied (auto ids)
+        result = self._with_connection(insert, retry=False)
         logger.info(f"Inserted {len(chunks)} chunks into Milvus")
+        return list(result.primary_keys)
+
+    @staticmethod
+    def _insert_data(chunks: List[Dict[str, Any]], schema_version: int) -> List[List[Any]]:
+        """Column-ordered insert data; entity values (JSON strings or lists) are encoded for the schema"""
+        data = []
+        for field in INSERT_FIELDS:
+            if field in ENTITY_FIELDS:
+                data.append([encode_entity_list(chunk[field], schema_version) for chunk in chunks])
+            else:
+                data.append([chunk[field] for chunk in chunks])
+        return data
+
+    def _collection_on(self, alias: str) -> Collection:
+        """Collection handle bound to a pooled connection (created once per alias)"""
+        collection = self._collections.get(alias)
+        if collection is None:
+            collection = self._collections[alias] = Collection(self.collection_name, using=alias)
+        return collection
+
+    def _with_connection(self, operation: Callable[[Collection], Any], retry: bool = True) -> Any:
+        """
+        Run operation(collection) on a checked-out pooled connection.
+
+        If the operation fails and the connection no longer answers a ping, the
+        connection is re-established (with backoff) and, when retry is set, the
+        operation runs once more; errors on a healthy connection are raised as is.
+        """
+        with self.pool.checkout() as alias:
+            try:
+                return operation(self._collection_on(alias))
+            except Exception as e:
+                if self.pool.is_healthy(alias):
+                    raise
+                logger.warning(f"Milvus connection {alias} broke during a request ({e}); reconnecting")
+                self.pool.reconnect(alias)
+                if not retry:
+                    raise
+            return operation(self._collection_on(alias))
+
+    def _decode_rows(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Turn JSON-string entity columns (schema v1) into lists, in place"""
+        if self.schema_version == SCHEMA_VERSION_JSON and rows:
+            with stage("milvus.decode_entities"):
+                for row in rows:
+                    for field in ENTITY_FIELDS:
+                        if isinstance(row.get(field), str):
+                            row[field] = decode_entity_list(row[field])
+        return rows
+
+    def load_collection(self, force: bool = False):
+        """
+        Load the collection into memory for search (once; later calls are no-ops).
+
+        Inserts into a loaded collection become searchable without reloading, so
+        the per-request paths only check a local flag; force re-issues the load
+        (after a release or a collection swap).
+        """
+        if not self.collection:
+            return
+
+        with self._load_lock:
+            if self._loaded and not force:
+                return
+            try:
+                self.collection.load(replica_number=self.replica_number)
+            except Exception as e:
+                if self.replica_number == 1:
+                    raise
+                # e.g. already loaded with a different replica count, or too few query nodes
+                logger.warning(f"Loading {self.collection_name} with {self.replica_number} replicas failed ({e}); "
+                               f"loading with the server default")
+                self.collection.load()
+            self._loaded = True
+        logger.info(f"Loaded collection {self.collection_name} ({self.replica_number} replica(s))")
 
-    def load_collection(self):
-        """Load collection into memory for search"""
-        if self.collection:
-            self.collection.load()
-            logger.info(f"Loaded collection {self.collection_name}")
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load_collection()
 
-    def search(self, query_embedding: List[float], top_k: int = 5):
+    def refresh_load_state(self):
+        """
+        Re-check the server-side load state (one round trip) and reload if the
+        collection was released, e.g. by an operator or another client. Called
+        once per ingestion batch rather than per request.
+        """
+        if not self.collection:
+            return
+        state = utility.load_state(self.collection_name, using=self.pool.primary)
+        if getattr(state, "name", str(state)) != "Loaded":
+            logger.info(f"Collection {self.collection_name} is not loaded ({state}); loading")
+            self.load_collection(force=True)
+        else:
+            self._loaded = True
+
+    @property
+    def num_entities(self) -> int:
+        return self.collection.num_entities if self.collection else 0
+
+    @property
+    def collection_fingerprint(self) -> str:
+        """
+        Identifies the collection behind collection_name (not its contents).
+        migrate_schema swaps in a new collection with a new id, so persisted
+        index logs keyed by it are not replayed against the reassigned chunk ids.
+        """
+        if not self.collection:
+            return ""
+        info = self.collection.describe()
+        return f"{self.collection_name}:{info.get('collection_id')}:{info.get('created_timestamp')}"
+
+    def search(self, query_embedding: List[float], top_k: int = 5,
+               output_fields: List[str] = None) -> List[List[Dict[str, Any]]]:
         """Search for similar chunks"""
+        return self._search([query_embedding], top_k=top_k, output_fields=output_fields)
+
+    def search_batch(self, query_embeddings: List[List[float]], top_k: int = 5,
+                     output_fields: List[str] = None) -> List[List[Dict[str, Any]]]:
+        """Search for similar chunks for several query vectors in one request (one hit list per vector)"""
+        return self._search(query_embeddings, top_k=top_k, output_fields=output_fields)
+
+    def search_with_filter(self, query_embedding: List[float], filter_expr: str, top_k: int = 5,
+                           output_fields: List[str] = None) -> List[List[Dict[str, Any]]]:
+        """Search for similar chunks with metadata filter"""
         if not self.collection:
             raise Exception("Collection not initialized")
 
-        search_params = {"metric_type": "L2", "params": {"nprobe": 10}}
-        results = self.collection.search(
-            data=[query_embedding],
-            anns_field="embedding",
-            param=search_params,
-            limit=top_k,
-            output_fields=["document_id", "page_number", "text", "person_names",
-                          "location_names", "organization_names", "date_entities", "file_numbers", "other_entities"]
-        )
-        return results
+        return self._search([query_embedding], top_k=top_k, filter_expr=filter_expr, output_fields=output_fields)
 
-    def search_with_filter(self, query_embedding: List[float], filter_expr: str, top_k: int = 5):
-        """Search for similar chunks with metadata filter"""
+    def _search(self, query_embeddings: List[List[float]], top_k: int,
+                filter_expr: str = None, output_fields: List[str] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Run a vector search and return one list of hit dicts per query vector.
+
+        Each hit dict has id, distance and the output_fields (SEARCH_OUTPUT_FIELDS
+        by default; SEARCH_ID_FIELDS keeps text and entities off the wire). On a
+        compressed index the search over-fetches rerank_overfetch x top_k
+        candidates and re-ranks them exactly against the stored float vectors.
+        """
         if not self.collection:
             raise Exception("Collection not initialized")
 
-        self.collection.load()
+        if output_fields is None:
+            output_fields = SEARCH_OUTPUT_FIELDS
 
-        search_params = {"metric_type": "L2", "params": {"nprobe": 10}}
-        results = self.collection.search(
-            data=[query_embedding],
+        self._ensure_loaded()
+        limit = top_k * self.rerank_overfetch if self.rerank else top_k
+        search_params = {"metric_type": self.metric_type, "params": self.search_params or {}}
+        results = self._with_connection(lambda collection: collection.search(
+            data=query_embeddings,
             anns_field="embedding",
             param=search_params,
             expr=filter_expr,
-            limit=top_k,
-            output_fields=["document_id", "page_number", "text", "person_names",
-                          "location_names", "organization_names", "date_entities", "file_numbers", "other_entities"]
-        )
-        return results
+            limit=min(limit, MAX_QUERY_WINDOW),
+            output_fields=output_fields
+        ))
+
+        hit_lists = [
+            [
+                {"id": hit.id, "distance": self._to_distance(hit.distance),
+                 **{field: hit.entity.get(field) for field in output_fields}}
+                for hit in hits
+            ]
+            for hits in results
+        ]
+        for hits in hit_lists:
+            self._decode_rows(hits)
+
+        if self.rerank:
+            hit_lists = self._rerank_exact(query_embeddings, hit_lists, top_k)
+        return hit_lists
+
+    def _rerank_exact(self, query_embeddings: List[List[float]], hit_lists: List[List[Dict[str, Any]]],
+                      top_k: int) -> List[List[Dict[str, Any]]]:
+        """Replace approximate distances with exact ones (in the collection metric) and keep the best top_k"""
+        candidate_ids = list({hit["id"] for hits in hit_lists for hit in hits})
+        if not candidate_ids:
+            return hit_lists
+
+        vectors = {
+            row["id"]: np.asarray(row["embedding"], dtype=np.float32)
+            for row in self.query_by_ids(candidate_ids, output_fields=["id", "embedding"])
+        }
+
+        reranked = []
+        for query_embedding, hits in zip(query_embeddings, hit_lists):
+            query_vector = np.asarray(query_embedding, dtype=np.float32)
+            for hit in hits:
+                vector = vectors.get(hit["id"])
+                if vector is not None:
+                    hit["distance"] = self._exact_distance(query_vector, vector)
+            hits.sort(key=lambda hit: hit["distance"])
+            reranked.append(hits[:top_k])
+        return reranked
 
-    def query_all(self, output_fields: List[str] = None, limit: int = 16384):
-        """Query ALL chunks without any filters (for entity-based filtering in Python)"""
+    def _to_distance(self, score: float) -> float:
+        """Convert a Milvus score to a "lower is better" distance"""
+        if self.metric_type in SIMILARITY_METRICS:
+            return 1.0 - score
+        return score
+
+    def _exact_distance(self, query_vector: np.ndarray, vector: np.ndarray) -> float:
+        """Exact distance in the collection metric (same convention as _to_distance)"""
+        if self.metric_type == "L2":
+            return float(np.sum((vector - query_vector) ** 2))
+        score = float(np.dot(query_vector, vector))
+        if self.metric_type == "COSINE":
+            score /= float(np.linalg.norm(query_vector) * np.linalg.norm(vector)) or 1.0
+        return 1.0 - score
+
+    def iter_all(self, output_fields: List[str] = None, batch_size: int = None,
+                 expr: str = "id > 0") -> Iterator[List[Dict[str, Any]]]:
+        """
+        Stream chunks matching expr in batches using a Milvus query iterator.
+
+        Yields lists of at most batch_size rows with only output_fields projected,
+        so callers can walk the whole collection (past the 16,384-row query
+        window) in constant memory. The iterator holds one pooled connection until
+        it is exhausted or closed.
+        """
         if not self.collection:
             raise Exception("Collection not initialized")
 
-        self.collection.load()
+        self._ensure_loaded()
 
         if output_fields is None:
-            output_fields = ["id", "document_id", "page_number", "text", "person_names",
-                           "location_names", "organization_names", "date_entities", "file_numbers", "other_entities"]
-
-        # Query all chunks (Milvus limit is 16384 per query)
-        results = self.collection.query(
-            expr="id > 0",  # Match all records
-            output_fields=output_fields,
-            limit=limit
-        )
+            output_fields = DEFAULT_OUTPUT_FIELDS
+
+        with self.pool.checkout() as alias:
+            iterator = self._collection_on(alias).query_iterator(
+                batch_size=batch_size or self.query_batch_size,
+                expr=expr,
+                output_fields=output_fields
+            )
+            try:
+                while True:
+                    batch = iterator.next()
+                    if not batch:
+                        break
+                    yield self._decode_rows(batch)
+            finally:
+                iterator.close()
+
+    def query_all(self, output_fields: List[str] = None, limit: int = None):
+        """Query ALL chunks without any filters (materialized; prefer iter_all for large collections)"""
+        results = []
+        for batch in self.iter_all(output_fields=output_fields):
+            results.extend(batch)
+            if limit is not None and len(results) >= limit:
+                return results[:limit]
         return results
+
+    def query_by_ids(self, ids: List[int], output_fields: List[str] = None):
+        """Fetch specific chunks by primary key (one query per MAX_QUERY_WINDOW ids)"""
+        if not self.collection:
+            raise Exception("Collection not initialized")
+
+        if not ids:
+            return []
+
+        self._ensure_loaded()
+
+        if output_fields is None:
+            output_fields = DEFAULT_OUTPUT_FIELDS
+
+        results = []
+        for start in range(0, len(ids), MAX_QUERY_WINDOW):
+            window = ids[start:start + MAX_QUERY_WINDOW]
+            id_list = ", ".join(str(int(chunk_id)) for chunk_id in window)
+            results.extend(self._with_connection(lambda collection: collection.query(
+                expr=f"id in [{id_list}]",
+                output_fields=output_fields,
+                limit=len(window)
+            )))
+        return self._decode_rows(results)
+
+    def migrate_schema(self, batch_size: int = 1000, keep_backup: bool = True) -> int:
+        """
+        Rewrite the collection in the configured layout: schema v2 (ARRAY entities)
+        and, if enabled, document_id as partition key.
+
+        Copies every chunk into a new collection with the same index settings,
+        checks the row count, then swaps it in under the original name. The old
+        collection is kept as <name>_backup unless keep_backup is False.
+        Chunk ids are reassigned, so run it with the services stopped. The entity
+        index is rebuilt from the new ids on the next start; the BM25 and
+        document index logs (BM25_INDEX_PATH, DOCUMENT_INDEX_PATH) are keyed by
+        collection_fingerprint, which changes with the swap, so they are rebuilt
+        too (src.migrate_entity_schema also deletes them). Returns the number of
+        migrated chunks.
+        """
+        if not self.collection:
+            raise Exception("Collection not initialized")
+
+        if not self.needs_migration:
+            logger.info(f"Collection {self.collection_name} already uses the configured layout")
+            return 0
+
+        target_version = max(self.schema_version, self._configured_layout[0])
+        target_partition_key = self._configured_layout[1] or self.partition_key
+        embedding_field = next(field for field in self.collection.schema.fields if field.name == "embedding")
+        target_name = f"{self.collection_name}_migrating"
+        backup_name = f"{self.collection_name}_backup"
+        primary = self.pool.primary
+        if utility.has_collection(target_name, using=primary):
+            # Leftover from an interrupted migration
+            utility.drop_collection(target_name, using=primary)
+        if utility.has_collection(backup_name, using=primary):
+            raise Exception(f"Backup collection {backup_name} already exists; drop it before migrating")
+
+        target = self._new_collection(target_name, embedding_field.params["dim"], target_version, target_partition_key)
+        migrated = 0
+        for batch in self.iter_all(output_fields=INSERT_FIELDS, batch_size=batch_size):
+            target.insert(self._insert_data(batch, target_version))
+            migrated += len(batch)
+            logger.info(f"Migrated {migrated} chunks")
+        target.flush()
+        target.create_index(field_name="embedding", index_params=self._index_spec())
+
+        if target.num_entities != self.collection.num_entities:
+            raise Exception(f"Migration copied {target.num_entities} of {self.collection.num_entities} chunks; "
+                            f"{self.collection_name} left unchanged")
+
+        self.collection.release()
+        self._loaded = False
+        utility.rename_collection(self.collection_name, backup_name, using=primary)
+        utility.rename_collection(target_name, self.collection_name, using=primary)
+        if not keep_backup:
+            utility.drop_collection(backup_name, using=primary)
+
+        self.collection = Collection(self.collection_name, using=primary)
+        self._collections = {}
+        self._sync_schema_layout()
+        self._sync_index_config()
+        self.load_collection(force=True)
+        logger.info(f"Migrated {migrated} chunks of {self.collection_name} to schema v{self.schema_version}"
+                   f"{' with document_id partition key' if self.partition_key else ''}")
+        return migrated
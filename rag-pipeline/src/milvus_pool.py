@@ -0,0 +1,162 @@
+from pymilvus import connections, utility
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+import itertools
+import logging
+import queue
+import random
+import threading
+import time
+from .metrics import stage
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Distinguishes the aliases of pools created in the same process (e.g. one per
+# MilvusClient configuration), since pymilvus aliases are process-global
+_pool_ids = itertools.count()
+
+
+class ConnectionPoolExhaustedError(Exception):
+    """Raised when no pooled Milvus connection becomes free within the checkout timeout"""
+
+
+class MilvusConnectionPool:
+    """
+    Fixed set of named Milvus connections, checked out per request.
+
+    Every alias is its own gRPC channel, so concurrent requests (parallel
+    scenarios, several endpoint workers) no longer serialize on the single
+    "default" connection, and a broken channel only affects the request holding
+    it. A connection idle for longer than health_check_interval is pinged before
+    it is handed out; one that fails the ping is re-established with exponential
+    backoff (base * 2^attempt, capped at backoff_max, with jitter).
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: str,
+        size: int = 8,
+        checkout_timeout: float = 30.0,
+        health_check_interval: float = 30.0,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 10.0
+    ):
+        if size < 1:
+            raise ValueError(f"Connection pool size must be at least 1, got {size}")
+
+        self.host = host
+        self.port = port
+        self.size = size
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        pool_id = next(_pool_ids)
+        self.aliases: List[str] = [f"documind-{pool_id}-{i}" for i in range(size)]
+        # LIFO: the most recently used (known good, warm) connection is reused first
+        self._idle: "queue.LifoQueue[str]" = queue.LifoQueue()
+        self._last_ok: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._reconnects = 0
+        self._failed_health_checks = 0
+
+    @property
+    def primary(self) -> str:
+        """Alias for administrative calls (collection setup, load, migration); shared, not checked out"""
+        return self.aliases[0]
+
+    def connect(self):
+        """Open every connection (with backoff, so startup tolerates Milvus still coming up)"""
+        for alias in self.aliases:
+            self._connect(alias)
+            self._idle.put(alias)
+        logger.info(f"Connected to Milvus at {self.host}:{self.port} ({self.size} pooled connections)")
+
+    def close(self):
+        """Disconnect every alias"""
+        for alias in self.aliases:
+            try:
+                connections.disconnect(alias)
+            except Exception as e:
+                logger.warning(f"Error disconnecting {alias}: {e}")
+
+    @contextmanager
+    def checkout(self) -> Iterator[str]:
+        """Hold a healthy connection alias for the duration of the block"""
+        try:
+            with stage("milvus.checkout"):
+                alias = self._idle.get(timeout=self.checkout_timeout)
+        except queue.Empty:
+            with self._lock:
+                self._timeouts += 1
+            raise ConnectionPoolExhaustedError(
+                f"No Milvus connection free after {self.checkout_timeout}s ({self.size} in use)"
+            )
+
+        try:
+            with self._lock:
+                self._checkouts += 1
+            if time.monotonic() - self._last_ok.get(alias, 0.0) > self.health_check_interval:
+                if not self.is_healthy(alias):
+                    self.reconnect(alias)
+            yield alias
+            self._last_ok[alias] = time.monotonic()
+        finally:
+            self._idle.put(alias)
+
+    def is_healthy(self, alias: str) -> bool:
+        """Cheap round trip on the connection"""
+        try:
+            utility.get_server_version(using=alias)
+        except Exception as e:
+            with self._lock:
+                self._failed_health_checks += 1
+            logger.warning(f"Milvus connection {alias} failed its health check: {e}")
+            return False
+        self._last_ok[alias] = time.monotonic()
+        return True
+
+    def reconnect(self, alias: str):
+        """Drop and re-open a connection (the caller holds it checked out)"""
+        with self._lock:
+            self._reconnects += 1
+        try:
+            connections.disconnect(alias)
+        except Exception as e:
+            logger.warning(f"Error disconnecting {alias}: {e}")
+        self._connect(alias)
+
+    def _connect(self, alias: str):
+        for attempt in range(self.max_retries + 1):
+            try:
+                connections.connect(alias, host=self.host, port=self.port)
+                self._last_ok[alias] = time.monotonic()
+                if attempt:
+                    logger.info(f"Milvus connection {alias} established after {attempt} retries")
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logger.error(f"Failed to connect {alias} to Milvus at {self.host}:{self.port}: {e}")
+                    raise
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+                logger.warning(f"Connecting {alias} to Milvus failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def get_stats(self) -> Dict[str, Any]:
+        idle = self._idle.qsize()
+        with self._lock:
+            return {
+                "size": self.size,
+                "idle": idle,
+                "in_use": self.size - idle,
+                "checkouts": self._checkouts,
+                "checkout_timeouts": self._timeouts,
+                "failed_health_checks": self._failed_health_checks,
+                "reconnects": self._reconnects
+            }
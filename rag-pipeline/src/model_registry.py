@@ -0,0 +1,99 @@
+from typing import Any, Callable, Dict, Hashable
+import logging
+import os
+import threading
+from .milvus_client import MilvusClient
+from .local_vector_store import LocalVectorStore
+from .entity_extractor import EntityExtractor
+from .embedding_backends import EmbeddingBackend, create_embedding_backend, SENTENCE_TRANSFORMERS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MILVUS = "milvus"
+LOCAL = "local"
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of heavy shared objects.
+
+    Hands out one instance per key (model name / connection config), so the
+    ingestion and retrieval services share the same embedding model, spaCy
+    pipeline and vector store instead of loading each twice. Embedding models
+    are keyed by backend as well as model name. Different keys can load
+    concurrently; the same key is only ever loaded once.
+
+    Shared instances are safe to use from several threads: embedding inference
+    (PyTorch or ONNX Runtime) does not mutate the model, EntityExtractor
+    serializes spaCy calls internally, pymilvus calls are thread-safe and
+    LocalVectorStore locks around its arrays.
+    """
+
+    def __init__(self):
+        self._instances: Dict[Hashable, Any] = {}
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the instance for key, creating it with factory on first use"""
+        with self._lock:
+            if key in self._instances:
+                return self._instances[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if key in self._instances:
+                    return self._instances[key]
+
+            instance = factory()
+            with self._lock:
+                self._instances[key] = instance
+            return instance
+
+    def get_embedding_model(self, model_name: str, backend: str = SENTENCE_TRANSFORMERS,
+                            onnx_model_dir: str = "models/onnx") -> EmbeddingBackend:
+        return self.get_or_create(
+            ("embedding", backend, model_name),
+            lambda: create_embedding_backend(backend, model_name, onnx_model_dir)
+        )
+
+    def get_entity_extractor(self, model_name: str = "en_core_web_lg") -> EntityExtractor:
+        return self.get_or_create(("entity_extractor", model_name), lambda: EntityExtractor(model_name))
+
+    def get_milvus_client(self, host: str, port: str, options: Dict[str, Any] = None) -> MilvusClient:
+        """Connected client; options are extra MilvusClient keyword arguments (part of the key)"""
+        options = options or {}
+
+        def connect():
+            client = MilvusClient(host=host, port=port, **options)
+            client.connect()
+            return client
+        key = ("milvus", host, str(port), repr(sorted(options.items())))
+        return self.get_or_create(key, connect)
+
+    def get_vector_store(self, vector_store: str, host: str, port: str, options: Dict[str, Any] = None,
+                         local_store_path: str = "data/vector_store"):
+        """Milvus client or in-process LocalVectorStore, selected by VECTOR_STORE"""
+        if vector_store == MILVUS:
+            return self.get_milvus_client(host, port, options)
+        if vector_store == LOCAL:
+            metric_type = (options or {}).get("metric_type", "L2")
+
+            def open_store():
+                store = LocalVectorStore(path=local_store_path, metric_type=metric_type)
+                store.connect()
+                return store
+            return self.get_or_create(("local_store", os.path.abspath(local_store_path)), open_store)
+        raise ValueError(f"Unsupported vector store: {vector_store} (expected {MILVUS} or {LOCAL})")
+
+    def clear(self):
+        """Forget all instances (tests / reconfiguration)"""
+        with self._lock:
+            self._instances.clear()
+            self._key_locks.clear()
+
+
+# Global registry instance
+model_registry = ModelRegistry()
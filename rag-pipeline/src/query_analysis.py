@@ -0,0 +1,65 @@
+from typing import List, Dict, Any, Callable
+import threading
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace so trivially different spellings of a query share work"""
+    return " ".join(query.split())
+
+
+class QueryAnalysis:
+    """
+    Per-request analysis of a query, shared by every retrieval scenario.
+
+    Holds the normalized query, its embedding and its parsed entity lists. The
+    embedding and the spaCy pass are computed at most once, on first use, so a
+    scenario that never needs entities does not pay for NER. Batch retrieval
+    fills them in up front and may also attach prefetched semantic search
+    results (top_k -> chunks).
+    """
+
+    def __init__(
+        self,
+        query: str,
+        embed: Callable[[str], List[float]],
+        extract_entities: Callable[[str], Dict[str, List[str]]]
+    ):
+        self.query = query
+        self.normalized_query = normalize_query(query)
+        self._embed = embed
+        self._extract_entities = extract_entities
+        self._embedding = None
+        self._entities = None
+        self._embedding_lock = threading.Lock()
+        self._entities_lock = threading.Lock()
+        self.prefetched_search: Dict[int, List[Dict[str, Any]]] = {}
+
+    @property
+    def embedding(self) -> List[float]:
+        """Query embedding (computed once)"""
+        with self._embedding_lock:
+            if self._embedding is None:
+                self._embedding = self._embed(self.normalized_query)
+        return self._embedding
+
+    @property
+    def entities(self) -> Dict[str, List[str]]:
+        """Query entity lists keyed by entity field (computed once)"""
+        with self._entities_lock:
+            if self._entities is None:
+                self._entities = self._extract_entities(self.normalized_query)
+        return self._entities
+
+    def set_embedding(self, embedding: List[float]):
+        """Provide a precomputed embedding (batch retrieval)"""
+        with self._embedding_lock:
+            self._embedding = embedding
+
+    def set_entities(self, entities: Dict[str, List[str]]):
+        """Provide precomputed entity lists (batch retrieval)"""
+        with self._entities_lock:
+            self._entities = entities
+
+    @property
+    def has_entities(self) -> bool:
+        return any(self.entities.values())
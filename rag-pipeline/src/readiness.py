@@ -0,0 +1,53 @@
+from contextlib import contextmanager
+from typing import Any, Dict, List
+import logging
+import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class ReadinessTracker:
+    """Per-component startup state reported by the /ready endpoint"""
+
+    def __init__(self, components: List[str]):
+        self._lock = threading.Lock()
+        self._components: Dict[str, Dict[str, Any]] = {
+            name: {"state": PENDING, "error": None, "duration_seconds": None}
+            for name in components
+        }
+
+    @contextmanager
+    def track(self, name: str):
+        """Mark a component loading for the duration of the block, then ready or failed"""
+        self._set(name, state=LOADING)
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self._set(name, state=FAILED, error=str(e),
+                      duration_seconds=round(time.perf_counter() - start, 3))
+            logger.error(f"Startup component '{name}' failed: {e}")
+            raise
+        duration = round(time.perf_counter() - start, 3)
+        self._set(name, state=READY, duration_seconds=duration)
+        logger.info(f"Startup component '{name}' ready in {duration}s")
+
+    def _set(self, name: str, **fields):
+        with self._lock:
+            self._components.setdefault(name, {"state": PENDING, "error": None, "duration_seconds": None})
+            self._components[name].update(fields)
+
+    def is_ready(self) -> bool:
+        with self._lock:
+            return all(component["state"] == READY for component in self._components.values())
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: dict(component) for name, component in self._components.items()}
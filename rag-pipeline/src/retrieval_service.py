@@ -1,178 +1,521 @@
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import functools
+import heapq
+import inspect
 import logging
-from .milvus_client import MilvusClient
-from .entity_extractor import EntityExtractor
-import json
+from .model_registry import model_registry
+from .milvus_client import SEARCH_ID_FIELDS, document_filter_expression
+from .entity_index import EntityIndex, EntityMatcher, entity_filter_expression, parse_entity_lists
+from .bm25_index import BM25Index
+from .document_index import DocumentIndex
+from .query_analysis import QueryAnalysis, normalize_query
+from .cache import LRUCache, GenerationCounter
+from .metrics import stage, timed
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# How scenario 1 finds its chunks: a top-3 chunk search picks the documents, then a
+# document-filtered search ("two_pass"); the document centroid index picks them
+# ("routed"); or one over-fetched search grouped by document ("grouped")
+SCENARIO_1_MODES = ("two_pass", "routed", "grouped")
+
+
+def cached_retrieval(strategy: str):
+    """
+    Serve a retrieve* method from the result cache.
+
+    The key is (normalized query, strategy, bound call parameters, collection
+    generation); the `analysis` argument is not part of the key.
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, query: str, *args, **kwargs):
+            bound = signature.bind(self, query, *args, **kwargs)
+            bound.apply_defaults()
+            params = tuple(
+                (name, value) for name, value in bound.arguments.items()
+                if name not in ("self", "query", "analysis")
+            )
+            # Read the generation BEFORE computing, so a result that raced with an
+            # ingest is stored under the old generation and never served afterwards
+            cache_key = (normalize_query(query), strategy, params, self.generation.value)
+
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Result cache hit for {strategy} query")
+                return self._copy_result(cached)
+
+            result = method(self, query, *args, **kwargs)
+            self.result_cache.put(cache_key, self._copy_result(result))
+            return result
+        return wrapper
+    return decorator
+
 
 class RetrievalService:
     def __init__(
         self,
         milvus_host: str = "localhost",
         milvus_port: str = "19530",
-        embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+        embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
+        embedding_backend: str = "sentence-transformers",
+        onnx_model_dir: str = "models/onnx",
+        milvus_options: Optional[Dict[str, Any]] = None,
+        vector_store: str = "milvus",
+        local_store_path: str = "data/vector_store",
+        entity_index: Optional[EntityIndex] = None,
+        bm25_index: Optional[BM25Index] = None,
+        document_index: Optional[DocumentIndex] = None,
+        scenario_1_mode: str = "two_pass",
+        routing_documents: int = 3,
+        routing_entity_weight: float = 0.05,
+        grouped_search_window: int = 100,
+        rrf_k: int = 60,
+        parallel: bool = True,
+        max_workers: int = 8,
+        embedding_cache_size: int = 1024,
+        embedding_cache_ttl: Optional[float] = 3600,
+        result_cache_size: int = 256,
+        result_cache_ttl: Optional[float] = None,
+        payload_cache_size: int = 4096,
+        generation: Optional[GenerationCounter] = None
     ):
-        """Initialize retrieval service"""
-        # Initialize embedding model
-        logger.info(f"Loading embedding model: {embedding_model}")
-        self.embedding_model = SentenceTransformer(embedding_model)
-
-        # Initialize Milvus client
-        self.milvus_client = MilvusClient(host=milvus_host, port=milvus_port)
-        self.milvus_client.connect()
+        """
+        Initialize retrieval service
+
+        embedding_backend: "sentence-transformers" (float PyTorch) or "onnx-int8"
+        (quantized ONNX Runtime, exported to onnx_model_dir on first use)
+        milvus_options: extra MilvusClient settings (index type, re-ranking, ...)
+        vector_store: "milvus" (server) or "local" (in-process store persisted to
+        local_store_path, no external services)
+
+        entity_index: shared inverted entity index used by entity_based_search; it is
+        built from Milvus here if empty. When None, entity search scans the collection.
+        bm25_index: shared BM25 index for lexical_search / retrieve_fusion; loaded from
+        disk (or rebuilt from the vector store) here if empty
+        document_index: shared per-document centroid index used to route scenario 1;
+        loaded from disk (or rebuilt from the vector store) here if empty
+        scenario_1_mode: "two_pass" (top-3 chunk search picks the documents), "routed"
+        (the routing_documents best documents from document_index, no first search) or
+        "grouped" (one grouped_search_window-hit search, grouped by document client-side)
+        routing_entity_weight: largest distance bonus document entity matches get when routing
+        rrf_k: reciprocal rank fusion constant (score = sum of 1 / (rrf_k + rank))
+        parallel: run independent scenarios and Milvus requests concurrently
+        max_workers: threads per pool (one pool for scenarios, one for Milvus calls)
+        embedding_cache_size / embedding_cache_ttl: query embedding LRU cache bounds (size 0 disables)
+        result_cache_size / result_cache_ttl: retrieval result cache bounds (size 0 disables)
+        payload_cache_size: chunk payload (text + entities) LRU cache in front of the
+        hydration query; chunk ids are never reused, so entries need no invalidation
+        generation: collection generation counter shared with the ingestion service;
+        cached results are only served for the generation they were computed at
+        """
+        # Embedding model (shared with the ingestion service via the model registry)
+        # The cache key name includes the backend: int8 and float vectors differ slightly
+        self.embedding_model_name = f"{embedding_backend}:{embedding_model}"
+        self.embedding_model = model_registry.get_embedding_model(embedding_model, embedding_backend, onnx_model_dir)
+
+        # Query embedding cache keyed by (model name, normalized query)
+        self.embedding_cache = LRUCache(max_size=embedding_cache_size, ttl_seconds=embedding_cache_ttl)
+
+        # Full retrieval result cache, invalidated by the collection generation
+        self.generation = generation or GenerationCounter()
+        self.result_cache = LRUCache(max_size=result_cache_size, ttl_seconds=result_cache_ttl)
+
+        # Chunk payloads by id for two-phase retrieval (searches return ids, finals are hydrated)
+        self.payload_cache = LRUCache(max_size=payload_cache_size)
+
+        # Milvus client or local vector store (shared)
+        self.milvus_client = model_registry.get_vector_store(
+            vector_store, milvus_host, milvus_port, milvus_options, local_store_path
+        )
         self.milvus_client.create_collection(
             embedding_dim=self.embedding_model.get_sentence_embedding_dimension()
         )
+        # Load once at startup; requests never re-issue the load
+        self.milvus_client.load_collection()
+
+        # Entity extractor (shared)
+        self.entity_extractor = model_registry.get_entity_extractor()
+
+        # Build the inverted entity index from existing chunks
+        self.entity_index = entity_index
+        if self.entity_index is not None and not self.entity_index.is_built:
+            self.entity_index.build(self.milvus_client)
+
+        # Load or build the BM25 index
+        self.bm25_index = bm25_index
+        self.rrf_k = rrf_k
+        if self.bm25_index is not None and not self.bm25_index.is_built:
+            self.bm25_index.build(self.milvus_client)
+
+        # Document routing for scenario 1
+        if scenario_1_mode not in SCENARIO_1_MODES:
+            raise ValueError(f"Unsupported scenario 1 mode: {scenario_1_mode} (expected one of {SCENARIO_1_MODES})")
+        if scenario_1_mode == "routed" and document_index is None:
+            raise ValueError("Routed scenario 1 needs a document index")
+        self.scenario_1_mode = scenario_1_mode
+        self.routing_documents = routing_documents
+        self.routing_entity_weight = routing_entity_weight
+        self.grouped_search_window = grouped_search_window
+        self.document_index = document_index
+        if self.document_index is not None and not self.document_index.is_built:
+            self.document_index.build(self.milvus_client)
+
+        # Thread pools for concurrent execution. Scenarios and the Milvus calls they
+        # fan out use separate pools so nested submissions can never deadlock.
+        self.parallel = parallel
+        self._scenario_executor = None
+        self._io_executor = None
+        if parallel:
+            self._scenario_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="retrieval-scenario")
+            self._io_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="retrieval-io")
+
+    def _run_concurrently(self, *calls, executor: ThreadPoolExecutor = None) -> List[Any]:
+        """
+        Run independent zero-argument calls and return their results in order.
+
+        The first call runs on the current thread and the rest on the executor
+        (the Milvus I/O pool by default), each in a copy of the current context so
+        stage timings reach the request; everything runs sequentially when
+        parallel mode is off.
+        """
+        executor = executor or self._io_executor
+        if executor is None:
+            return [call() for call in calls]
 
-        # Initialize entity extractor
-        self.entity_extractor = EntityExtractor()
+        futures = [executor.submit(contextvars.copy_context().run, call) for call in calls[1:]]
+        first = calls[0]()
+        return [first] + [future.result() for future in futures]
 
     def generate_embedding(self, text: str) -> List[float]:
-        """Generate embedding for a single text"""
-        embedding = self.embedding_model.encode(text, convert_to_numpy=True)
-        return embedding.tolist()
+        """Generate embedding for a single text (served from the query embedding cache when possible)"""
+        cache_key = (self.embedding_model_name, normalize_query(text))
+        cached = self.embedding_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
+        with stage("query.embedding"):
+            embedding = self.embedding_model.encode(text, convert_to_numpy=True).tolist()
+        self.embedding_cache.put(cache_key, tuple(embedding))
+        return embedding
+
+    def warmup(self):
+        """
+        Pay one-time costs before serving traffic: first embedding forward pass,
+        first spaCy pass, Milvus collection load and a first vector search.
+        Caches are bypassed so warmup leaves no entries behind.
+        """
+        logger.info("Warmup: embedding model")
+        embedding = self.embedding_model.encode("warmup query", convert_to_numpy=True).tolist()
 
-    def semantic_search(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
-        """Direct semantic search"""
-        query_embedding = self.generate_embedding(query)
-        results = self.milvus_client.search(query_embedding, top_k=top_k)
+        logger.info("Warmup: entity extractor")
+        self.entity_extractor.extract_entities("John Smith signed with Acme Corporation in Dallas on June 1, 2022.")
 
-        chunks = []
-        for hits in results:
-            for hit in hits:
-                chunks.append({
-                    "id": hit.id,
-                    "distance": hit.distance,
-                    "document_id": hit.document_id,
-                    "page_number": hit.page_number,
-                    "text": hit.text,
-                    "person_names": json.loads(hit.person_names),
-                    "location_names": json.loads(hit.location_names),
-                    "organization_names": json.loads(hit.organization_names),
-                    "date_entities": json.loads(hit.date_entities),
-                    "other_entities": json.loads(hit.other_entities)
-                })
-        return chunks
-
-    def entity_based_search(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
+        logger.info("Warmup: Milvus load + search")
+        self.milvus_client.load_collection()
+        self.milvus_client.search(embedding, top_k=1)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the retrieval caches"""
+        return {
+            "embedding_cache": self.embedding_cache.get_stats(),
+            "result_cache": self.result_cache.get_stats(),
+            "payload_cache": self.payload_cache.get_stats(),
+            "collection_generation": self.generation.value
+        }
+
+    @staticmethod
+    def _copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy a result and its chunk dicts so callers cannot mutate cached entries"""
+        copied = dict(result)
+        copied["chunks"] = [dict(chunk) for chunk in result["chunks"]]
+        return copied
+
+    def extract_query_entities(self, text: str) -> Dict[str, List[str]]:
+        """Run NER on a query and return parsed entity lists"""
+        with stage("query.ner"):
+            entities = parse_entity_lists(self.entity_extractor.extract_entities(text))
+        self._log_query_entities(entities)
+        return entities
+
+    @staticmethod
+    def _log_query_entities(entities: Dict[str, List[str]]):
+        logger.info(f"Extracted entities from query: persons={entities['person_names']}, "
+                   f"locations={entities['location_names']}, orgs={entities['organization_names']}, "
+                   f"dates={entities['date_entities']}, files={entities['file_numbers']}, "
+                   f"others={entities['other_entities']}")
+
+    def analyze_query(self, query: str) -> QueryAnalysis:
+        """Create the per-request analysis (embedding + entities) shared by all scenarios"""
+        return QueryAnalysis(query, self.generate_embedding, self.extract_query_entities)
+
+    def analyze_queries(self, queries: List[str]) -> List[QueryAnalysis]:
+        """
+        Analyze many queries at once.
+
+        Embeddings missing from the cache are computed in one encode call and
+        entities in one nlp.pipe pass, then attached to each QueryAnalysis.
+        """
+        analyses = [self.analyze_query(query) for query in queries]
+        if not analyses:
+            return analyses
+
+        # Embeddings: one forward pass for every cache miss
+        pending = []
+        for analysis in analyses:
+            cached = self.embedding_cache.get((self.embedding_model_name, analysis.normalized_query))
+            if cached is not None:
+                analysis.set_embedding(list(cached))
+            else:
+                pending.append(analysis)
+
+        if pending:
+            with stage("query.embedding_batch"):
+                embeddings = self.embedding_model.encode(
+                    [analysis.normalized_query for analysis in pending], convert_to_numpy=True
+                ).tolist()
+            for analysis, embedding in zip(pending, embeddings):
+                self.embedding_cache.put((self.embedding_model_name, analysis.normalized_query), tuple(embedding))
+                analysis.set_embedding(embedding)
+
+        # Entities: one spaCy pipe over all queries
+        with stage("query.ner_batch"):
+            batch_entities = self.entity_extractor.extract_entities_batch(
+                [analysis.normalized_query for analysis in analyses]
+            )
+        for analysis, entities in zip(analyses, batch_entities):
+            parsed = parse_entity_lists(entities)
+            self._log_query_entities(parsed)
+            analysis.set_entities(parsed)
+
+        return analyses
+
+    def prefetch_semantic_search(self, analyses: List[QueryAnalysis], top_k: int = 3):
+        """Run the unfiltered semantic search for many queries in one multi-vector Milvus request"""
+        if not analyses:
+            return
+
+        embeddings = [analysis.embedding for analysis in analyses]
+        with stage("semantic_search_batch"):
+            results = self.milvus_client.search_batch(embeddings, top_k=top_k, output_fields=SEARCH_ID_FIELDS)
+        for analysis, hits in zip(analyses, results):
+            analysis.prefetched_search[top_k] = [self._light_chunk(hit) for hit in hits]
+
+    @staticmethod
+    def _light_chunk(hit, source: str = None) -> Dict[str, Any]:
+        """Ranking-only chunk from an id search hit (hydrated later by _hydrate_chunks)"""
+        chunk = {"id": hit["id"], "distance": hit["distance"], "document_id": hit["document_id"]}
+        if source:
+            chunk["source"] = source
+        return chunk
+
+    @staticmethod
+    def _hit_to_chunk(hit, source: str = None) -> Dict[str, Any]:
+        """Convert a Milvus search hit into a result chunk"""
+        chunk = {
+            "id": hit["id"],
+            "distance": hit["distance"],
+            "document_id": hit["document_id"],
+            "page_number": hit["page_number"],
+            "text": hit["text"],
+            "person_names": hit["person_names"],
+            "location_names": hit["location_names"],
+            "organization_names": hit["organization_names"],
+            "date_entities": hit["date_entities"],
+            "other_entities": hit["other_entities"]
+        }
+        if source:
+            chunk["source"] = source
+        return chunk
+
+    def semantic_search(self, query: str, top_k: int = 3, analysis: QueryAnalysis = None) -> List[Dict[str, Any]]:
+        """Direct semantic search (reuses batch-prefetched results when available)"""
+        analysis = analysis or self.analyze_query(query)
+        return self._hydrate_chunks(self._semantic_hits(analysis, top_k))
+
+    def _semantic_hits(self, analysis: QueryAnalysis, top_k: int) -> List[Dict[str, Any]]:
+        """Unfiltered vector search returning ranking-only chunks (id, distance, document_id)"""
+        if top_k in analysis.prefetched_search:
+            return [dict(chunk) for chunk in analysis.prefetched_search[top_k]]
+
+        with stage("semantic_search"):
+            results = self.milvus_client.search(analysis.embedding, top_k=top_k, output_fields=SEARCH_ID_FIELDS)
+        return [self._light_chunk(hit) for hits in results for hit in hits]
+
+    @timed("entity_search")
+    def entity_based_search(self, query: str, top_k: int = 3, analysis: QueryAnalysis = None) -> List[Dict[str, Any]]:
         """
         PURE Entity-based search (NO semantic search at this stage!)
 
         Step 1: Extract entities from query
-        Step 2: Get ALL chunks from Milvus
-        Step 3: Filter chunks by entity match in Python
-        Step 4: Sort by entity match count (no semantic distance)
-        Step 5: Return top_k chunks
+        Step 2: Score chunks by entity match (inverted entity index; if disabled, Milvus
+                array filters or a full scan)
+        Step 3: Sort by entity match count (no semantic distance)
+        Step 4: Fetch and return only the top_k chunks
         """
-        # Extract entities from query
-        query_entities = self.entity_extractor.extract_entities(query)
-
-        person_names = json.loads(query_entities["person_names"])
-        location_names = json.loads(query_entities["location_names"])
-        organization_names = json.loads(query_entities["organization_names"])
-        date_entities = json.loads(query_entities["date_entities"])
-        file_numbers = json.loads(query_entities["file_numbers"])
-        other_entities = json.loads(query_entities["other_entities"])
-
-        logger.info(f"Extracted entities from query: persons={person_names}, "
-                   f"locations={location_names}, orgs={organization_names}, "
-                   f"dates={date_entities}, files={file_numbers}, others={other_entities}")
+        # Extract entities from query (reused from the request analysis when available)
+        analysis = analysis or self.analyze_query(query)
+        query_entities = analysis.entities
 
         # If no entities found, return empty
-        if not (person_names or location_names or organization_names or date_entities or file_numbers or other_entities):
+        if not analysis.has_entities:
             logger.info("No entities found in query, returning empty results")
             return []
 
-        # Get ALL chunks from Milvus (NO semantic search!)
-        all_chunks = self.milvus_client.query_all()
-        logger.info(f"Retrieved {len(all_chunks)} total chunks for entity filtering")
-
-        # Filter ALL chunks based on entity matches and COUNT how many entities match
-        matched_chunks = []
-        for chunk in all_chunks:
-                chunk_person_names = json.loads(chunk["person_names"])
-                chunk_location_names = json.loads(chunk["location_names"])
-                chunk_org_names = json.loads(chunk["organization_names"])
-                chunk_date_entities = json.loads(chunk["date_entities"])
-                chunk_file_numbers = json.loads(chunk["file_numbers"])
-                chunk_other_entities = json.loads(chunk["other_entities"])
-
-                # COUNT how many query entities match this chunk
-                entity_match_count = 0
-
-                # Check file numbers FIRST (highest priority - exact match)
-                for query_file in file_numbers:
-                    for chunk_file in chunk_file_numbers:
-                        if query_file == chunk_file:  # Exact match for file numbers
-                            entity_match_count += 10  # Weight file number matches heavily!
-                            break
-
-                # Check person names
-                for query_person in person_names:
-                    clean_query = query_person.split('(')[0].strip()
-                    for chunk_person in chunk_person_names:
-                        if clean_query in chunk_person or chunk_person in clean_query:
-                            entity_match_count += 1
-                            break
-
-                # Check locations
-                for query_loc in location_names:
-                    clean_query = query_loc.split('(')[0].strip()
-                    for chunk_loc in chunk_location_names:
-                        if clean_query in chunk_loc or chunk_loc in clean_query:
-                            entity_match_count += 1
-                            break
-
-                # Check organizations
-                for query_org in organization_names:
-                    clean_query = query_org.split('(')[0].strip()
-                    for chunk_org in chunk_org_names:
-                        if clean_query in chunk_org or chunk_org in clean_query:
-                            entity_match_count += 1
-                            break
-
-                # Check dates
-                for query_date in date_entities:
-                    for chunk_date in chunk_date_entities:
-                        if query_date in chunk_date or chunk_date in query_date:
-                            entity_match_count += 1
-                            break
-
-                # Check other entities
-                for query_other in other_entities:
-                    for chunk_other in chunk_other_entities:
-                        if query_other in chunk_other or chunk_other in query_other:
-                            entity_match_count += 1
-                            break
-
-                # Only add chunks that have at least 1 entity match
-                if entity_match_count > 0:
-                    matched_chunks.append({
-                        "id": chunk["id"],
-                        "distance": 0.0,  # No semantic distance in pure entity search
-                        "document_id": chunk["document_id"],
-                        "page_number": chunk["page_number"],
-                        "text": chunk["text"],
-                        "person_names": chunk_person_names,
-                        "location_names": chunk_location_names,
-                        "organization_names": chunk_org_names,
-                        "date_entities": chunk_date_entities,
-                        "file_numbers": chunk_file_numbers,
-                        "other_entities": chunk_other_entities,
-                        "entity_match_count": entity_match_count
-                    })
+        return self._hydrate_chunks(self._find_entity_matches(query_entities, top_k))
+
+    def _find_entity_matches(self, query_entities: Dict[str, List[str]], top_k: int) -> List[Dict[str, Any]]:
+        """
+        Rank chunks by entity match count and return the top_k matches.
+
+        With the entity index, matches only carry id/distance/document_id/entity_match_count
+        (see _hydrate_chunks). Without it, collections with ARRAY entity
+        columns are filtered server-side with array_contains_any (exact entity
+        values only) and older collections are fully scanned; both return complete chunks.
+        """
+        if self.entity_index is None:
+            if self.milvus_client.supports_array_filters:
+                expr = entity_filter_expression(query_entities)
+                if expr is None:
+                    return []
+                with stage("entity.array_filter_scan"):
+                    return self._entity_scan_search(query_entities, top_k, expr=expr)
+            with stage("entity.scan"):
+                return self._entity_scan_search(query_entities, top_k)
+
+        with stage("entity.index_match"):
+            scores = self.entity_index.match(query_entities)
+        logger.info(f"Found {len(scores)} entity-matched chunks in entity index")
 
         # Sort ONLY by entity match count (descending) - NO semantic distance!
-        matched_chunks.sort(key=lambda x: -x["entity_match_count"])
+        top_ids = sorted(scores, key=lambda chunk_id: (-scores[chunk_id], chunk_id))[:top_k]
+        return [
+            {
+                "id": chunk_id,
+                "distance": 0.0,  # No semantic distance in pure entity search
+                "document_id": self.entity_index.document_id(chunk_id),
+                "entity_match_count": scores[chunk_id]
+            }
+            for chunk_id in top_ids
+        ]
+
+    def _fetch_payloads(self, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Chunk rows by id: payload cache hits, plus one batched id query for the misses"""
+        payloads = {}
+        missing_ids = []
+        for chunk_id in dict.fromkeys(ids):
+            row = self.payload_cache.get(chunk_id)
+            if row is None:
+                missing_ids.append(chunk_id)
+            else:
+                payloads[chunk_id] = row
+
+        if missing_ids:
+            with stage("chunk.hydrate"):
+                rows = self.milvus_client.query_by_ids(missing_ids)
+            for row in rows:
+                self.payload_cache.put(row["id"], row)
+                payloads[row["id"]] = row
+        return payloads
+
+    def _hydrate_chunks(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Second phase of two-phase retrieval: add text and entities to ranked chunks.
+
+        Searches and entity matches only carry ids and ranking fields, so Milvus
+        never ships text for candidates that are discarded; the chunks that
+        survive are completed here in one batched lookup. Entity matches become
+        entity results, other chunks keep their distance, and extra keys (source,
+        scores) are preserved. Chunks that already have text pass through, and
+        chunks deleted since they were ranked are dropped.
+        """
+        payloads = self._fetch_payloads([chunk["id"] for chunk in chunks if "text" not in chunk])
+        hydrated = []
+        for chunk in chunks:
+            if "text" in chunk:
+                hydrated.append(chunk)
+                continue
+            row = payloads.get(chunk["id"])
+            if row is None:
+                continue
+            if "entity_match_count" in chunk:
+                full_chunk = self._entity_chunk(row, chunk["entity_match_count"])
+            else:
+                full_chunk = self._hit_to_chunk({**row, "distance": chunk["distance"]})
+            full_chunk.update((key, value) for key, value in chunk.items() if key not in full_chunk)
+            hydrated.append(full_chunk)
+        return hydrated
+
+    def _entity_scan_search(self, query_entities: Dict[str, List[str]], top_k: int,
+                            expr: str = "id > 0") -> List[Dict[str, Any]]:
+        """
+        Score chunks matching expr in Python (used when the entity index is disabled).
 
-        logger.info(f"Found {len(matched_chunks)} entity-matched chunks")
-        return matched_chunks[:top_k]
+        Streams the chunks batch by batch and keeps only the best top_k matches
+        in a heap, so memory stays constant regardless of collection size. expr
+        defaults to the whole collection; an array_contains_any filter lets Milvus
+        return only the chunks that can match.
+        """
+        # Stream the candidate chunks from Milvus (NO semantic search!)
+        matcher = EntityMatcher(query_entities)
+        top_matches = []  # min-heap of (entity_match_count, -scan_position, chunk)
+        scanned = 0
+        matched = 0
+        for batch in self.milvus_client.iter_all(expr=expr):
+            for chunk in batch:
+                scanned += 1
+                chunk_entities = parse_entity_lists(chunk)
+                entity_match_count = matcher.score(chunk_entities)
+
+                # Only keep chunks that have at least 1 entity match
+                if entity_match_count == 0:
+                    continue
+                matched += 1
+
+                # Ties keep scan order (-scanned is unique, so dicts are never compared)
+                entry = (entity_match_count, -scanned, chunk, chunk_entities)
+                if len(top_matches) < top_k:
+                    heapq.heappush(top_matches, entry)
+                elif entry[:2] > top_matches[0][:2]:
+                    heapq.heapreplace(top_matches, entry)
+
+        logger.info(f"Scanned {scanned} chunks, found {matched} entity-matched chunks")
 
-    def retrieve(self, query: str, min_chunks: int = 3, max_chunks: int = 6) -> Dict[str, Any]:
+        # Sort ONLY by entity match count (descending) - NO semantic distance!
+        ranked = sorted(top_matches, key=lambda entry: entry[:2], reverse=True)
+        return [
+            self._entity_chunk(chunk, entity_match_count, chunk_entities)
+            for entity_match_count, _, chunk, chunk_entities in ranked
+        ]
+
+    @staticmethod
+    def _entity_chunk(row: Dict[str, Any], entity_match_count: int,
+                      chunk_entities: Dict[str, List[str]] = None) -> Dict[str, Any]:
+        """Build an entity search result from a Milvus row"""
+        if chunk_entities is None:
+            chunk_entities = parse_entity_lists(row)
+        return {
+            "id": row["id"],
+            "distance": 0.0,  # No semantic distance in pure entity search
+            "document_id": row["document_id"],
+            "page_number": row["page_number"],
+            "text": row["text"],
+            "person_names": chunk_entities["person_names"],
+            "location_names": chunk_entities["location_names"],
+            "organization_names": chunk_entities["organization_names"],
+            "date_entities": chunk_entities["date_entities"],
+            "file_numbers": chunk_entities["file_numbers"],
+            "other_entities": chunk_entities["other_entities"],
+            "entity_match_count": entity_match_count
+        }
+
+    @cached_retrieval("basic")
+    def retrieve(self, query: str, min_chunks: int = 3, max_chunks: int = 6, analysis: QueryAnalysis = None) -> Dict[str, Any]:
         """
         Retrieve chunks using hybrid approach:
         1. Direct semantic search (top 3)
@@ -180,13 +523,16 @@ class RetrievalService:
         3. Combine and deduplicate (min 3, max 6)
         """
         logger.info(f"Processing query: {query}")
-
-        # 1. Direct semantic search
-        semantic_chunks = self.semantic_search(query, top_k=3)
+        analysis = analysis or self.analyze_query(query)
+
+        # 1. Direct semantic search + 2. Entity-based search (independent, run concurrently;
+        # ranking fields only, the final chunks are hydrated once below)
+        semantic_chunks, entity_chunks = self._run_concurrently(
+            lambda: self._semantic_hits(analysis, top_k=3),
+            lambda: self._find_entity_matches(analysis.entities, top_k=3) if analysis.has_entities else [],
+            executor=self._scenario_executor
+        )
         logger.info(f"Found {len(semantic_chunks)} chunks from semantic search")
-
-        # 2. Entity-based search
-        entity_chunks = self.entity_based_search(query, top_k=3)
         logger.info(f"Found {len(entity_chunks)} chunks from entity-based search")
 
         # 3. Combine and deduplicate
@@ -213,7 +559,7 @@ class RetrievalService:
         if total_chunks < min_chunks:
             logger.warning(f"Only found {total_chunks} chunks, less than minimum {min_chunks}")
 
-        final_chunks = combined_chunks[:max_chunks]
+        final_chunks = self._hydrate_chunks(combined_chunks[:max_chunks])
 
         logger.info(f"Returning {len(final_chunks)} chunks after deduplication")
 
@@ -225,63 +571,104 @@ class RetrievalService:
             "chunks": final_chunks
         }
 
-    def retrieve_scenario_1(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    @timed("scenario_1")
+    def retrieve_scenario_1(self, query: str, top_k: int = 5, analysis: QueryAnalysis = None,
+                            hydrate: bool = True) -> List[Dict[str, Any]]:
         """
         Scenario 1: Direct Semantic with Document Expansion
         1. Do semantic search on ALL documents → Get top 3
         2. Extract document_ids from those 3 chunks
         3. Do semantic search ONLY within those document_ids → Get top 5
         4. Return top 5 chunks (original 3 will be in top 5 anyway)
-        """
-        logger.info(f"Scenario 1 (Direct Semantic): Step 1 - Semantic search on ALL documents")
 
-        # Step 1: Get top 3 from ALL documents
-        initial_chunks = self.semantic_search(query, top_k=3)
+        In "routed" mode steps 1-2 are replaced by the document centroid index
+        (closest document centroids, entity-matching documents first), so the
+        filtered search is the only Milvus round trip.
 
-        # Step 2: Extract document_ids
-        document_ids = list(set([chunk["document_id"] for chunk in initial_chunks]))
-        logger.info(f"Scenario 1: Found {len(document_ids)} documents from initial search")
+        In "grouped" mode one unfiltered search over-fetches grouped_search_window
+        hits: the documents of the first 3 hits are the candidates, and their
+        hits in the window, in distance order, are exactly what the filtered
+        search would return. Only when the window holds fewer than top_k of them
+        (and the collection has more) does the filtered search still run.
 
-        # Step 3: Do semantic search ONLY within those documents
-        doc_filter = " or ".join([f'document_id == "{doc_id}"' for doc_id in document_ids])
-        logger.info(f"Scenario 1: Step 2 - Semantic search within {len(document_ids)} documents")
-
-        query_embedding = self.generate_embedding(query)
-
-        # Get more chunks from those documents
-        search_limit = min(len(document_ids) * 10, 50)  # 10 per doc, max 50
-        filtered_results = self.milvus_client.search_with_filter(
-            query_embedding,
-            filter_expr=doc_filter,
-            top_k=search_limit
-        )
-
-        # Collect results
-        expanded_chunks = []
-        for hits in filtered_results:
-            for hit in hits:
-                expanded_chunks.append({
-                    "id": hit.id,
-                    "distance": hit.distance,
-                    "document_id": hit.document_id,
-                    "page_number": hit.page_number,
-                    "text": hit.text,
-                    "person_names": json.loads(hit.person_names),
-                    "location_names": json.loads(hit.location_names),
-                    "organization_names": json.loads(hit.organization_names),
-                    "date_entities": json.loads(hit.date_entities),
-                    "other_entities": json.loads(hit.other_entities),
-                    "source": "scenario_1"
-                })
+        Searches only return ids; with hydrate=False the chunks are left without
+        text and entities for the caller to hydrate after merging.
+        """
+        analysis = analysis or self.analyze_query(query)
+        expanded_chunks = None
+
+        if self.scenario_1_mode == "grouped":
+            logger.info(f"Scenario 1 (Direct Semantic): Step 1 - Grouped search on ALL documents "
+                       f"({self.grouped_search_window} hits)")
+
+            # Steps 1-3 in one round trip: group the over-fetched hits by document
+            window = self._semantic_hits(analysis, top_k=self.grouped_search_window)
+            document_ids = list(dict.fromkeys(chunk["document_id"] for chunk in window[:3]))
+            search_limit = min(len(document_ids) * 10, 50)
+            candidate_documents = set(document_ids)
+            grouped_chunks = [chunk for chunk in window if chunk["document_id"] in candidate_documents]
+            if len(grouped_chunks) >= min(top_k, search_limit) or len(window) < self.grouped_search_window:
+                expanded_chunks = grouped_chunks[:search_limit]
+                for chunk in expanded_chunks:
+                    chunk["source"] = "scenario_1"
+                logger.info(f"Scenario 1: {len(grouped_chunks)} hits in {len(document_ids)} documents from one search")
+            else:
+                logger.info(f"Scenario 1: Only {len(grouped_chunks)} grouped hits, falling back to a filtered search")
+        elif self.scenario_1_mode == "routed" and len(self.document_index):
+            # Steps 1-2: Route to documents by their centroids (in process)
+            logger.info(f"Scenario 1 (Direct Semantic): Step 1 - Routing over {len(self.document_index)} documents")
+            with stage("scenario_1.route"):
+                document_ids = self.document_index.route(
+                    analysis.embedding, top_n=self.routing_documents,
+                    query_entities=analysis.entities if analysis.has_entities else None,
+                    entity_weight=self.routing_entity_weight
+                )
+            logger.info(f"Scenario 1: Routed to {len(document_ids)} documents")
+        else:
+            logger.info(f"Scenario 1 (Direct Semantic): Step 1 - Semantic search on ALL documents")
+
+            # Step 1: Get top 3 from ALL documents (only their document_ids are needed)
+            initial_chunks = self._semantic_hits(analysis, top_k=3)
+
+            # Step 2: Extract document_ids
+            document_ids = list(dict.fromkeys(chunk["document_id"] for chunk in initial_chunks))
+            logger.info(f"Scenario 1: Found {len(document_ids)} documents from initial search")
+
+        if expanded_chunks is None:
+            # Step 3: Do semantic search ONLY within those documents
+            doc_filter = document_filter_expression(document_ids)
+            if doc_filter is None:
+                return []
+            logger.info(f"Scenario 1: Step 2 - Semantic search within {len(document_ids)} documents")
+
+            # Get more chunks from those documents
+            search_limit = min(len(document_ids) * 10, 50)  # 10 per doc, max 50
+            with stage("scenario_1.filtered_search"):
+                filtered_results = self.milvus_client.search_with_filter(
+                    analysis.embedding,
+                    filter_expr=doc_filter,
+                    top_k=search_limit,
+                    output_fields=SEARCH_ID_FIELDS
+                )
+
+            # Collect results
+            expanded_chunks = []
+            for hits in filtered_results:
+                for hit in hits:
+                    expanded_chunks.append(self._light_chunk(hit, source="scenario_1"))
 
         # Sort by distance and return top K
         expanded_chunks.sort(key=lambda x: x["distance"])
         final_chunks = expanded_chunks[:top_k]
+        if hydrate:
+            final_chunks = self._hydrate_chunks(final_chunks)
 
         logger.info(f"Scenario 1: Returning {len(final_chunks)} chunks")
         return final_chunks
 
-    def retrieve_scenario_2(self, query: str, entity_chunks: int = 2, document_chunks: int = 2) -> List[Dict[str, Any]]:
+    @timed("scenario_2")
+    def retrieve_scenario_2(self, query: str, entity_chunks: int = 2, document_chunks: int = 2,
+                            analysis: QueryAnalysis = None, hydrate: bool = True) -> List[Dict[str, Any]]:
         """
         Scenario 2: Entity-first filtering with document expansion
 
@@ -297,30 +684,22 @@ class RetrievalService:
         5. Do semantic search across ALL chunks from those 15 documents (e.g., 300 chunks)
         6. Take top 2 semantic chunks
         7. Return 2 + 2 = 4 chunks
+
+        Matches and searches only carry ids; the 4 chunks are hydrated at the end
+        (or by the caller, with hydrate=False).
         """
         logger.info(f"Scenario 2: Starting (entity_chunks={entity_chunks}, document_chunks={document_chunks})")
 
-        # 1. Extract entities from query
-        query_entities = self.entity_extractor.extract_entities(query)
-        person_names = json.loads(query_entities["person_names"])
-        location_names = json.loads(query_entities["location_names"])
-        organization_names = json.loads(query_entities["organization_names"])
-        date_entities = json.loads(query_entities["date_entities"])
-        file_numbers = json.loads(query_entities["file_numbers"])
-        other_entities = json.loads(query_entities["other_entities"])
-
-        has_entities = bool(person_names or location_names or organization_names or date_entities or file_numbers or other_entities)
-
-        logger.info(f"Scenario 2: Extracted entities - persons={person_names}, locations={location_names}, "
-                   f"orgs={organization_names}, dates={date_entities}, files={file_numbers}, others={other_entities}")
+        # 1. Extract entities from query (once per request, shared with entity_based_search)
+        analysis = analysis or self.analyze_query(query)
 
         # 2. If NO entities, return empty list
-        if not has_entities:
+        if not analysis.has_entities:
             logger.info("Scenario 2: No entities found, returning empty list")
             return []
 
-        # 3. Find ALL chunks that contain entities (not just top 2)
-        all_entity_matched_chunks = self.entity_based_search(query, top_k=100)  # Get ALL entity matches
+        # 3. Find ALL chunks that contain entities (not just top 2); only ids/document_ids for now
+        all_entity_matched_chunks = self._find_entity_matches(analysis.entities, top_k=100)  # Get ALL entity matches
         logger.info(f"Scenario 2: Found {len(all_entity_matched_chunks)} total entity-matched chunks")
 
         if not all_entity_matched_chunks:
@@ -329,29 +708,30 @@ class RetrievalService:
 
         # 4. Take top 2 entity chunks (best entity match)
         top_entity_chunks = all_entity_matched_chunks[:entity_chunks]
-        logger.info(f"Scenario 2: Selected top {len(top_entity_chunks)} entity chunks")
-
-        # Mark these as entity-containing chunks
-        for chunk in top_entity_chunks:
-            chunk["source"] = "scenario_2_entity"
 
         # 5. Extract document_ids from ALL entity-matched chunks (not just top 2)
-        all_entity_document_ids = list(set([chunk["document_id"] for chunk in all_entity_matched_chunks]))
+        all_entity_document_ids = list(dict.fromkeys(chunk["document_id"] for chunk in all_entity_matched_chunks))
         logger.info(f"Scenario 2: Found entities in {len(all_entity_document_ids)} unique documents from {len(all_entity_matched_chunks)} chunks")
 
         # 6. Do semantic search across ALL chunks from those documents
-        doc_filter = " or ".join([f'document_id == "{doc_id}"' for doc_id in all_entity_document_ids])
+        doc_filter = document_filter_expression(all_entity_document_ids)
         logger.info(f"Scenario 2: Doing semantic search across ALL chunks from {len(all_entity_document_ids)} entity-matched documents")
 
-        query_embedding = self.generate_embedding(query)
         # Search more chunks since we're looking across more documents
         search_limit = min(len(all_entity_document_ids) * 10, 100)
 
-        filtered_results = self.milvus_client.search_with_filter(
-            query_embedding,
-            filter_expr=doc_filter,
-            top_k=search_limit
-        )
+        with stage("scenario_2.filtered_search"):
+            filtered_results = self.milvus_client.search_with_filter(
+                analysis.embedding,
+                filter_expr=doc_filter,
+                top_k=search_limit,
+                output_fields=SEARCH_ID_FIELDS
+            )
+        logger.info(f"Scenario 2: Selected top {len(top_entity_chunks)} entity chunks")
+
+        # Mark these as entity-containing chunks
+        for chunk in top_entity_chunks:
+            chunk["source"] = "scenario_2_entity"
 
         # 7. Collect semantic results from all entity-matched documents
         document_expansion_chunks = []
@@ -359,21 +739,9 @@ class RetrievalService:
 
         for hits in filtered_results:
             for hit in hits:
-                if hit.id not in seen_ids:
-                    document_expansion_chunks.append({
-                        "id": hit.id,
-                        "distance": hit.distance,
-                        "document_id": hit.document_id,
-                        "page_number": hit.page_number,
-                        "text": hit.text,
-                        "person_names": json.loads(hit.person_names),
-                        "location_names": json.loads(hit.location_names),
-                        "organization_names": json.loads(hit.organization_names),
-                        "date_entities": json.loads(hit.date_entities),
-                        "other_entities": json.loads(hit.other_entities),
-                        "source": "scenario_2_document"
-                    })
-                    seen_ids.add(hit.id)
+                if hit["id"] not in seen_ids:
+                    document_expansion_chunks.append(self._light_chunk(hit, source="scenario_2_document"))
+                    seen_ids.add(hit["id"])
 
         # Sort by distance and take top N
         document_expansion_chunks.sort(key=lambda x: x["distance"])
@@ -381,13 +749,17 @@ class RetrievalService:
 
         # 8. Combine: 2 entity chunks + 2 document chunks
         final_chunks = top_entity_chunks + document_expansion_chunks
+        if hydrate:
+            final_chunks = self._hydrate_chunks(final_chunks)
 
         logger.info(f"Scenario 2: Returning {len(final_chunks)} chunks "
                    f"({len(top_entity_chunks)} entity + {len(document_expansion_chunks)} document)")
 
         return final_chunks
 
-    def retrieve_hybrid(self, query: str) -> Dict[str, Any]:
+    @timed("retrieve_hybrid")
+    @cached_retrieval("hybrid")
+    def retrieve_hybrid(self, query: str, analysis: QueryAnalysis = None) -> Dict[str, Any]:
         """
         Hybrid Retrieval: Run both scenarios in parallel and merge results
 
@@ -403,15 +775,24 @@ class RetrievalService:
         - Get 2 more chunks from same documents via semantic search
 
         Final: Combine and deduplicate → Max 9 unique chunks
+
+        The query embedding and entities are computed once and shared by both scenarios.
+        Scenarios rank on ids only; text and entities are fetched once for the merged
+        chunks (two-phase retrieval). With parallel mode on, Scenario 2 runs on the scenario pool while Scenario 1
+        runs on the calling thread, so latency tracks the slower scenario.
         """
         logger.info(f"=== Hybrid Retrieval Started ===")
-
-        # Run Scenario 1 (Direct Semantic)
-        scenario_1_chunks = self.retrieve_scenario_1(query, top_k=5)
+        analysis = analysis or self.analyze_query(query)
+
+        # Run Scenario 1 (Direct Semantic) and Scenario 2 (Entity-filtered:
+        # 2 entity chunks + 2 document chunks = 4 total) concurrently
+        scenario_1_chunks, scenario_2_chunks = self._run_concurrently(
+            lambda: self.retrieve_scenario_1(query, top_k=5, analysis=analysis, hydrate=False),
+            lambda: self.retrieve_scenario_2(query, entity_chunks=2, document_chunks=2, analysis=analysis,
+                                             hydrate=False),
+            executor=self._scenario_executor
+        )
         logger.info(f"Scenario 1 returned {len(scenario_1_chunks)} chunks")
-
-        # Run Scenario 2 (Entity-filtered) - 2 entity chunks + 2 document chunks = 4 total
-        scenario_2_chunks = self.retrieve_scenario_2(query, entity_chunks=2, document_chunks=2)
         logger.info(f"Scenario 2 returned {len(scenario_2_chunks)} chunks")
 
         # Combine and deduplicate
@@ -431,8 +812,10 @@ class RetrievalService:
                 chunk["source"] = "scenario_2"
                 combined_chunks.append(chunk)
 
-        # Sort by distance (semantic similarity)
+        # Sort by distance (semantic similarity), then fetch text and entities for
+        # the surviving chunks in one request
         combined_chunks.sort(key=lambda x: x["distance"])
+        combined_chunks = self._hydrate_chunks(combined_chunks)
 
         logger.info(f"=== Hybrid Retrieval Complete: {len(combined_chunks)} unique chunks (max 9) ===")
 
@@ -445,7 +828,110 @@ class RetrievalService:
             "chunks": combined_chunks
         }
 
-    def retrieve_with_document_expansion(self, query: str, min_chunks: int = 3, max_chunks: int = 10) -> Dict[str, Any]:
+    def retrieve_hybrid_batch(self, queries: List[str]) -> List[Dict[str, Any]]:
+        """
+        Hybrid retrieval for many queries (offline evaluation / bulk workloads).
+
+        All queries are encoded in one SentenceTransformer call, parsed in one
+        nlp.pipe pass, and their Scenario 1 initial (or grouped) searches share
+        one multi-vector Milvus request. The remaining filtered searches differ per
+        query and run through retrieve_hybrid, so each result has exactly the
+        shape (and result-cache behavior) of a single retrieve_hybrid call.
+        """
+        logger.info(f"=== Batch Hybrid Retrieval Started: {len(queries)} queries ===")
+
+        analyses = self.analyze_queries(queries)
+        if self.scenario_1_mode == "grouped":
+            self.prefetch_semantic_search(analyses, top_k=self.grouped_search_window)
+        elif self.scenario_1_mode == "two_pass":
+            self.prefetch_semantic_search(analyses, top_k=3)
+
+        results = [self.retrieve_hybrid(query, analysis=analysis) for query, analysis in zip(queries, analyses)]
+
+        logger.info(f"=== Batch Hybrid Retrieval Complete: {len(results)} queries ===")
+        return results
+
+    def lexical_search(self, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
+        """BM25 keyword search over chunk text (exact terms, file numbers, addresses)"""
+        if self.bm25_index is None:
+            raise Exception("BM25 index not enabled")
+
+        ranked = self._bm25_search(normalize_query(query), top_k)
+        return self._hydrate_chunks([
+            {"id": chunk_id, "distance": None, "document_id": self.bm25_index.document_id(chunk_id),
+             "source": "bm25", "bm25_score": score}
+            for chunk_id, score in ranked
+        ])
+
+    @timed("bm25_search")
+    def _bm25_search(self, query: str, top_k: int):
+        return self.bm25_index.search(query, top_k=top_k)
+
+    @timed("retrieve_fusion")
+    @cached_retrieval("fusion")
+    def retrieve_fusion(self, query: str, top_k: int = 8, candidates: int = 50,
+                        analysis: QueryAnalysis = None) -> Dict[str, Any]:
+        """
+        Lexical + semantic retrieval fused with reciprocal rank fusion (RRF).
+
+        1. BM25 search and vector search, top `candidates` each (concurrently)
+        2. Score every chunk by sum of 1 / (rrf_k + rank) over the rankings it appears in
+        3. Return the top_k fused chunks, hydrated with one id lookup
+
+        Suited to keyword-heavy queries (party names, addresses, file numbers)
+        where exact terms matter as much as meaning.
+        """
+        if self.bm25_index is None:
+            raise Exception("BM25 index not enabled")
+
+        logger.info(f"=== Fusion Retrieval Started ===")
+        analysis = analysis or self.analyze_query(query)
+
+        semantic_chunks, lexical_ranking = self._run_concurrently(
+            lambda: self._semantic_hits(analysis, top_k=candidates),
+            lambda: self._bm25_search(analysis.normalized_query, candidates)
+        )
+        logger.info(f"Fusion: {len(semantic_chunks)} semantic and {len(lexical_ranking)} BM25 candidates")
+
+        fused_scores: Dict[int, float] = {}
+        for rank, chunk in enumerate(semantic_chunks, start=1):
+            fused_scores[chunk["id"]] = fused_scores.get(chunk["id"], 0.0) + 1.0 / (self.rrf_k + rank)
+        bm25_scores = {}
+        for rank, (chunk_id, score) in enumerate(lexical_ranking, start=1):
+            fused_scores[chunk_id] = fused_scores.get(chunk_id, 0.0) + 1.0 / (self.rrf_k + rank)
+            bm25_scores[chunk_id] = score
+
+        top_ids = sorted(fused_scores, key=lambda chunk_id: (-fused_scores[chunk_id], chunk_id))[:top_k]
+
+        chunks_by_id = {chunk["id"]: chunk for chunk in semantic_chunks}
+        final_chunks = []
+        for chunk_id in top_ids:
+            chunk = chunks_by_id.get(chunk_id) or {
+                "id": chunk_id, "distance": None, "document_id": self.bm25_index.document_id(chunk_id)
+            }
+            in_semantic = chunk["distance"] is not None
+            in_lexical = chunk_id in bm25_scores
+            chunk["source"] = "fusion_both" if in_semantic and in_lexical else (
+                "fusion_semantic" if in_semantic else "fusion_bm25")
+            chunk["rrf_score"] = fused_scores[chunk_id]
+            if in_lexical:
+                chunk["bm25_score"] = bm25_scores[chunk_id]
+            final_chunks.append(chunk)
+        final_chunks = self._hydrate_chunks(final_chunks)
+
+        logger.info(f"=== Fusion Retrieval Complete: {len(final_chunks)} chunks ===")
+
+        return {
+            "query": query,
+            "total_results": len(final_chunks),
+            "semantic_count": len(semantic_chunks),
+            "lexical_count": len(lexical_ranking),
+            "chunks": final_chunks
+        }
+
+    @cached_retrieval("document_expansion")
+    def retrieve_with_document_expansion(self, query: str, min_chunks: int = 3, max_chunks: int = 10,
+                                         analysis: QueryAnalysis = None) -> Dict[str, Any]:
         """
         Enhanced retrieval that expands to get more chunks from the same documents:
         1. Direct semantic search (top 3)
@@ -454,24 +940,17 @@ class RetrievalService:
         4. Combine and return
         """
         logger.info(f"Processing query with document expansion: {query}")
+        analysis = analysis or self.analyze_query(query)
 
-        # 1. Direct semantic search
-        semantic_chunks = self.semantic_search(query, top_k=3)
+        # 1. Direct semantic search, concurrently with 2. entity extraction + matching
+        semantic_chunks, entity_matched_chunks = self._run_concurrently(
+            lambda: self._semantic_hits(analysis, top_k=3),
+            lambda: self._find_entity_matches(analysis.entities, top_k=50) if analysis.has_entities else [],
+            executor=self._scenario_executor
+        )
         logger.info(f"Found {len(semantic_chunks)} chunks from semantic search")
 
-        # 2. Extract entities from query
-        query_entities = self.entity_extractor.extract_entities(query)
-        person_names = json.loads(query_entities["person_names"])
-        location_names = json.loads(query_entities["location_names"])
-        organization_names = json.loads(query_entities["organization_names"])
-        date_entities = json.loads(query_entities["date_entities"])
-        file_numbers = json.loads(query_entities["file_numbers"])
-        other_entities = json.loads(query_entities["other_entities"])
-
-        has_entities = bool(person_names or location_names or organization_names or date_entities or file_numbers or other_entities)
-
-        logger.info(f"Extracted entities - persons={person_names}, locations={location_names}, "
-                   f"orgs={organization_names}, dates={date_entities}, files={file_numbers}, others={other_entities}")
+        has_entities = analysis.has_entities
         logger.info(f"Entities found: {has_entities}")
 
         if not has_entities:
@@ -483,54 +962,42 @@ class RetrievalService:
                 "semantic_count": len(semantic_chunks),
                 "entity_count": 0,
                 "document_expansion": False,
-                "chunks": semantic_chunks
+                "chunks": self._hydrate_chunks(semantic_chunks)
             }
 
-        # 3. Get entity-matched chunks to find relevant document_ids
-        entity_matched_chunks = self.entity_based_search(query, top_k=50)  # Get more candidates
+        # 3. Entity-matched chunks (top 50 candidates) identify the relevant document_ids
         logger.info(f"Found {len(entity_matched_chunks)} entity-matched chunks")
 
         # 4. Extract unique document_ids that contain entities
-        entity_document_ids = list(set([chunk["document_id"] for chunk in entity_matched_chunks]))
+        entity_document_ids = list(dict.fromkeys(chunk["document_id"] for chunk in entity_matched_chunks))
         logger.info(f"Found entities in {len(entity_document_ids)} documents: {entity_document_ids[:5]}...")
 
         # 5. Get ALL chunks from those specific documents
         document_chunks = []
         if entity_document_ids:
             # Build filter expression for Milvus
-            doc_filter = " or ".join([f'document_id == "{doc_id}"' for doc_id in entity_document_ids])
+            doc_filter = document_filter_expression(entity_document_ids)
             logger.info(f"Fetching all chunks from entity-matched documents")
 
             # Search with document filter
             # Increase top_k significantly to get more chunks per document
             # Formula: num_docs * chunks_per_doc = 18 * 5 = 90
-            query_embedding = self.generate_embedding(query)
             chunks_per_doc = 5  # Get at least 5 chunks from each document
             search_limit = min(len(entity_document_ids) * chunks_per_doc, 100)  # Cap at 100
 
             logger.info(f"Requesting {search_limit} chunks across {len(entity_document_ids)} documents")
 
-            filtered_results = self.milvus_client.search_with_filter(
-                query_embedding,
-                filter_expr=doc_filter,
-                top_k=search_limit
-            )
+            with stage("document_expansion.filtered_search"):
+                filtered_results = self.milvus_client.search_with_filter(
+                    analysis.embedding,
+                    filter_expr=doc_filter,
+                    top_k=search_limit,
+                    output_fields=SEARCH_ID_FIELDS
+                )
 
             for hits in filtered_results:
                 for hit in hits:
-                    document_chunks.append({
-                        "id": hit.id,
-                        "distance": hit.distance,
-                        "document_id": hit.document_id,
-                        "page_number": hit.page_number,
-                        "text": hit.text,
-                        "person_names": json.loads(hit.person_names),
-                        "location_names": json.loads(hit.location_names),
-                        "organization_names": json.loads(hit.organization_names),
-                        "date_entities": json.loads(hit.date_entities),
-                        "other_entities": json.loads(hit.other_entities),
-                        "source": "document_expansion"
-                    })
+                    document_chunks.append(self._light_chunk(hit, source="document_expansion"))
 
             logger.info(f"Retrieved {len(document_chunks)} chunks from entity-matched documents")
 
@@ -564,8 +1031,8 @@ class RetrievalService:
         # Sort by distance (semantic similarity)
         combined_chunks.sort(key=lambda x: x["distance"])
 
-        # Apply max limit
-        final_chunks = combined_chunks[:max_chunks]
+        # Apply max limit, then fetch text and entities for the final chunks only
+        final_chunks = self._hydrate_chunks(combined_chunks[:max_chunks])
 
         logger.info(f"Returning {len(final_chunks)} chunks after document expansion and deduplication")
         logger.info(f"Chunks per document: {chunks_per_document}")